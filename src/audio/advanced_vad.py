@@ -3,9 +3,30 @@ import collections
 import webrtcvad
 import numpy as np
 import time
+from dataclasses import dataclass
 from pathlib import Path
 
 from ..utils.config_utils import load_config
+from .noise_floor import NoiseFloorTracker
+
+
+@dataclass
+class SpeechChunk:
+    """Trozo de voz emitido por `AdvancedVADSegmenter.chunks()`.
+
+    `pcm` contiene todo el audio del segmento acumulado hasta el momento.
+    Los trozos provisionales (`final=False`) se emiten cada
+    `partial_interval_ms` de voz mientras el hablante continúa; el trozo
+    final cierra el segmento `segment_id`.
+
+    `t_start` es el instante ADC (`time.monotonic()`) del primer frame con voz
+    y `t_end` el del final del último frame incluido.
+    """
+    segment_id: int
+    pcm: bytes
+    final: bool
+    t_start: float | None = None
+    t_end: float | None = None
 
 
 class AdvancedVADSegmenter:
@@ -28,19 +49,34 @@ class AdvancedVADSegmenter:
         
         self.vad = webrtcvad.Vad(aggressiveness)
         self.num_pad = max(1, padding_ms // frame_ms)
+        self.partial_interval_ms = int(self.config.get('vad', 'partial_interval_ms', fallback=0))
         
         # Configuración de audio
         self.min_speech_duration_ms = int(self.config.get('audio', 'min_speech_duration_ms', fallback=300))
         self.max_silence_duration_ms = int(self.config.get('audio', 'max_silence_duration_ms', fallback=800))
         self.voice_threshold_db = float(self.config.get('audio', 'voice_threshold_db', fallback=-30))
         self.noise_gate_db = float(self.config.get('audio', 'noise_gate_db', fallback=-45))
+        self.max_segment_duration_ms = int(self.config.get('audio', 'max_segment_duration_ms', fallback=15000))
+        self.split_search_window_ms = int(self.config.get('audio', 'split_search_window_ms', fallback=2000))
+        self.noise_tracker = None
+        if self.config.getboolean('audio', 'auto_threshold', fallback=False):
+            self.noise_tracker = NoiseFloorTracker.from_config(self.config, frame_ms)
         
         # Prevención de bucles
         self.enable_feedback_detection = self.config.getboolean('feedback_prevention', 'enable_feedback_detection', fallback=True)
         self.max_consecutive = int(self.config.get('feedback_prevention', 'max_consecutive_translations', fallback=3))
         self.cooldown_ms = int(self.config.get('feedback_prevention', 'cooldown_after_translation_ms', fallback=500))
         
+        # Estado de reproducción preciso (HalfDuplexGate). Si está presente
+        # sustituye al cooldown y al límite de traducciones consecutivas.
+        self.playback_gate = None
+        # Callback opcional `on_speech_start(segment_id, t_start)` (barge-in)
+        self.on_speech_start = None
+
         # Estado interno
+        self.segment_counter = 0
+        self.segments_accepted = 0
+        self.segments_rejected = 0
         self.consecutive_count = 0
         self.last_translation_time = 0
         self.recent_utterances = collections.deque(maxlen=5)
@@ -60,6 +96,8 @@ class AdvancedVADSegmenter:
             
             padding_ms = self.config.getint('vad', 'padding_ms', fallback=600)
             self.num_pad = max(1, padding_ms // self.frame_ms)
+            self.partial_interval_ms = self.config.getint('vad', 'partial_interval_ms',
+                                                          fallback=0)
             
             # Actualizar configuración de audio
             self.min_speech_duration_ms = self.config.getint('audio', 
@@ -74,6 +112,21 @@ class AdvancedVADSegmenter:
             self.noise_gate_db = self.config.getfloat('audio', 
                                                     'noise_gate_db', 
                                                     fallback=-45)
+            self.max_segment_duration_ms = self.config.getint('audio',
+                                                            'max_segment_duration_ms',
+                                                            fallback=15000)
+            self.split_search_window_ms = self.config.getint('audio',
+                                                           'split_search_window_ms',
+                                                           fallback=2000)
+            if self.config.getboolean('audio', 'auto_threshold', fallback=False):
+                # Conservar la estimación en curso si ya estaba activo
+                if self.noise_tracker is None:
+                    self.noise_tracker = NoiseFloorTracker.from_config(self.config,
+                                                                       self.frame_ms)
+                else:
+                    self._apply_noise_floor()
+            else:
+                self.noise_tracker = None
             
             # Actualizar prevención de bucles
             self.enable_feedback_detection = self.config.getboolean(
@@ -93,6 +146,18 @@ class AdvancedVADSegmenter:
         except Exception as e:
             print(f"[VAD] ❌ Error recargando configuración: {e}")
 
+    @property
+    def noise_floor_db(self):
+        """Suelo de ruido estimado (None si auto_threshold está desactivado)."""
+        return self.noise_tracker.noise_floor_db if self.noise_tracker else None
+
+    def _apply_noise_floor(self):
+        """Mueve la puerta de ruido y el umbral de voz según el suelo estimado."""
+        if self.noise_tracker is None or self.noise_tracker.noise_floor_db is None:
+            return
+        self.noise_gate_db = self.noise_tracker.gate_db
+        self.voice_threshold_db = self.noise_tracker.voice_db
+
     def calculate_rms_db(self, audio_bytes):
         """Calcula el RMS en decibelios del audio."""
         if len(audio_bytes) == 0:
@@ -117,6 +182,15 @@ class AdvancedVADSegmenter:
         db_level = self.calculate_rms_db(audio_bytes)
         return db_level > self.noise_gate_db
 
+    def _playback_gated(self) -> bool:
+        """True si la puerta half-duplex está actuando sobre la captura."""
+        if self.playback_gate is None:
+            return False
+        try:
+            return self.playback_gate.is_active()
+        except Exception:
+            return False
+
     def is_voice_level_sufficient(self, audio_bytes):
         """Verifica si el nivel de audio es suficiente para voz."""
         db_level = self.calculate_rms_db(audio_bytes)
@@ -125,9 +199,10 @@ class AdvancedVADSegmenter:
     def should_process_utterance(self, utterance_bytes):
         """Determina si el utterance debe procesarse (anti-bucle)."""
         current_time = time.time() * 1000  # en ms
+        legacy_timing = self.playback_gate is None
         
         # Verificar cooldown después de traducción
-        if current_time - self.last_translation_time < self.cooldown_ms:
+        if legacy_timing and current_time - self.last_translation_time < self.cooldown_ms:
             print(f"[VAD] Utterance ignorado por cooldown ({current_time - self.last_translation_time:.0f}ms)")
             return False
         
@@ -143,7 +218,7 @@ class AdvancedVADSegmenter:
             return False
         
         # Verificar máximo de traducciones consecutivas
-        if self.consecutive_count >= self.max_consecutive:
+        if legacy_timing and self.consecutive_count >= self.max_consecutive:
             print(f"[VAD] Máximo de traducciones consecutivas alcanzado ({self.consecutive_count})")
             self.consecutive_count = 0
             return False
@@ -155,14 +230,46 @@ class AdvancedVADSegmenter:
         self.last_translation_time = time.time() * 1000
         self.consecutive_count += 1
 
+    def find_split_point(self, frame_levels):
+        """Índice (exclusivo) donde cortar un segmento demasiado largo.
+
+        Busca el frame de menor energía dentro de la ventana final de
+        `split_search_window_ms`; el corte se hace justo después de él para
+        que la palabra en curso pase completa al siguiente segmento.
+        """
+        window = max(1, self.split_search_window_ms // self.frame_ms)
+        start = max(1, len(frame_levels) - window)
+        levels = np.asarray(frame_levels[start:])
+        return start + int(np.argmin(levels)) + 1
+
     async def segments(self, frames_q: asyncio.Queue):
+        """Entrega sólo utterances completas (bytes), como el VAD original."""
+        async for chunk in self.chunks(frames_q):
+            if chunk.final:
+                yield chunk.pcm
+
+    async def chunks(self, frames_q: asyncio.Queue):
+        """Entrega `SpeechChunk` provisionales y finales por segmento.
+
+        La cola puede contener bytes o tuplas `(frame, t_adc)`; sin instante
+        ADC se usa el momento de llegada del frame.
+        """
         ring = collections.deque(maxlen=self.num_pad)
         voiced_frames = bytearray()
+        frame_levels = []  # dB por frame de voiced_frames
+        frame_times = []   # instante ADC por frame de voiced_frames
+        frame_s = self.frame_ms / 1000
+        t_start = None
         triggered = False
         silence_count = 0
+        voiced_since_partial = 0
         
         while True:
-            frame: bytes = await frames_q.get()
+            item = await frames_q.get()
+            if isinstance(item, tuple):
+                frame, t_adc = item
+            else:
+                frame, t_adc = item, time.monotonic()
             
             # Normalizar tamaño exacto de frame
             if len(frame) != self.bytes_per_frame:
@@ -171,31 +278,60 @@ class AdvancedVADSegmenter:
                 else:
                     frame = frame[: self.bytes_per_frame]
 
+            db_level = self.calculate_rms_db(frame)
+
+            # Seguimiento del suelo de ruido con frames sin voz fuera de un
+            # segmento. Usa la decisión del VAD sin puerta para que una puerta
+            # demasiado alta no contamine la estimación con voz. Durante la
+            # reproducción la puerta half-duplex silencia o atenúa los frames:
+            # no representan el ruido de la sala.
+            vad_speech = None
+            if (self.noise_tracker is not None and not triggered
+                    and not self._playback_gated()):
+                vad_speech = self.vad.is_speech(frame, self.sample_rate)
+                if not vad_speech and self.noise_tracker.observe(db_level):
+                    self._apply_noise_floor()
+
             # Aplicar puerta de ruido
-            if not self.is_noise_gate_open(frame):
+            if db_level <= self.noise_gate_db:
                 # Frame demasiado silencioso, tratarlo como silencio
                 is_speech = False
+            elif vad_speech is not None:
+                is_speech = vad_speech
             else:
                 # Frame suficientemente fuerte, verificar con VAD
                 is_speech = self.vad.is_speech(frame, self.sample_rate)
 
             if not triggered:
-                ring.append((frame, is_speech))
-                num_voiced = sum(1 for _, s in ring if s)
+                ring.append((frame, is_speech, db_level, t_adc))
+                num_voiced = sum(1 for _, s, _, _ in ring if s)
                 # Usar umbral más estricto
                 if num_voiced > self.voice_ratio_threshold * ring.maxlen:
                     triggered = True
-                    for f, _ in ring:
+                    t_start = next(t for _, s, _, t in ring if s)
+                    for f, _, level, t in ring:
                         voiced_frames.extend(f)
+                        frame_levels.append(level)
+                        frame_times.append(t)
                     ring.clear()
+                    self.segment_counter += 1
+                    voiced_since_partial = num_voiced
                     print(f"[VAD] Inicio de utterance detectado")
+                    if self.on_speech_start is not None:
+                        try:
+                            self.on_speech_start(self.segment_counter, t_start)
+                        except Exception as e:
+                            print(f"[VAD] Error en on_speech_start: {e}")
             else:
                 voiced_frames.extend(frame)
-                ring.append((frame, is_speech))
+                frame_levels.append(db_level)
+                frame_times.append(t_adc)
+                ring.append((frame, is_speech, db_level, t_adc))
                 if not is_speech:
                     silence_count += 1
                 else:
                     silence_count = 0
+                    voiced_since_partial += 1
 
                 # Usar configuración dinámica para el final
                 max_silence_frames = self.max_silence_duration_ms // self.frame_ms
@@ -205,17 +341,59 @@ class AdvancedVADSegmenter:
                     
                     # Verificar si debe procesarse
                     if self.should_process_utterance(utterance):
+                        self.segments_accepted += 1
                         duration_ms = len(utterance) * 1000 // (self.sample_rate * 2)
                         db_level = self.calculate_rms_db(utterance)
                         print(f"[VAD] Utterance válido: {duration_ms}ms, {db_level:.1f}dB")
-                        yield utterance
+                        yield SpeechChunk(self.segment_counter, utterance, final=True,
+                                          t_start=t_start,
+                                          t_end=frame_times[-1] + frame_s)
                         # Resetear contador solo si fue procesado exitosamente
                         # self.mark_translation_completed() se llamará externamente
+                    else:
+                        self.segments_rejected += 1
                     
                     voiced_frames = bytearray()
+                    frame_levels = []
+                    frame_times = []
                     ring.clear()
                     triggered = False
                     silence_count = 0
+                    voiced_since_partial = 0
+
+                elif (self.max_segment_duration_ms > 0 and
+                      len(frame_levels) * self.frame_ms >= self.max_segment_duration_ms):
+                    # Segmento demasiado largo: cortar en el punto más silencioso
+                    # y conservar el resto como inicio del siguiente segmento
+                    split = self.find_split_point(frame_levels)
+                    cut = split * self.bytes_per_frame
+                    utterance = bytes(voiced_frames[:cut])
+                    t_end = frame_times[split - 1] + frame_s
+                    del voiced_frames[:cut]
+                    del frame_levels[:split]
+                    del frame_times[:split]
+                    silence_count = min(silence_count, len(frame_levels))
+
+                    if self.should_process_utterance(utterance):
+                        self.segments_accepted += 1
+                        duration_ms = len(utterance) * 1000 // (self.sample_rate * 2)
+                        print(f"[VAD] Utterance largo dividido: {duration_ms}ms "
+                              f"(quedan {len(frame_levels) * self.frame_ms}ms)")
+                        yield SpeechChunk(self.segment_counter, utterance, final=True,
+                                          t_start=t_start, t_end=t_end)
+                    else:
+                        self.segments_rejected += 1
+                    # El resto continúa como un segmento nuevo
+                    self.segment_counter += 1
+                    t_start = frame_times[0] if frame_times else t_adc + frame_s
+                    voiced_since_partial = 0
+
+                elif (self.partial_interval_ms > 0 and
+                      voiced_since_partial * self.frame_ms >= self.partial_interval_ms):
+                    # Trozo provisional para backends de ASR en streaming
+                    voiced_since_partial = 0
+                    yield SpeechChunk(self.segment_counter, bytes(voiced_frames), final=False,
+                                      t_start=t_start, t_end=t_adc + frame_s)
 
 
 # Compatibilidad con el VAD original
@@ -0,0 +1,214 @@
+"""
+Cancelación de eco acústico (AEC) usando como referencia el PCM enviado al sink.
+
+`EchoReference` guarda el audio escrito por `AudioSink.write` en una línea de
+tiempo monotónica (instante estimado en que cada muestra sale por el DAC).
+`EchoCanceller` alinea cada frame capturado con esa referencia y resta el eco
+estimado con un filtro adaptativo NLMS en dominio de frecuencia por bloques
+particionados (PBFDAF, overlap-save) antes de que el frame llegue al VAD.
+"""
+import collections
+import threading
+import time
+
+import numpy as np
+
+
+class EchoReference:
+    """Línea de tiempo del audio reproducido, remuestreado a la tasa de captura."""
+
+    def __init__(self, sample_rate: int = 16000, history_s: float = 2.0):
+        self.sample_rate = sample_rate
+        self.history_s = history_s
+        self._chunks = collections.deque()  # (t_inicio, t_fin, float32[])
+        self._lock = threading.Lock()
+
+    def push(self, pcm16_bytes: bytes, samplerate: int, t_play: float):
+        """Registra PCM16 mono que empezará a sonar en `t_play` (monotónico)."""
+        if not pcm16_bytes:
+            return
+        samples = np.frombuffer(pcm16_bytes, dtype=np.int16).astype(np.float32)
+        if samplerate != self.sample_rate and len(samples):
+            n_out = int(round(len(samples) * self.sample_rate / samplerate))
+            src_pos = np.arange(n_out) * (samplerate / self.sample_rate)
+            samples = np.interp(src_pos, np.arange(len(samples)), samples).astype(np.float32)
+        t_end = t_play + len(samples) / self.sample_rate
+        with self._lock:
+            self._chunks.append((t_play, t_end, samples))
+            horizon = t_end - self.history_s
+            while self._chunks and self._chunks[0][1] < horizon:
+                self._chunks.popleft()
+
+    def fetch(self, t_start: float, n: int) -> np.ndarray:
+        """Devuelve `n` muestras de referencia desde `t_start` (ceros si no hay audio)."""
+        out = np.zeros(n, dtype=np.float32)
+        t_end = t_start + n / self.sample_rate
+        with self._lock:
+            for c_start, c_end, samples in self._chunks:
+                if c_end <= t_start or c_start >= t_end:
+                    continue
+                # Offset de la muestra 0 del chunk respecto al inicio pedido
+                offset = int(round((c_start - t_start) * self.sample_rate))
+                src_from = max(0, -offset)
+                dst_from = max(0, offset)
+                count = min(len(samples) - src_from, n - dst_from)
+                if count > 0:
+                    out[dst_from:dst_from + count] = samples[src_from:src_from + count]
+        return out
+
+    def clear(self):
+        with self._lock:
+            self._chunks.clear()
+
+
+class EchoCanceller:
+    """Filtro adaptativo PBFDAF (NLMS en frecuencia) aplicado frame a frame.
+
+    - Entrada: frames PCM16 (bytes) de `frame_ms` y su instante ADC monotónico.
+    - Salida: frames PCM16 del mismo tamaño con el eco de la referencia restado.
+    """
+
+    def __init__(self, reference: EchoReference, sample_rate=16000, frame_ms=20,
+                 filter_length_ms=200, step_size=0.3, bulk_delay_ms=0,
+                 double_talk_threshold=0.5, resync_tolerance_ms=5):
+        self.reference = reference
+        self.sample_rate = sample_rate
+        self.block = int(sample_rate * frame_ms / 1000)
+        self.partitions = max(1, int(np.ceil(filter_length_ms / frame_ms)))
+        self.step_size = step_size
+        self.bulk_delay = bulk_delay_ms / 1000.0
+        self.double_talk_threshold = double_talk_threshold
+        self.resync_tolerance = resync_tolerance_ms / 1000.0
+
+        bins = self.block + 1
+        self._W = np.zeros((self.partitions, bins), dtype=np.complex64)
+        self._X = np.zeros((self.partitions, bins), dtype=np.complex64)
+        self._power = np.full(bins, 1.0, dtype=np.float32)
+        self._prev_x = np.zeros(self.block, dtype=np.float32)
+        self._ref_cursor = None
+        self._silent_blocks = self.partitions
+        # Arranque: se adapta sin detector hasta que el filtro estima el eco
+        # (o pasa ~1 s de referencia), porque con W = 0 el eco estimado es nulo
+        self._warmup_frames = max(1, int(1000 / frame_ms))
+        self._warmup_left = self._warmup_frames
+        # Si el eco deja de explicarse durante ~1 s seguido con referencia
+        # activa (sin pausas del habla local), el camino de eco ha cambiado
+        # (volumen, posición del micro, dispositivo): se vuelve a converger
+        self._recovery_frames = max(1, int(1000 / frame_ms))
+        self._unexplained = 0
+
+        # Estadísticas para diagnóstico
+        self.frames_processed = 0
+        self.frames_adapted = 0
+        self.double_talk_frames = 0
+        self.reconvergences = 0
+
+    def process(self, frame: bytes, t_adc: float | None = None) -> bytes:
+        """Cancela el eco de un frame capturado en `t_adc` (monotónico)."""
+        n = self.block
+        if len(frame) != n * 2:
+            return frame
+        if t_adc is None:
+            t_adc = time.monotonic() - n / self.sample_rate
+
+        # Cursor de referencia: avanza un bloque por frame y sólo se
+        # re-sincroniza con el reloj ADC si la deriva supera la tolerancia.
+        expected = t_adc - self.bulk_delay
+        if (self._ref_cursor is None
+                or abs(self._ref_cursor - expected) > self.resync_tolerance):
+            self._ref_cursor = expected
+        x = self.reference.fetch(self._ref_cursor, n)
+        self._ref_cursor += n / self.sample_rate
+
+        x_peak = float(np.max(np.abs(x)))
+        if x_peak < 1.0:
+            self._silent_blocks += 1
+        else:
+            self._silent_blocks = 0
+        # Sin referencia reciente no hay eco que cancelar: paso directo. El
+        # historial sigue avanzando con bloques nulos para que, al volver la
+        # referencia, el filtro no combine audio anterior al silencio.
+        if self._silent_blocks > self.partitions:
+            self._prev_x[:] = 0.0
+            self._push_block(np.zeros(n + 1, dtype=np.complex64))
+            return frame
+        self.frames_processed += 1
+
+        d = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+
+        # Historial de bloques de referencia en frecuencia (overlap-save)
+        X = np.fft.rfft(np.concatenate((self._prev_x, x)))
+        self._prev_x = x
+        self._push_block(X)
+
+        Y = np.sum(self._W * self._X, axis=0)
+        y = np.fft.irfft(Y, n=2 * n)[n:]
+        e = d - y
+
+        # Detector de doble habla (Geigel sobre el eco estimado): no adaptar si
+        # el eco que predice el filtro no explica al menos `threshold` del pico
+        # del micro (habla local sobre el TTS). Comparar con la referencia
+        # bruta fallaría con ganancias de eco >= threshold.
+        d_peak = float(np.max(np.abs(d)))
+        y_peak = float(np.max(np.abs(y)))
+        explained = y_peak >= self.double_talk_threshold * d_peak
+        if explained and y_peak >= 1.0:
+            self._warmup_left = 0
+        self._unexplained = 0 if explained else self._unexplained + 1
+        if self._unexplained >= self._recovery_frames:
+            self._unexplained = 0
+            self._warmup_left = self._warmup_frames
+            self.reconvergences += 1
+        if explained or self._warmup_left > 0:
+            self._warmup_left = max(0, self._warmup_left - 1)
+            self._adapt(X, e)
+            self.frames_adapted += 1
+        else:
+            self.double_talk_frames += 1
+
+        out = np.clip(np.round(e), -32768, 32767).astype(np.int16)
+        return out.tobytes()
+
+    def _push_block(self, X):
+        self._X = np.roll(self._X, 1, axis=0)
+        self._X[0] = X
+
+    def _adapt(self, X, e):
+        n = self.block
+        self._power = 0.9 * self._power + 0.1 * (np.abs(X) ** 2).astype(np.float32)
+        E = np.fft.rfft(np.concatenate((np.zeros(n, dtype=np.float32), e)))
+        mu = self.step_size / (self._power * self.partitions + 1e-6)
+        G = np.conj(self._X) * (E * mu)
+        # Restricción de gradiente: anular la mitad circular de la respuesta
+        g = np.fft.irfft(G, n=2 * n, axis=1)
+        g[:, n:] = 0.0
+        self._W += np.fft.rfft(g, axis=1).astype(np.complex64)
+
+    def clear_history(self):
+        """Olvida la referencia ya vista (p.ej. al vaciar el sink en un
+        barge-in) conservando el filtro: el camino de eco no ha cambiado."""
+        self._X[:] = 0
+        self._prev_x[:] = 0.0
+        self._ref_cursor = None
+        self._silent_blocks = self.partitions
+        self._unexplained = 0
+
+    def reset(self):
+        self._W[:] = 0
+        self.clear_history()
+        self._warmup_left = self._warmup_frames
+
+    @classmethod
+    def from_config(cls, config, reference, sample_rate=16000, frame_ms=20):
+        """Construye el cancelador desde la sección [echo_cancellation]."""
+        section = 'echo_cancellation'
+        return cls(
+            reference,
+            sample_rate=sample_rate,
+            frame_ms=frame_ms,
+            filter_length_ms=config.getint(section, 'filter_length_ms', fallback=200),
+            step_size=config.getfloat(section, 'step_size', fallback=0.3),
+            bulk_delay_ms=config.getint(section, 'bulk_delay_ms', fallback=0),
+            double_talk_threshold=config.getfloat(section, 'double_talk_threshold',
+                                                  fallback=0.5),
+        )
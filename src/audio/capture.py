@@ -1,12 +1,15 @@
 import asyncio
+import time
 import sounddevice as sd
-from typing import AsyncGenerator, Optional
+from typing import AsyncGenerator, Optional, Tuple
 
 
 class MicCapture:
     """Captura audio mono PCM16 a 16 kHz en frames de N ms.
 
     Entrega frames de tamaño fijo (p.ej. 20 ms) como bytes `int16`.
+    `timed_frames()` entrega además el instante ADC de cada frame en el reloj
+    de `time.monotonic()`.
     """
 
     def __init__(self, device_name: Optional[str], samplerate: int = 16000, frame_ms: int = 20, exclusive: bool = False):
@@ -14,7 +17,10 @@ class MicCapture:
         self.frame_ms = frame_ms
         self.blocksize = int(samplerate * frame_ms / 1000)
         self.bytes_per_frame = self.blocksize * 2  # int16
-        self._queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=256)
+        self._queue: asyncio.Queue[Tuple[bytes, float]] = asyncio.Queue(maxsize=256)
+        # Contadores de pérdidas (telemetría)
+        self.dropped_frames = 0    # cola llena: el pipeline no consume a tiempo
+        self.input_overflows = 0   # PortAudio perdió muestras antes del callback
         try:
             self._loop = asyncio.get_running_loop()
         except RuntimeError:
@@ -76,18 +82,35 @@ class MicCapture:
                 return idx
         return None
 
-    def _callback(self, indata, frames, time, status):
+    def _adc_time(self, time_info, frames) -> float:
+        """Convierte el instante ADC de PortAudio al reloj monotónico."""
+        now = time.monotonic()
+        try:
+            if time_info.currentTime and time_info.inputBufferAdcTime:
+                return now - (time_info.currentTime - time_info.inputBufferAdcTime)
+        except Exception:
+            pass
+        # Algunos host APIs no informan tiempos: estimar con la latencia
+        try:
+            latency = float(self.stream.latency)
+        except Exception:
+            latency = 0.0
+        return now - frames / self.samplerate - latency
+
+    def _callback(self, indata, frames, time_info, status):
         if status:
             # No levantar excepciones desde el hilo de PortAudio
-            pass
+            if status.input_overflow:
+                self.input_overflows += 1
         data = bytes(indata[: frames * 2])  # ya es int16 raw
+        t_adc = self._adc_time(time_info, frames)
         # Use call_soon_threadsafe to enqueue; if the queue is full, drop frame
         def _put():
             try:
-                self._queue.put_nowait(data)
+                self._queue.put_nowait((data, t_adc))
             except Exception:
                 # QueueFull or other error: drop frame silently
-                pass
+                self.dropped_frames += 1
 
         try:
             self._loop.call_soon_threadsafe(_put)
@@ -97,9 +120,14 @@ class MicCapture:
 
     async def frames(self) -> AsyncGenerator[bytes, None]:
         while True:
-            chunk = await self._queue.get()
+            chunk, _ = await self._queue.get()
             yield chunk
 
+    async def timed_frames(self) -> AsyncGenerator[Tuple[bytes, float], None]:
+        """Igual que `frames()` pero con el instante ADC monotónico de cada frame."""
+        while True:
+            yield await self._queue.get()
+
     def close(self):
         try:
             self.stream.stop(); self.stream.close()
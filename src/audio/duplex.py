@@ -0,0 +1,77 @@
+"""
+Modo half-duplex: silencia o atenúa la captura mientras el sink reproduce TTS.
+
+Alternativa barata a la cancelación de eco. En lugar de adivinar con cooldowns
+de reloj cuándo termina nuestra propia voz, consulta el estado real de
+reproducción de `AudioSink` (audio en buffer o sonando) más un hangover.
+"""
+import time
+
+import numpy as np
+
+
+def frame_rms_db(frame: bytes) -> float:
+    """RMS en dBFS de un frame PCM16 (referencia: 32767 = 0 dB)."""
+    if not frame:
+        return -100.0
+    samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+    rms = float(np.sqrt(np.mean(samples ** 2)))
+    return 20 * np.log10(rms / 32767.0) if rms > 0 else -100.0
+
+
+class HalfDuplexGate:
+    """Puerta de captura controlada por el estado de reproducción del sink.
+
+    - `mode='mute'`: los frames se sustituyen por silencio.
+    - `mode='attenuate'`: los frames se atenúan `attenuation_db`.
+    - Un frame por encima de `barge_in_db` abre la puerta (el usuario habla
+      encima del TTS) y la mantiene abierta durante `hangover_ms`.
+    """
+
+    def __init__(self, playback, mode='mute', attenuation_db=-30.0,
+                 hangover_ms=300, barge_in_db=-20.0):
+        if mode not in ('mute', 'attenuate'):
+            raise ValueError(f"modo half-duplex desconocido: {mode!r}")
+        self.playback = playback
+        self.mode = mode
+        self.gain = 10 ** (attenuation_db / 20.0)
+        self.hangover = hangover_ms / 1000.0
+        self.barge_in_db = barge_in_db
+        self._barge_in_until = 0.0
+
+        # Estadísticas
+        self.frames_gated = 0
+        self.frames_barged_in = 0
+
+    def is_active(self) -> bool:
+        """True mientras el sink tiene audio pendiente o dentro del hangover."""
+        try:
+            return self.playback.is_playing(hangover=self.hangover)
+        except Exception:
+            return False
+
+    def process(self, frame: bytes) -> bytes:
+        if not self.is_active():
+            return frame
+        now = time.monotonic()
+        if now < self._barge_in_until or frame_rms_db(frame) > self.barge_in_db:
+            self._barge_in_until = now + self.hangover
+            self.frames_barged_in += 1
+            return frame
+        self.frames_gated += 1
+        if self.mode == 'mute':
+            return b"\x00" * len(frame)
+        samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32) * self.gain
+        return samples.astype(np.int16).tobytes()
+
+    @classmethod
+    def from_config(cls, config, playback):
+        """Construye la puerta desde la sección [half_duplex]."""
+        section = 'half_duplex'
+        return cls(
+            playback,
+            mode=config.get(section, 'mode', fallback='mute'),
+            attenuation_db=config.getfloat(section, 'attenuation_db', fallback=-30.0),
+            hangover_ms=config.getint(section, 'hangover_ms', fallback=300),
+            barge_in_db=config.getfloat(section, 'barge_in_db', fallback=-20.0),
+        )
@@ -0,0 +1,74 @@
+"""
+Estimación continua del suelo de ruido para ajustar los umbrales del VAD.
+
+Guarda el nivel (dB) de los frames recientes sin voz y toma un percentil bajo
+como suelo de ruido. La puerta de ruido y el umbral de voz se colocan a un
+margen fijo por encima de ese suelo. El silencio digital (frames a cero de la
+puerta half-duplex, micrófono silenciado) no es ruido y se ignora.
+"""
+import numpy as np
+
+
+class NoiseFloorTracker:
+    """Seguimiento por percentil del nivel de los frames sin voz."""
+
+    def __init__(self, window_frames=500, percentile=20.0, update_every=25,
+                 gate_margin_db=6.0, voice_margin_db=3.0,
+                 min_db=-80.0, max_db=-20.0, silence_db=-90.0):
+        self.percentile = percentile
+        self.update_every = max(1, update_every)
+        self.gate_margin_db = gate_margin_db
+        self.voice_margin_db = voice_margin_db
+        self.min_db = min_db
+        self.max_db = max_db
+        # Por debajo (≈1 LSB de RMS en PCM16) el frame es silencio digital
+        self.silence_db = silence_db
+
+        # Buffer circular de tamaño fijo
+        self._levels = np.full(window_frames, np.nan, dtype=np.float32)
+        self._pos = 0
+        self._count = 0
+        self._since_update = 0
+        self.noise_floor_db = None
+
+    def observe(self, db_level: float) -> bool:
+        """Registra un frame sin voz. Devuelve True si el suelo se actualizó."""
+        if db_level < self.silence_db:
+            return False
+        self._levels[self._pos] = db_level
+        self._pos = (self._pos + 1) % len(self._levels)
+        self._count = min(self._count + 1, len(self._levels))
+        self._since_update += 1
+        # Esperar a tener suficientes frames antes de la primera estimación
+        if self._since_update < self.update_every or self._count < self.update_every:
+            return False
+        self._since_update = 0
+        levels = self._levels if self._count == len(self._levels) else self._levels[:self._count]
+        floor = float(np.percentile(levels, self.percentile))
+        self.noise_floor_db = float(np.clip(floor, self.min_db, self.max_db))
+        return True
+
+    @property
+    def gate_db(self):
+        if self.noise_floor_db is None:
+            return None
+        return self.noise_floor_db + self.gate_margin_db
+
+    @property
+    def voice_db(self):
+        if self.noise_floor_db is None:
+            return None
+        return self.noise_floor_db + self.voice_margin_db
+
+    @classmethod
+    def from_config(cls, config, frame_ms=20):
+        """Construye el tracker desde las opciones auto_* de la sección [audio]."""
+        section = 'audio'
+        window_ms = config.getint(section, 'noise_floor_window_ms', fallback=10000)
+        return cls(
+            window_frames=max(1, window_ms // frame_ms),
+            percentile=config.getfloat(section, 'noise_floor_percentile', fallback=20.0),
+            gate_margin_db=config.getfloat(section, 'noise_gate_margin_db', fallback=6.0),
+            voice_margin_db=config.getfloat(section, 'voice_threshold_margin_db',
+                                            fallback=3.0),
+        )
@@ -0,0 +1,184 @@
+"""
+Grabación y reproducción de sesiones de captura para pruebas de rendimiento.
+
+`SessionRecorder` guarda el flujo de frames crudos del micrófono con su
+instante ADC en un fichero de registros de tamaño fijo, mapeable en memoria
+con `numpy.memmap`. `ReplayCapture` lo vuelve a entregar con la misma
+interfaz que `MicCapture`, en tiempo real o tan rápido como sea posible, para
+repetir exactamente la misma sesión con otros perfiles o builds.
+"""
+import asyncio
+import struct
+import time
+import wave
+from pathlib import Path
+from typing import AsyncGenerator, Tuple
+
+import numpy as np
+
+MAGIC = b"DSRSESS1"
+# magic, sample_rate, frame_ms, muestras por frame, reservado
+_HEADER = struct.Struct("<8sIII12x")
+HEADER_SIZE = _HEADER.size
+
+
+def record_dtype(block: int) -> np.dtype:
+    """Registro de un frame: instante ADC (monotónico) + muestras PCM16."""
+    return np.dtype([("t_adc", "<f8"), ("pcm", "<i2", (block,))])
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        magic, sample_rate, frame_ms, block = _HEADER.unpack(f.read(HEADER_SIZE))
+    if magic != MAGIC:
+        raise ValueError(f"{path} no es una sesión de DSRealtime")
+    return sample_rate, frame_ms, block
+
+
+def load_session(path) -> np.memmap:
+    """Mapea en memoria los frames de una sesión grabada."""
+    _, _, block = read_header(path)
+    return np.memmap(path, dtype=record_dtype(block), mode="r", offset=HEADER_SIZE)
+
+
+class SessionRecorder:
+    """Escribe frames crudos y su instante ADC en un fichero de sesión."""
+
+    def __init__(self, path, samplerate: int = 16000, frame_ms: int = 20):
+        self.path = Path(path)
+        self.samplerate = samplerate
+        self.frame_ms = frame_ms
+        self.block = int(samplerate * frame_ms / 1000)
+        self._dtype = record_dtype(self.block)
+        self._record = np.zeros(1, dtype=self._dtype)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "wb")
+        self._file.write(_HEADER.pack(MAGIC, samplerate, frame_ms, self.block))
+        self.frames_written = 0
+
+    def write(self, frame: bytes, t_adc: float):
+        if self._file is None:
+            return
+        pcm = np.frombuffer(frame, dtype=np.int16)
+        self._record["t_adc"] = t_adc
+        self._record["pcm"][0, :len(pcm)] = pcm[:self.block]
+        self._record["pcm"][0, len(pcm):] = 0
+        self._file.write(self._record.tobytes())
+        self.frames_written += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ReplayCapture:
+    """Sustituto de `MicCapture` que reproduce una sesión grabada.
+
+    - `realtime=True`: respeta los intervalos originales entre frames.
+    - `realtime=False`: entrega los frames tan rápido como los consuma el
+      pipeline (la cola de frames aplica la contrapresión).
+
+    Al terminar añade `tail_silence_ms` de silencio para cerrar el último
+    segmento del VAD y después finaliza (`finite = True`).
+    """
+
+    finite = True
+
+    def __init__(self, path, realtime: bool = True, tail_silence_ms: int = 1000):
+        self.path = Path(path)
+        self.samplerate, self.frame_ms, self.blocksize = read_header(self.path)
+        self.bytes_per_frame = self.blocksize * 2
+        self.realtime = realtime
+        self.tail_frames = tail_silence_ms // self.frame_ms
+        self._records = load_session(self.path)
+
+    def __len__(self):
+        return len(self._records)
+
+    async def timed_frames(self) -> AsyncGenerator[Tuple[bytes, float], None]:
+        records = self._records
+        if len(records):
+            t0 = float(records[0]["t_adc"])
+        base = time.monotonic()
+        for i in range(len(records)):
+            if self.realtime:
+                t = base + (float(records[i]["t_adc"]) - t0)
+                delay = t - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            else:
+                t = time.monotonic()
+                if i % 50 == 0:
+                    # Ceder el event loop periódicamente
+                    await asyncio.sleep(0)
+            yield records[i]["pcm"].tobytes(), t
+
+        silence = b"\x00" * self.bytes_per_frame
+        for _ in range(self.tail_frames):
+            if self.realtime:
+                await asyncio.sleep(self.frame_ms / 1000)
+            yield silence, time.monotonic()
+
+    async def frames(self) -> AsyncGenerator[bytes, None]:
+        async for frame, _ in self.timed_frames():
+            yield frame
+
+    def close(self):
+        # Soltar la referencia al np.memmap libera el mapeo del fichero
+        self._records = np.zeros(0, dtype=self._records.dtype)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def read_wav_pcm16(path, samplerate: int = 16000) -> np.ndarray:
+    """Lee un WAV PCM16 como int16 mono a `samplerate` (mezcla y remuestrea)."""
+    with wave.open(str(path), "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError(f"{path}: sólo se admite PCM de 16 bits")
+        channels, rate = w.getnchannels(), w.getframerate()
+        audio = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    audio = audio.astype(np.float32)
+    if rate != samplerate and len(audio):
+        n_out = int(round(len(audio) * samplerate / rate))
+        audio = np.interp(np.arange(n_out) * (rate / samplerate),
+                          np.arange(len(audio)), audio)
+    return np.clip(np.round(audio), -32768, 32767).astype(np.int16)
+
+
+class WavCapture(ReplayCapture):
+    """Dispositivo de captura simulado a partir de un corpus de WAV.
+
+    Concatena los ficheros separados por `gap_ms` de silencio para que el VAD
+    los corte como utterances independientes.
+    """
+
+    def __init__(self, paths, samplerate: int = 16000, frame_ms: int = 20,
+                 realtime: bool = False, gap_ms: int = 800,
+                 tail_silence_ms: int = 1000):
+        self.paths = [Path(p) for p in paths]
+        self.samplerate = samplerate
+        self.frame_ms = frame_ms
+        self.blocksize = int(samplerate * frame_ms / 1000)
+        self.bytes_per_frame = self.blocksize * 2
+        self.realtime = realtime
+        self.tail_frames = tail_silence_ms // frame_ms
+
+        gap = np.zeros(int(samplerate * gap_ms / 1000), dtype=np.int16)
+        parts = []
+        for path in self.paths:
+            parts.extend([read_wav_pcm16(path, samplerate), gap])
+        audio = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int16)
+        n_frames = -(-len(audio) // self.blocksize)
+        audio = np.pad(audio, (0, n_frames * self.blocksize - len(audio)))
+
+        self._records = np.zeros(n_frames, dtype=record_dtype(self.blocksize))
+        self._records["pcm"] = audio.reshape(n_frames, self.blocksize)
+        self._records["t_adc"] = np.arange(n_frames) * (frame_ms / 1000)
+        self.audio_seconds = len(audio) / samplerate
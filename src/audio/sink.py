@@ -1,3 +1,4 @@
+import time
 import sounddevice as sd
 from array import array
 
@@ -6,12 +7,19 @@ class AudioSink:
     """Salida raw a VB-Cable (u otro) en PCM16.
 
     Escribe bytes `int16` al dispositivo de salida.
+
+    `on_reference(pcm, samplerate, t_play)` recibe el PCM lógico (mono, antes
+    del upmix) junto con el instante monotónico estimado en que su primera
+    muestra llega al DAC; lo usa la cancelación de eco como referencia.
     """
 
-    def __init__(self, device_hint: str = "CABLE Input", samplerate: int = 22050, channels: int = 1, exclusive: bool = False, on_playback=None):
+    def __init__(self, device_hint: str = "CABLE Input", samplerate: int = 22050, channels: int = 1, exclusive: bool = False, on_playback=None, on_reference=None):
         self.samplerate = samplerate
         self.channels = channels
         self._on_playback = on_playback
+        self._on_reference = on_reference
+        # Instante monotónico en que termina de sonar el audio ya escrito
+        self._play_end = 0.0
         # Resolve device index first
         device = self._find_device(device_hint) if device_hint else None
 
@@ -123,9 +131,56 @@ class AudioSink:
         except Exception:
             return None
 
+    def _output_latency(self) -> float:
+        try:
+            return float(self.stream.latency)
+        except Exception:
+            return 0.0
+
+    def _schedule(self, audio_bytes: bytes) -> float:
+        """Avanza la línea de tiempo de reproducción y devuelve el instante DAC
+        estimado de la primera muestra de `audio_bytes`."""
+        now = time.monotonic()
+        t_play = max(now + self._output_latency(), self._play_end)
+        n_samples = len(audio_bytes) // (2 * self.channels)
+        self._play_end = t_play + n_samples / self.samplerate
+        return t_play
+
+    def buffered_seconds(self) -> float:
+        """Segundos de audio escrito que aún no han salido por el DAC."""
+        return max(0.0, self._play_end - time.monotonic())
+
+    def is_playing(self, hangover: float = 0.0) -> bool:
+        """True si hay audio en buffer o sonando (más `hangover` segundos)."""
+        return time.monotonic() < self._play_end + hangover
+
+    def flush(self) -> float:
+        """Descarta el audio escrito que aún no ha sonado (barge-in).
+
+        Devuelve los segundos descartados según la línea de tiempo.
+        """
+        dropped = self.buffered_seconds()
+        if self.stream is not None:
+            try:
+                # abort() vacía el buffer del dispositivo sin esperar a que suene
+                self.stream.abort()
+                self.stream.start()
+            except Exception:
+                pass
+        self._play_end = time.monotonic()
+        return dropped
+
     def write(self, audio_bytes: bytes):
+        """Escribe PCM16 en el dispositivo y devuelve el instante DAC estimado
+        (`time.monotonic()`) de su primera muestra, o None si no hay audio."""
         if not audio_bytes:
-            return
+            return None
+        t_play = self._schedule(audio_bytes)
+        if self._on_reference:
+            try:
+                self._on_reference(audio_bytes, self.samplerate, t_play)
+            except Exception:
+                pass
         out_bytes = audio_bytes
         # If we opened the stream with more channels than the logical ones,
         # duplicate mono samples across channels (simple interleave).
@@ -159,6 +214,7 @@ class AudioSink:
                     pass
         except Exception:
             pass
+        return t_play
 
     def close(self):
         try:
@@ -171,3 +227,43 @@ class AudioSink:
 
     def __exit__(self, exc_type, exc, tb):
         self.close()
+
+
+class NullSink(AudioSink):
+    """Sink sin hardware para pruebas y benchmarks.
+
+    Descarta el audio pero mantiene la misma línea de tiempo de reproducción
+    que `AudioSink` y registra `(instante monotónico, bytes)` de cada escritura.
+    """
+
+    def __init__(self, device_hint=None, samplerate: int = 22050, channels: int = 1,
+                 exclusive: bool = False, on_playback=None, on_reference=None):
+        self.samplerate = samplerate
+        self.channels = channels
+        self._on_playback = on_playback
+        self._on_reference = on_reference
+        self._play_end = 0.0
+        self._opened_channels = channels
+        self.stream = None
+        self.underruns = 0
+        self.writes = []
+
+    def write(self, audio_bytes: bytes):
+        if not audio_bytes:
+            return None
+        self.writes.append((time.monotonic(), len(audio_bytes)))
+        t_play = self._schedule(audio_bytes)
+        if self._on_reference:
+            try:
+                self._on_reference(audio_bytes, self.samplerate, t_play)
+            except Exception:
+                pass
+        if self._on_playback:
+            try:
+                self._on_playback(audio_bytes)
+            except Exception:
+                pass
+        return t_play
+
+    def close(self):
+        pass
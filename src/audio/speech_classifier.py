@@ -0,0 +1,116 @@
+"""
+Clasificador ligero de segmentos previo al ASR.
+
+Descarta segmentos que no son voz (toses, clics, efectos de sonido) antes de
+enviarlos a Whisper, que suele alucinar texto con ellos. Trabaja con
+características espectrales vectorizadas por frame:
+
+- planitud espectral (ruido ≈ plano, voz sonora ≈ armónica),
+- tasa de cruces por cero,
+- proporción de frames sonoros del segmento.
+"""
+import time
+
+import numpy as np
+
+
+class SegmentClassifier:
+    """Decide si un segmento PCM16 contiene voz. Coste acotado por segmento."""
+
+    def __init__(self, sample_rate=16000, frame_ms=20, max_frames=128,
+                 max_flatness=0.3, max_zcr=0.3, min_voiced_ratio=0.15,
+                 min_voiced_ms=100, active_range_db=40.0):
+        self.sample_rate = sample_rate
+        self.frame_len = int(sample_rate * frame_ms / 1000)
+        self.frame_ms = frame_ms
+        self.max_frames = max_frames
+        self.max_flatness = max_flatness
+        self.max_zcr = max_zcr
+        self.min_voiced_ratio = min_voiced_ratio
+        self.min_voiced_frames = max(1, min_voiced_ms // frame_ms)
+        self.active_range_db = active_range_db
+        self._window = np.hanning(self.frame_len).astype(np.float32)
+
+        # Estadísticas
+        self.accepted = 0
+        self.rejected = 0
+        self.rejected_audio_s = 0.0
+        self.classify_s = 0.0
+        self._asr_rtf = None
+
+    def features(self, pcm16_bytes: bytes) -> dict:
+        """Calcula las características del segmento (vectorizado por frame)."""
+        samples = np.frombuffer(pcm16_bytes, dtype=np.int16)
+        n_frames = len(samples) // self.frame_len
+        if n_frames == 0:
+            return {'frames': 0, 'voiced_ratio': 0.0, 'voiced_frames': 0,
+                    'flatness': 1.0, 'zcr': 0.0}
+        frames = samples[: n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+        # Submuestreo uniforme de frames para acotar el coste en segmentos largos
+        if n_frames > self.max_frames:
+            idx = np.linspace(0, n_frames - 1, self.max_frames).astype(np.int64)
+            frames = frames[idx]
+        frames = frames.astype(np.float32) / 32768.0
+
+        energy = np.mean(frames ** 2, axis=1) + 1e-12
+        energy_db = 10 * np.log10(energy)
+        active = energy_db > max(energy_db.max() - self.active_range_db, -70.0)
+
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        power = np.abs(np.fft.rfft(frames * self._window, axis=1)) ** 2 + 1e-12
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+
+        voiced = active & (flatness < self.max_flatness) & (zcr < self.max_zcr)
+        scale = n_frames / len(frames)
+        return {
+            'frames': n_frames,
+            'voiced_frames': int(round(np.count_nonzero(voiced) * scale)),
+            'voiced_ratio': float(np.mean(voiced)),
+            'flatness': float(np.median(flatness[active])) if active.any() else 1.0,
+            'zcr': float(np.median(zcr[active])) if active.any() else 0.0,
+        }
+
+    def is_speech(self, pcm16_bytes: bytes) -> bool:
+        start = time.perf_counter()
+        feats = self.features(pcm16_bytes)
+        ok = (feats['voiced_frames'] >= self.min_voiced_frames and
+              feats['voiced_ratio'] >= self.min_voiced_ratio)
+        self.classify_s += time.perf_counter() - start
+        if ok:
+            self.accepted += 1
+        else:
+            self.rejected += 1
+            self.rejected_audio_s += len(pcm16_bytes) / (2 * self.sample_rate)
+        return ok
+
+    def note_asr_cost(self, audio_s: float, asr_s: float):
+        """Registra el coste real del ASR para estimar la CPU ahorrada."""
+        if audio_s <= 0:
+            return
+        rtf = asr_s / audio_s
+        self._asr_rtf = rtf if self._asr_rtf is None else 0.9 * self._asr_rtf + 0.1 * rtf
+
+    def stats(self) -> dict:
+        total = self.accepted + self.rejected
+        return {
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'rejected_audio_s': self.rejected_audio_s,
+            'classify_ms_avg': (self.classify_s / total * 1000) if total else 0.0,
+            'asr_s_saved': self.rejected_audio_s * (self._asr_rtf or 0.0),
+        }
+
+    @classmethod
+    def from_config(cls, config, sample_rate=16000, frame_ms=20):
+        """Construye el clasificador desde la sección [speech_classifier]."""
+        section = 'speech_classifier'
+        return cls(
+            sample_rate=sample_rate,
+            frame_ms=frame_ms,
+            max_flatness=config.getfloat(section, 'max_flatness', fallback=0.3),
+            max_zcr=config.getfloat(section, 'max_zcr', fallback=0.3),
+            min_voiced_ratio=config.getfloat(section, 'min_voiced_ratio', fallback=0.15),
+            min_voiced_ms=config.getint(section, 'min_voiced_ms', fallback=100),
+        )
@@ -0,0 +1 @@
+# Benchmarks de rendimiento (end-to-end y por etapa)
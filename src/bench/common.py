@@ -0,0 +1,110 @@
+"""
+Utilidades compartidas por los benchmarks: información de hardware,
+percentiles, configuración fija y escritura de resultados JSON comparables
+entre máquinas.
+"""
+import json
+import os
+import platform
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+
+def hardware_info() -> dict:
+    """Describe la máquina y las versiones relevantes para comparar resultados."""
+    info = {
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+    }
+    try:
+        import torch
+        info['torch'] = torch.__version__
+        info['torch_threads'] = torch.get_num_threads()
+        if torch.cuda.is_available():
+            info['gpu'] = torch.cuda.get_device_name(0)
+    except Exception:
+        pass
+    for module in ('ctranslate2', 'onnxruntime'):
+        try:
+            info[module] = __import__(module).__version__
+        except Exception:
+            pass
+    return info
+
+
+# Sobre los valores por defecto: nada que descarte utterances ni E/S o
+# monitores en el camino caliente, para que los resultados no dependan del
+# config.ini de quien ejecuta el benchmark
+BENCH_OVERRIDES = {
+    'latency': {
+        'asr_queue_policy': 'block', 'asr_queue_size': '16', 'asr_deadline_ms': '0',
+        'mt_queue_policy': 'block', 'mt_queue_size': '16', 'mt_deadline_ms': '0',
+        'tts_queue_policy': 'block', 'tts_queue_size': '16', 'tts_deadline_ms': '0',
+    },
+    'debug': {'save_audio_clips': 'false', 'trace_file': '', 'tracemalloc': 'false',
+              'log_audio_levels': 'false', 'log_vad_decisions': 'false'},
+    'performance': {'enable_loop_monitor': 'false', 'stats_interval_s': '0'},
+    'telemetry': {'enable_metrics': 'false'},
+    'quality': {'enable_quality_ladder': 'false'},
+    'calibration': {'enable_calibration': 'false'},
+    'precision': {'autotune': 'false'},
+    'barge_in': {'mode': 'never'},
+}
+
+
+def bench_config():
+    """Configuración fija de los benchmarks (independiente de config.ini)."""
+    from ..utils.config_utils import CommentedConfigParser, load_default_config
+    config = CommentedConfigParser()
+    load_default_config(config)
+    config.read_dict(BENCH_OVERRIDES)
+    return config
+
+
+@contextmanager
+def bench_config_file():
+    """Escribe `bench_config()` en un fichero temporal y devuelve su ruta."""
+    with tempfile.TemporaryDirectory(prefix='dsrt-bench-') as tmp:
+        path = Path(tmp) / 'bench.ini'
+        with open(path, 'w', encoding='utf-8') as f:
+            bench_config().write(f)
+        yield path
+
+
+def percentiles(values, scale: float = 1.0) -> dict:
+    """count/mean/p50/p95/p99/max de `values` multiplicados por `scale`."""
+    vals = np.asarray([v for v in values if v is not None], dtype=np.float64) * scale
+    if len(vals) == 0:
+        return {'count': 0}
+    p50, p95, p99 = np.percentile(vals, [50, 95, 99])
+    return {
+        'count': int(len(vals)),
+        'mean': float(vals.mean()),
+        'p50': float(p50),
+        'p95': float(p95),
+        'p99': float(p99),
+        'max': float(vals.max()),
+    }
+
+
+def write_results(path, kind: str, results: dict) -> dict:
+    """Guarda `results` junto con la información de hardware como JSON."""
+    doc = {
+        'kind': kind,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'hardware': hardware_info(),
+        'results': results,
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(doc, indent=2, ensure_ascii=False), encoding='utf-8')
+    return doc
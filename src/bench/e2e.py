@@ -0,0 +1,114 @@
+"""
+Benchmark end-to-end sin hardware de audio.
+
+Ejecuta `pipeline_cli` contra un corpus de WAV usando un dispositivo de
+captura simulado (`WavCapture`) y un sink nulo que registra cada escritura.
+Informa p50/p95/p99 de ASR, MT, TTS, tiempo hasta el primer audio y RTF por
+perfil, y guarda el resultado en JSON para comparar ejecuciones.
+
+El pipeline se ejecuta con la configuración fija de `bench_config()` (sin
+descarte de carga, archivado de clips ni monitores), no con el config.ini del
+directorio actual. Los percentiles sólo cubren las utterances que llegan al
+TTS, así que junto a ellos se informa de lo descartado por el camino.
+
+Uso:
+    python -m src.bench.e2e --corpus corpus/ --profiles cpu-light,cpu-medium \
+        --output bench/e2e.json
+"""
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+from ..audio.replay import WavCapture
+from ..audio.sink import NullSink
+from .common import bench_config_file, percentiles, write_results
+
+
+async def run_profile(profile: str, wav_paths, realtime: bool = False,
+                      gap_ms: int = 800) -> dict:
+    """Ejecuta el corpus completo con un perfil y agrega sus métricas."""
+    from ..main import build_arg_parser, pipeline_cli
+
+    capture = WavCapture(wav_paths, realtime=realtime, gap_ms=gap_ms)
+    utterances = []
+
+    def collect(partial=None, final=None, metrics=None, speaker_active=False):
+        if metrics:
+            utterances.append(metrics)
+
+    with bench_config_file() as config_path:
+        args = build_arg_parser().parse_args(
+            ['--nogui', '--profile', profile, '--config', str(config_path)])
+        start = time.perf_counter()
+        summary = await pipeline_cli(args, ui_callback=collect, capture=capture,
+                                     sink_factory=NullSink) or {}
+        wall = time.perf_counter() - start
+
+    def stage(name):
+        return [m.get('stages', {}).get(name) for m in utterances]
+
+    return {
+        'utterances': len(utterances),
+        'audio_s': capture.audio_seconds,
+        'wall_s': wall,
+        'asr_ms': percentiles(stage('asr'), 1000),
+        'mt_ms': percentiles(stage('mt'), 1000),
+        'tts_ms': percentiles(stage('tts'), 1000),
+        'first_audio_ms': percentiles([m.get('t_first_audio') for m in utterances], 1000),
+        'mouth_to_ear_ms': percentiles([m.get('mouth_to_ear') for m in utterances], 1000),
+        'speech_end_to_ear_ms': percentiles([m.get('speech_end_to_ear') for m in utterances],
+                                            1000),
+        'rtf': percentiles([m.get('rtf') for m in utterances]),
+        'underruns': max((m.get('underruns', 0) for m in utterances), default=0),
+        # Lo que no entra en los percentiles
+        'text_only': sum(1 for m in utterances if m.get('text_only')),
+        'shed': summary.get('shed', {}),
+        'shed_total': sum(summary.get('shed', {}).values()),
+        'capture_dropped_frames': summary.get('capture_dropped_frames', 0),
+        'vad_segments_rejected': summary.get('vad_segments_rejected'),
+    }
+
+
+def build_arg_parser():
+    p = argparse.ArgumentParser(description="Benchmark end-to-end de DSRealtime")
+    p.add_argument('--corpus', required=True,
+                   help="Carpeta con ficheros .wav (PCM16) o un único .wav")
+    p.add_argument('--profiles', default='cpu-light',
+                   help="Perfiles separados por comas")
+    p.add_argument('--output', default='bench/e2e.json', help="Fichero JSON de salida")
+    p.add_argument('--realtime', action='store_true',
+                   help="Entregar el audio a velocidad real en lugar de lo más rápido posible")
+    p.add_argument('--gap-ms', type=int, default=800,
+                   help="Silencio insertado entre ficheros del corpus")
+    return p
+
+
+def main():
+    args = build_arg_parser().parse_args()
+    corpus = Path(args.corpus)
+    wav_paths = sorted(corpus.glob('*.wav')) if corpus.is_dir() else [corpus]
+    if not wav_paths:
+        raise SystemExit(f"No hay ficheros .wav en {corpus}")
+
+    results = {'corpus': {'path': str(corpus), 'files': len(wav_paths)}, 'profiles': {}}
+    for profile in [p.strip() for p in args.profiles.split(',') if p.strip()]:
+        print(f"[BENCH] perfil {profile}: {len(wav_paths)} ficheros")
+        stats = asyncio.run(run_profile(profile, wav_paths, realtime=args.realtime,
+                                        gap_ms=args.gap_ms))
+        results['profiles'][profile] = stats
+        for key in ('asr_ms', 'mt_ms', 'tts_ms', 'first_audio_ms', 'rtf'):
+            s = stats[key]
+            if s.get('count'):
+                print(f"[BENCH]   {key:15s} p50={s['p50']:.2f} p95={s['p95']:.2f} "
+                      f"p99={s['p99']:.2f}")
+        print(f"[BENCH]   {stats['utterances']} utterances completas, "
+              f"{stats['shed_total']} descartadas/degradadas {stats['shed']}, "
+              f"{stats['capture_dropped_frames']} frames de captura perdidos")
+
+    write_results(args.output, 'e2e', results)
+    print(f"[BENCH] resultados guardados en {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+"""
+Micro-benchmarks por etapa con entradas sintéticas fijas.
+
+Mide cada componente caliente del pipeline de forma aislada en CPU:
+
+- `vad`:  frames/s de `AdvancedVADSegmenter`
+- `rms`:  llamadas/s de `calculate_rms_db`
+- `sink`: MB/s del upmix de `AudioSink.write`
+- `asr`:  RTF de `_sync_transcribe` (FasterWhisper/Vosk) a varias duraciones
+- `mt`:   tokens/s de `NLLBTranslator.translate` a varias longitudes
+- `tts`:  caracteres/s y latencia del primer chunk de `PiperTTS`
+
+Los resultados se guardan en JSON con información de hardware; `--compare`
+marca las regresiones frente a un resultado anterior.
+
+Uso:
+    python -m src.bench.micro --only vad,rms,sink --output bench/micro.json
+    python -m src.bench.micro --compare bench/micro_base.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from ..utils.timing import best_of
+from .common import bench_config_file, write_results
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+
+# Métricas en las que un valor menor es mejor; el resto son throughputs
+LOWER_IS_BETTER = {'rtf', 'first_chunk_ms', 'ms_per_call'}
+
+SPANISH_TEXT = (
+    "Hola a todos, hoy vamos a probar el traductor en tiempo real mientras "
+    "jugamos una partida. Si algo suena raro, avisadme por el chat y lo "
+    "revisamos después con calma, porque todavía estamos ajustando la "
+    "configuración del micrófono y de la salida de audio."
+)
+ENGLISH_TEXT = (
+    "Hello everyone, today we are testing the real-time translator while we "
+    "play a match. If anything sounds strange, let me know in the chat."
+)
+
+
+def synthetic_speech(seconds: float, seed: int = 0) -> bytes:
+    """Señal armónica modulada (tipo vocal) con algo de ruido, PCM16 16 kHz."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    f0 = 130 + 20 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 10))
+    envelope = 0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 2.5 * t))
+    signal = 5000 * envelope * voiced + rng.normal(0, 200, len(t))
+    return np.clip(signal, -32768, 32767).astype(np.int16).tobytes()
+
+
+def _result(name, metric, value, unit, **params):
+    return {'name': name, 'metric': metric, 'value': float(value), 'unit': unit,
+            'params': params}
+
+
+class _Exhausted(Exception):
+    pass
+
+
+class _FrameFeed:
+    """Cola mínima para el VAD que termina al agotar los frames."""
+
+    def __init__(self, frames):
+        self._frames = iter(frames)
+
+    async def get(self):
+        try:
+            return next(self._frames)
+        except StopIteration:
+            raise _Exhausted()
+
+
+def bench_vad(repeats: int = 3, seconds: float = 30.0):
+    from ..audio.advanced_vad import AdvancedVADSegmenter
+
+    pcm = synthetic_speech(seconds)
+    bpf = SAMPLE_RATE * FRAME_MS // 1000 * 2
+    # Alternar 2 s de voz y 1 s de silencio para ejercitar el segmentado
+    frames = []
+    for i in range(len(pcm) // bpf):
+        in_speech = (i * FRAME_MS) % 3000 < 2000
+        frames.append(pcm[i * bpf:(i + 1) * bpf] if in_speech else b"\x00" * bpf)
+
+    def run():
+        async def consume():
+            try:
+                async for _ in vad.chunks(_FrameFeed(frames)):
+                    pass
+            except _Exhausted:
+                pass
+        # El VAD registra cada utterance por consola; no medir esa E/S
+        with contextlib.redirect_stdout(io.StringIO()):
+            vad = AdvancedVADSegmenter(SAMPLE_RATE, FRAME_MS, config_file=config_path)
+            asyncio.run(consume())
+
+    # Configuración fija: el resultado no depende del config.ini local
+    with bench_config_file() as config_path:
+        elapsed = best_of(run, repeats)
+    return [_result('vad', 'frames_per_s', len(frames) / elapsed, 'frames/s',
+                    frames=len(frames))]
+
+
+def bench_rms(repeats: int = 5, calls: int = 5000):
+    from ..audio.advanced_vad import AdvancedVADSegmenter
+
+    vad = AdvancedVADSegmenter.__new__(AdvancedVADSegmenter)
+    frame = synthetic_speech(FRAME_MS / 1000)
+
+    def run():
+        for _ in range(calls):
+            vad.calculate_rms_db(frame)
+
+    elapsed = best_of(run, repeats)
+    return [_result('calculate_rms_db', 'calls_per_s', calls / elapsed, 'calls/s'),
+            _result('calculate_rms_db', 'ms_per_call', elapsed / calls * 1000, 'ms')]
+
+
+class _DiscardStream:
+    def write(self, data):
+        pass
+
+    def get_status(self):
+        class _Status:
+            output_underflow = False
+        return _Status()
+
+
+def bench_sink(repeats: int = 5, seconds: float = 2.0, channels: int = 2):
+    from ..audio.sink import AudioSink
+
+    sink = AudioSink.__new__(AudioSink)
+    sink.samplerate = 22050
+    sink.channels = 1
+    sink._opened_channels = channels
+    sink._on_playback = None
+    sink._on_reference = None
+    sink._play_end = 0.0
+    sink.underruns = 0
+    sink.stream = _DiscardStream()
+    pcm = np.zeros(int(22050 * seconds), dtype=np.int16).tobytes()
+
+    elapsed = best_of(lambda: sink.write(pcm), repeats)
+    return [_result('sink_upmix', 'mb_per_s', len(pcm) / elapsed / 1e6, 'MB/s',
+                    channels=channels, seconds=seconds)]
+
+
+def bench_asr(repeats: int = 2, lengths=(1.0, 3.0, 5.0, 10.0),
+              whisper_size: str = 'small', compute_type: str = 'int8',
+              vosk_model: str = 'models/vosk-model-small-es-0.42'):
+    from ..pipeline.asr import FasterWhisperASR, VoskASR
+
+    backends = []
+    try:
+        backends.append(('faster_whisper', {'model': whisper_size, 'compute_type': compute_type},
+                         FasterWhisperASR(model_size=whisper_size, device='cpu',
+                                          compute_type=compute_type)))
+    except Exception as e:
+        print(f"[BENCH] FasterWhisper no disponible: {e}")
+    if Path(vosk_model).exists():
+        try:
+            backends.append(('vosk', {'model': vosk_model}, VoskASR(vosk_model)))
+        except Exception as e:
+            print(f"[BENCH] Vosk no disponible: {e}")
+
+    results = []
+    for name, params, asr in backends:
+        for seconds in lengths:
+            pcm = synthetic_speech(seconds)
+            if name == 'vosk':
+                elapsed = best_of(lambda: asr._sync_transcribe(pcm), repeats)
+            else:
+                elapsed = best_of(lambda: asr._sync_transcribe(pcm, 'es'), repeats)
+            results.append(_result(f'asr_{name}', 'rtf', elapsed / seconds, 'x',
+                                   audio_s=seconds, **params))
+    return results
+
+
+def bench_mt(repeats: int = 2, word_counts=(5, 20, 60),
+             model_name: str = 'facebook/nllb-200-distilled-600M'):
+    from ..pipeline.translate import NLLBTranslator
+
+    mt = NLLBTranslator(model_name=model_name, device='cpu')
+    words = SPANISH_TEXT.split()
+    results = []
+    for n in word_counts:
+        text = " ".join((words * (n // len(words) + 1))[:n])
+        out = {}
+
+        def run():
+            out['text'] = asyncio.run(mt.translate(text))
+
+        elapsed = best_of(run, repeats)
+        tokens = len(mt.tokenizer(out['text'])['input_ids'])
+        results.append(_result('mt_nllb', 'tokens_per_s', tokens / elapsed, 'tokens/s',
+                               words=n, output_tokens=tokens))
+    return results
+
+
+def bench_tts(repeats: int = 2,
+              model_path: str = 'models/piper/en_US-lessac-medium.onnx'):
+    from ..pipeline.tts import PiperTTS
+
+    tts = PiperTTS(model_path=model_path, use_cuda=False)
+    results = []
+    for text in (ENGLISH_TEXT[:40], ENGLISH_TEXT):
+        first_chunk = []
+
+        def run():
+            start = time.perf_counter()
+            for i, _ in enumerate(tts.synthesize_stream_raw(text)):
+                if i == 0:
+                    first_chunk.append(time.perf_counter() - start)
+
+        elapsed = best_of(run, repeats)
+        results.append(_result('tts_piper', 'chars_per_s', len(text) / elapsed, 'chars/s',
+                               chars=len(text)))
+        results.append(_result('tts_piper', 'first_chunk_ms', min(first_chunk) * 1000, 'ms',
+                               chars=len(text)))
+    return results
+
+
+BENCHMARKS = {
+    'vad': bench_vad,
+    'rms': bench_rms,
+    'sink': bench_sink,
+    'asr': bench_asr,
+    'mt': bench_mt,
+    'tts': bench_tts,
+}
+
+
+def _key(result):
+    return (result['name'], result['metric'],
+            json.dumps(result['params'], sort_keys=True))
+
+
+def compare(current, baseline, tolerance: float = 0.10):
+    """Lista las métricas que empeoran más de `tolerance` frente a `baseline`."""
+    base = {_key(r): r['value'] for r in baseline}
+    regressions = []
+    for r in current:
+        old = base.get(_key(r))
+        if not old:
+            continue
+        if r['metric'] in LOWER_IS_BETTER:
+            change = r['value'] / old - 1.0
+        else:
+            change = old / r['value'] - 1.0 if r['value'] else float('inf')
+        if change > tolerance:
+            regressions.append({**r, 'baseline': old, 'slowdown': change})
+    return regressions
+
+
+def build_arg_parser():
+    p = argparse.ArgumentParser(description="Micro-benchmarks por etapa de DSRealtime")
+    p.add_argument('--only', default=','.join(BENCHMARKS),
+                   help=f"Benchmarks a ejecutar ({','.join(BENCHMARKS)})")
+    p.add_argument('--output', default='bench/micro.json', help="Fichero JSON de salida")
+    p.add_argument('--compare', default=None, metavar='BASELINE',
+                   help="JSON anterior con el que comparar")
+    p.add_argument('--tolerance', type=float, default=0.10,
+                   help="Empeoramiento relativo tolerado al comparar (0.10 = 10%%)")
+    return p
+
+
+def main():
+    args = build_arg_parser().parse_args()
+    results = []
+    for name in [n.strip() for n in args.only.split(',') if n.strip()]:
+        if name not in BENCHMARKS:
+            raise SystemExit(f"Benchmark desconocido: {name}")
+        try:
+            for r in BENCHMARKS[name]():
+                results.append(r)
+                print(f"[BENCH] {r['name']:18s} {r['metric']:15s} "
+                      f"{r['value']:12.2f} {r['unit']}  {r['params']}")
+        except Exception as e:
+            print(f"[BENCH] {name} omitido: {type(e).__name__}: {e}")
+
+    write_results(args.output, 'micro', results)
+    print(f"[BENCH] resultados guardados en {args.output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        regressions = compare(results, baseline['results'], args.tolerance)
+        for r in regressions:
+            print(f"[BENCH] REGRESIÓN {r['name']} {r['metric']}: "
+                  f"{r['baseline']:.2f} → {r['value']:.2f} ({r['slowdown']:+.0%})")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,476 @@
+"""
+Calibración de la máquina para elegir backends por rendimiento medido.
+
+En el primer arranque se cronometra una carga fija y corta con cada backend y
+precisión disponibles (tamaños y `compute_type` de Whisper, Vosk, NLLB en
+torch y cuantizado int8, Piper) y se guarda el RTF de cada uno en un JSON
+indexado por la huella del hardware. El ASR se mide sobre WAVs de voz real
+(`[precision] reference_dir`): el tiempo de Whisper depende de los tokens que
+emite y con audio que no es voz saldría optimista. Los arranques siguientes en
+la misma máquina reutilizan esas medidas sin cargar nada.
+
+La elección es la combinación ASR+MT+TTS de mayor calidad cuyo RTF sumado
+cumple el objetivo; a igual calidad, la más rápida. Si ninguna lo cumple se
+usa la más rápida.
+
+El autoajuste de precisión (`autotune_precision`) usa la misma caché: mide
+cada precisión soportada por Whisper, NLLB y Piper en un pequeño conjunto de
+referencia y elige la más rápida cuya salida coincide con la de float32
+dentro de la tolerancia; `precision_policy` la aplica al cargar los modelos.
+
+Uso:
+    python -m src.calibration              # calibra (o muestra la caché)
+    python -m src.calibration --force      # vuelve a medir
+    python -m src.calibration --precision  # autoajuste de precisión
+"""
+import argparse
+import gc
+import hashlib
+import itertools
+import json
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from .bench.common import hardware_info
+from .utils.precision import (PrecisionPolicy, audio_agreement, precision_policy,
+                              supported_precisions, text_agreement)
+from .utils.timing import best_of
+
+WORKLOAD_S = 5.0
+SAMPLE_RATE = 16000
+WORDS_PER_SECOND = 2.5  # ritmo del habla para dimensionar el texto de MT
+PIPER_MODEL = 'models/piper/en_US-lessac-medium.onnx'
+VOSK_MODEL = 'models/vosk-model-small-es-0.42'
+NLLB_MODEL = 'facebook/nllb-200-distilled-600M'
+
+# Candidatos por etapa; `quality` ordena de mejor (mayor) a peor
+ASR_CANDIDATES = [
+    {'backend': 'whisper', 'model': 'medium', 'device': 'cuda', 'compute_type': 'float16', 'quality': 4},
+    {'backend': 'whisper', 'model': 'small', 'device': 'cuda', 'compute_type': 'float16', 'quality': 3},
+    {'backend': 'whisper', 'model': 'small', 'device': 'cpu', 'compute_type': 'int8', 'quality': 3},
+    {'backend': 'whisper', 'model': 'small', 'device': 'cpu', 'compute_type': 'float32', 'quality': 3},
+    {'backend': 'whisper', 'model': 'base', 'device': 'cpu', 'compute_type': 'int8', 'quality': 2},
+    {'backend': 'vosk', 'model': VOSK_MODEL, 'device': 'cpu', 'quality': 1},
+]
+MT_CANDIDATES = [
+    {'backend': 'nllb', 'device': 'cuda', 'quantize': False, 'quality': 2},
+    {'backend': 'nllb', 'device': 'cpu', 'quantize': False, 'quality': 2},
+    {'backend': 'nllb', 'device': 'cpu', 'quantize': True, 'quality': 1},
+]
+TTS_CANDIDATES = [
+    {'backend': 'piper', 'model': PIPER_MODEL, 'device': 'cpu', 'quality': 1},
+]
+
+# Conjunto de referencia para comparar precisiones
+REFERENCE_ES = [
+    "Hola, ¿me escucháis bien por el micrófono?",
+    "Vamos a esperar a que vuelva el resto del equipo antes de empezar.",
+    "Si la conexión falla otra vez, reiniciamos el servidor y seguimos.",
+    "Mañana a las nueve repasamos juntos la configuración del audio.",
+]
+REFERENCE_EN = [
+    "Hello, can you hear me through the microphone?",
+    "Let's wait for the rest of the team before we start.",
+]
+
+
+def hardware_fingerprint(info: dict | None = None) -> str:
+    """Huella estable de la CPU/GPU y de las versiones de los runtimes."""
+    info = info or hardware_info()
+    keys = ('machine', 'processor', 'cpu_count', 'gpu', 'torch', 'ctranslate2', 'onnxruntime')
+    stable = {k: info.get(k) for k in keys}
+    return hashlib.sha1(json.dumps(stable, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def describe(spec: dict) -> str:
+    parts = [spec['backend'], spec.get('model') and Path(spec['model']).name, spec.get('device'),
+             spec.get('compute_type'), 'int8' if spec.get('quantize') else None]
+    return '/'.join(p for p in parts if p)
+
+
+def build_asr(spec: dict):
+    from .pipeline.asr import FasterWhisperASR, VoskASR
+    if spec['backend'] == 'vosk':
+        return VoskASR(model_path=spec['model'])
+    return FasterWhisperASR(model_size=spec['model'], device=spec['device'],
+                            compute_type=spec['compute_type'])
+
+
+def build_mt(spec: dict, model_name: str = NLLB_MODEL):
+    from .pipeline.translate import NLLBTranslator
+    return NLLBTranslator(model_name=model_name, device=spec['device'],
+                          quantize=spec.get('quantize', False))
+
+
+def build_tts(spec: dict):
+    from .pipeline.tts import PiperTTS
+    return PiperTTS(model_path=spec['model'], use_cuda=spec.get('device') == 'cuda')
+
+
+def _speech_workload(clips: list[bytes]) -> list[bytes]:
+    """Primeros clips de voz real hasta sumar unos `WORKLOAD_S` segundos."""
+    workload, seconds = [], 0.0
+    for pcm in clips:
+        workload.append(pcm)
+        seconds += len(pcm) / (2 * SAMPLE_RATE)
+        if seconds >= WORKLOAD_S:
+            break
+    return workload
+
+
+def _measure_asr(spec: dict, repeats: int, speech: list[bytes]) -> float:
+    # Whisper tarda según los tokens que emite: se mide sobre voz real
+    asr = build_asr(spec)
+    args = () if spec['backend'] == 'vosk' else ('es',)
+
+    def run():
+        for pcm in speech:
+            asr._sync_transcribe(pcm, *args)
+
+    elapsed = best_of(run, repeats)
+    audio_s = sum(len(pcm) for pcm in speech) / (2 * SAMPLE_RATE)
+    return elapsed / audio_s if audio_s else float('inf')
+
+
+def _measure_mt(spec: dict, repeats: int) -> float:
+    mt = build_mt(spec)
+    n_words = int(WORKLOAD_S * WORDS_PER_SECOND)
+    text = " ".join(" ".join(REFERENCE_ES).split()[:n_words])
+    elapsed = best_of(lambda: mt._sync_translate(text), repeats)
+    return elapsed / WORKLOAD_S
+
+
+def _measure_tts(spec: dict, repeats: int) -> float:
+    tts = build_tts(spec)
+    out = {}
+
+    def run():
+        out['bytes'] = sum(len(chunk) for text in REFERENCE_EN
+                           for chunk in tts.synthesize_stream_raw(text))
+
+    elapsed = best_of(run, repeats)
+    audio_s = out['bytes'] / (2 * tts.sample_rate)
+    return elapsed / audio_s if audio_s else float('inf')
+
+
+def _cuda_available() -> bool:
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except Exception:
+        return False
+
+
+def _release_models():
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except Exception:
+        pass
+
+
+@contextmanager
+def _untuned():
+    """Mide cada precisión tal cual, sin que la política la sustituya."""
+    saved = dict(precision_policy.choices)
+    precision_policy.choices.clear()
+    try:
+        yield
+    finally:
+        precision_policy.choices.update(saved)
+
+
+def measure_all(speech: list[bytes], repeats: int = 2, log=print) -> dict:
+    """Cronometra todos los candidatos disponibles; devuelve el RTF por etapa.
+
+    `speech`: clips de voz real (PCM16 16 kHz) con los que se mide el ASR.
+    """
+    cuda = _cuda_available()
+    workload = _speech_workload(speech)
+    stages = (('asr', ASR_CANDIDATES, lambda spec, r: _measure_asr(spec, r, workload)),
+              ('mt', MT_CANDIDATES, _measure_mt),
+              ('tts', TTS_CANDIDATES, _measure_tts))
+    results = {}
+    with _untuned():
+        _measure_stages(stages, cuda, repeats, results, log)
+    return results
+
+
+def _measure_stages(stages, cuda: bool, repeats: int, results: dict, log):
+    for stage, candidates, measure in stages:
+        results[stage] = []
+        for spec in candidates:
+            if spec.get('device') == 'cuda' and not cuda:
+                continue
+            if spec['backend'] in ('vosk', 'piper') and not Path(spec['model']).exists():
+                continue
+            entry = dict(spec)
+            try:
+                entry['rtf'] = measure(spec, repeats)
+                log(f"[CALIBRATION] {stage} {describe(spec):32s} RTF={entry['rtf']:.3f}")
+            except Exception as e:
+                entry['error'] = f"{type(e).__name__}: {e}"
+                log(f"[CALIBRATION] {stage} {describe(spec):32s} no disponible ({entry['error']})")
+            finally:
+                _release_models()
+            results[stage].append(entry)
+
+
+def choose(results: dict, rtf_target: float) -> dict | None:
+    """Combinación de mayor calidad que cumple `rtf_target` (o la más rápida)."""
+    usable = {stage: [r for r in entries if r.get('rtf') is not None]
+              for stage, entries in results.items()}
+    if not all(usable.get(stage) for stage in ('asr', 'mt', 'tts')):
+        return None
+    combos = []
+    for asr, mt, tts in itertools.product(usable['asr'], usable['mt'], usable['tts']):
+        rtf = asr['rtf'] + mt['rtf'] + tts['rtf']
+        quality = asr['quality'] + mt['quality'] + tts['quality']
+        combos.append({'asr': asr, 'mt': mt, 'tts': tts, 'rtf': rtf, 'quality': quality,
+                       'meets_target': rtf <= rtf_target})
+    feasible = [c for c in combos if c['meets_target']]
+    if feasible:
+        return min(feasible, key=lambda c: (-c['quality'], c['rtf']))
+    return min(combos, key=lambda c: c['rtf'])
+
+
+def load_cache(path) -> dict:
+    try:
+        return json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path, cache: dict):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(cache, indent=2, ensure_ascii=False), encoding='utf-8')
+
+
+def calibrate(cache_path='calibration.json', rtf_target: float = 0.5, force: bool = False,
+              repeats: int = 2, reference_dir='corpus', log=print) -> dict | None:
+    """Devuelve la combinación elegida, midiendo sólo si no hay caché para
+    esta máquina (o si `force`). Medir exige WAVs de voz en `reference_dir`."""
+    info = hardware_info()
+    fingerprint = hardware_fingerprint(info)
+    cache = load_cache(cache_path)
+    entry = cache.get(fingerprint)
+    # Sin `reference_clips`, la entrada se midió sobre voz sintética
+    if entry is None or force or 'results' not in entry or 'reference_clips' not in entry:
+        speech = _reference_audio(reference_dir)
+        if not speech:
+            log(f"[CALIBRATION] Sin WAVs de voz en '{reference_dir}': no se puede medir el ASR")
+            return None
+        log(f"[CALIBRATION] Midiendo backends en esta máquina ({fingerprint})...")
+        entry = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'hardware': info,
+            'reference_clips': len(speech),
+            'results': measure_all(speech, repeats=repeats, log=log),
+        }
+        cache[fingerprint] = {**cache.get(fingerprint, {}), **entry}
+        _save_cache(cache_path, cache)
+    else:
+        log(f"[CALIBRATION] Usando calibración de {entry['timestamp']} ({fingerprint})")
+    choice = choose(entry['results'], rtf_target)
+    if choice is not None:
+        log(f"[CALIBRATION] Elección: ASR {describe(choice['asr'])}, MT {describe(choice['mt'])}, "
+            f"TTS {describe(choice['tts'])} - RTF {choice['rtf']:.2f} "
+            f"({'cumple' if choice['meets_target'] else 'NO cumple'} el objetivo {rtf_target})")
+    return choice
+
+
+def calibrated_profile(config, force: bool = False):
+    """Construye el `Profile` elegido por la calibración ([calibration])."""
+    from .profiles import Profile
+    section = 'calibration'
+    choice = calibrate(
+        cache_path=config.get(section, 'cache_file', fallback='calibration.json'),
+        rtf_target=config.getfloat(section, 'rtf_target', fallback=0.5),
+        force=force,
+        reference_dir=config.get('precision', 'reference_dir', fallback='corpus'),
+    )
+    if choice is None:
+        return None
+    return Profile(name='calibrated', asr=build_asr(choice['asr']), tts=build_tts(choice['tts']),
+                   mt_options={'device': choice['mt']['device'],
+                               'quantize': choice['mt'].get('quantize', False)})
+
+
+def _reference_audio(reference_dir) -> list[bytes]:
+    """WAVs de voz real de `reference_dir` (PCM16 16 kHz); [] si no hay."""
+    from .audio.replay import read_wav_pcm16
+    paths = sorted(Path(reference_dir).glob('*.wav')) if reference_dir else []
+    clips = []
+    for path in paths[:8]:
+        try:
+            clips.append(read_wav_pcm16(path).tobytes())
+        except (OSError, ValueError, EOFError):
+            continue
+    return clips
+
+
+def _precision_runner(backend: str, device: str, precision: str, audio: list[bytes],
+                      whisper_model: str, mt_model: str, piper_model: str):
+    """Carga `backend` en `precision` y devuelve la función que procesa la referencia."""
+    if backend == 'whisper':
+        from .pipeline.asr import FasterWhisperASR
+        asr = FasterWhisperASR(model_size=whisper_model, device=device, compute_type=precision)
+        return lambda: [asr._sync_transcribe(pcm, 'es') for pcm in audio]
+    if backend == 'nllb':
+        from .pipeline.translate import NLLBTranslator
+        mt = NLLBTranslator(model_name=mt_model, device=device, precision=precision)
+        return lambda: [mt._sync_translate(text) for text in REFERENCE_ES]
+    from .pipeline.tts import PiperTTS
+    tts = PiperTTS(model_path=piper_model, use_cuda=False, precision=precision)
+    return lambda: [b''.join(tts.synthesize_stream_raw(text)) for text in REFERENCE_EN]
+
+
+def _agreement(backend: str, reference: list, outputs: list) -> float:
+    score = audio_agreement if backend == 'piper' else text_agreement
+    pairs = list(zip(reference, outputs))
+    return sum(score(r, o) for r, o in pairs) / len(pairs) if pairs else 0.0
+
+
+def pick_precision(results: dict, tolerance: float) -> str | None:
+    """La precisión más rápida cuya concordancia con float32 es >= 1 - tolerancia."""
+    valid = [(r['seconds'], prec) for prec, r in results.items()
+             if r.get('seconds') is not None and r['agreement'] >= 1.0 - tolerance]
+    return min(valid)[1] if valid else None
+
+
+def tune_backend(backend: str, device: str, audio: list[bytes], tolerance: float,
+                 repeats: int = 1, log=print, whisper_model: str = 'small',
+                 mt_model: str = NLLB_MODEL, piper_model: str = PIPER_MODEL) -> dict:
+    """Mide cada precisión soportada de `backend` frente a float32."""
+    precisions = supported_precisions(backend, device, model_path=piper_model)
+    if len(precisions) < 2 or 'float32' not in precisions:
+        return {}
+    # float32 primero: es la referencia de las demás
+    ordered = ['float32'] + [p for p in precisions if p != 'float32']
+    reference = None
+    results = {}
+    for precision in ordered:
+        label = f"{PrecisionPolicy.key(backend, device)} {precision}"
+        out = {}
+        try:
+            run = _precision_runner(backend, device, precision, audio,
+                                    whisper_model, mt_model, piper_model)
+            seconds = best_of(lambda: out.__setitem__('outputs', run()), repeats)
+        except Exception as e:
+            results[precision] = {'error': f"{type(e).__name__}: {e}"}
+            log(f"[PRECISION] {label:24s} no disponible ({results[precision]['error']})")
+            if precision == 'float32':
+                return {}
+            continue
+        finally:
+            _release_models()
+        if reference is None:
+            reference = out['outputs']
+        agreement = _agreement(backend, reference, out['outputs'])
+        results[precision] = {'seconds': seconds, 'agreement': agreement}
+        log(f"[PRECISION] {label:24s} {seconds*1000:8.1f} ms  concordancia={agreement:.3f}")
+    return results
+
+
+def autotune_precision(cache_path='calibration.json', tolerance: float = 0.05,
+                       reference_dir='corpus', force: bool = False, repeats: int = 1,
+                       log=print) -> dict:
+    """Elige la precisión de Whisper, NLLB y Piper en esta máquina.
+
+    La elección se guarda en la entrada de la huella del hardware (clave
+    `precision`) y se reutiliza mientras no cambien la tolerancia ni el número
+    de WAVs de referencia. Whisper sólo se ajusta con voz real.
+    """
+    info = hardware_info()
+    fingerprint = hardware_fingerprint(info)
+    cache = load_cache(cache_path)
+    entry = cache.get(fingerprint, {})
+    tuned = entry.get('precision')
+    audio = _reference_audio(reference_dir)
+    if (tuned and not force and tuned.get('tolerance') == tolerance
+            and tuned.get('reference_clips') == len(audio)):
+        log(f"[PRECISION] Usando autoajuste de {tuned['timestamp']} ({fingerprint})")
+        return tuned['choices']
+
+    log(f"[PRECISION] Midiendo precisiones en esta máquina ({fingerprint})...")
+    if not audio:
+        # Sin voz real la transcripción de ambas precisiones es vacía o
+        # inventada y coincidiría igual: no hay evidencia de precisión
+        log(f"[PRECISION] whisper: sin WAVs de voz en '{reference_dir}', se omite el "
+            "autoajuste (precisión por defecto)")
+    devices = ['cpu'] + (['cuda'] if _cuda_available() else [])
+    choices, measured = {}, {}
+    with _untuned():
+        for backend in ('whisper', 'nllb', 'piper'):
+            for device in devices:
+                if backend == 'piper' and device != 'cpu':
+                    continue
+                if backend == 'piper' and not Path(PIPER_MODEL).exists():
+                    continue
+                if backend == 'whisper' and not audio:
+                    continue
+                key = PrecisionPolicy.key(backend, device)
+                results = tune_backend(backend, device, audio, tolerance, repeats, log)
+                choice = pick_precision(results, tolerance)
+                if choice is None:
+                    continue
+                measured[key] = results
+                choices[key] = choice
+                log(f"[PRECISION] {key}: {choice}")
+    cache[fingerprint] = {**entry, 'hardware': entry.get('hardware', info), 'precision': {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'tolerance': tolerance,
+        'reference_clips': len(audio),
+        'choices': choices,
+        'results': measured,
+    }}
+    _save_cache(cache_path, cache)
+    return choices
+
+
+def apply_precision_policy(config, force: bool = False) -> dict:
+    """Ejecuta (o lee de la caché) el autoajuste de [precision] y lo aplica
+    a `precision_policy`, antes de cargar los modelos."""
+    section = 'precision'
+    choices = autotune_precision(
+        cache_path=config.get('calibration', 'cache_file', fallback='calibration.json'),
+        tolerance=config.getfloat(section, 'accuracy_tolerance', fallback=0.05),
+        reference_dir=config.get(section, 'reference_dir', fallback='corpus'),
+        force=force,
+    )
+    precision_policy.update(choices)
+    return choices
+
+
+def build_arg_parser():
+    p = argparse.ArgumentParser(description="Calibración de backends de DSRealtime")
+    p.add_argument('--cache', default='calibration.json', help="Fichero JSON de caché")
+    p.add_argument('--rtf-target', type=float, default=0.5,
+                   help="RTF máximo (ASR+MT+TTS) de la combinación elegida")
+    p.add_argument('--force', action='store_true', help="Volver a medir aunque haya caché")
+    p.add_argument('--repeats', type=int, default=2, help="Repeticiones por medida")
+    p.add_argument('--precision', action='store_true',
+                   help="Autoajustar la precisión (int8/bf16/fp32) de cada backend")
+    p.add_argument('--tolerance', type=float, default=0.05,
+                   help="Pérdida de concordancia máxima frente a float32")
+    p.add_argument('--reference-dir', default='corpus',
+                   help="Carpeta con WAVs de voz real para el ASR")
+    return p
+
+
+def main():
+    args = build_arg_parser().parse_args()
+    if args.precision:
+        autotune_precision(args.cache, args.tolerance, args.reference_dir,
+                           force=args.force, repeats=max(1, args.repeats - 1))
+        return
+    calibrate(args.cache, args.rtf_target, force=args.force, repeats=args.repeats,
+              reference_dir=args.reference_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,7 +10,14 @@ import sounddevice as sd
 from .profiles import select_profile, build_profile
 from .pipeline.translate import NLLBTranslator
 from .audio.capture import MicCapture
+from .audio.replay import ReplayCapture, SessionRecorder
 from .audio.sink import AudioSink
+from .audio.aec import EchoReference, EchoCanceller
+from .audio.duplex import HalfDuplexGate
+from .audio.speech_classifier import SegmentClassifier
+from .pipeline.shedding import PolicyQueue, LatencyBudget, ShedCounter
+from .pipeline.barge_in import BargeInPolicy
+from .pipeline.quality import QualityController
 
 # Usar VAD avanzado si está disponible, sino el original
 try:
@@ -19,7 +26,18 @@ try:
 except ImportError:
     from .audio.vad import VADSegmenter
     VAD_ADVANCED = False
-from .utils.timing import StageTimer
+from .utils.timing import (StageTimer, LatencyTrace, latency_stats, use_executor, run_blocking,
+                           cpu_section)
+from .utils.cancellation import CancellationToken, use_token
+from .utils.config_utils import load_config
+from .utils.clip_archive import ClipArchiver
+from .utils.metrics_server import MetricsServer
+from .utils.loop_monitor import LoopLagMonitor
+from .utils.profiler import SamplingProfiler, default_profile_path
+from .utils.memory import memory_ledger, start_tracemalloc, tracemalloc_top
+from .utils.threads import thread_budget
+from .utils.chrome_trace import (start_trace, stop_trace, trace_span,
+                                 active_recorder, traced_callback)
 
 from rich.console import Console
 from rich.traceback import install as rich_install
@@ -33,40 +51,57 @@ except ImportError:
     GUI_AVAILABLE = False
 
 
-
-
-
-
-
-
-
-
-
-
 console = Console()
 rich_install(show_locals=False)
 
 
-
-
-
-
 class Utterance:
-    def __init__(self, pcm: bytes):
+    def __init__(self, pcm: bytes, segment_id: int | None = None, final: bool = True,
+                 t_start: float | None = None):
         self.pcm = pcm
+        self.segment_id = segment_id
+        self.final = final
+        self.t_created = time.perf_counter()
         self.es_text: str = ''
         self.en_text: str = ''
         self.timer = StageTimer()
-
-
-
-async def pipeline_cli(args, ui_callback=None):
+        # Traza monotónica desde el primer frame con voz (ADC) hasta el DAC
+        self.trace = LatencyTrace(origin=t_start)
+        # Bytes PCM retenidos mientras la utterance esté viva en el pipeline
+        memory_ledger.track_utterance(self, len(pcm))
+
+    def coalesce(self, other: 'Utterance') -> 'Utterance | None':
+        """Fusiona `other` (más reciente) en una cola llena.
+
+        Devuelve la utterance que debe quedar en la cola, o None si no se
+        pueden fusionar. Un parcial queda sustituido por otro parcial o por el
+        final del mismo segmento; dos finales se concatenan (audio y textos).
+        """
+        if not other.final:
+            if not self.final and self.segment_id != other.segment_id:
+                return None
+            return self if self.final else other
+        if not self.final:
+            return other if self.segment_id == other.segment_id else None
+        self.pcm += other.pcm
+        # `self` retiene ahora también el audio de `other`, que se libera con él
+        memory_ledger.track_utterance(self, len(other.pcm), count=False)
+        self.es_text = ' '.join(t for t in (self.es_text, other.es_text) if t)
+        self.en_text = ' '.join(t for t in (self.en_text, other.en_text) if t)
+        if 'speech_end' in other.trace.marks:
+            self.trace.mark('speech_end', other.trace.marks['speech_end'])
+        return self
+
+
+async def pipeline_cli(args, ui_callback=None, capture=None, sink_factory=None):
     """Ejecuta el pipeline completo de traducción de voz.
     
     Args:
         args: Argumentos de línea de comandos
         ui_callback: Callback opcional para actualizar interfaz de usuario
                     Acepta también config_reload_signal para recargar config
+        capture: Fuente de frames alternativa a `MicCapture` (p.ej. WavCapture)
+        sink_factory: Clase/callable alternativa a `AudioSink` (p.ej. NullSink)
     """
     print(f"[PIPELINE] starting pipeline with input={args.input!r} "
           f"output={args.output!r} exclusive={args.exclusive}")
@@ -84,19 +119,57 @@ async def pipeline_cli(args, ui_callback=None):
     except Exception as e:
         print(f"[PIPELINE] device enumeration error: {e}")
 
-    # Queues entre etapas
-    frames_q = asyncio.Queue(maxsize=256)  # bytes PCM16 16kHz 20ms
-    asr_q = asyncio.Queue(maxsize=16)      # Utterance listos para ASR
-    mt_q = asyncio.Queue(maxsize=16)       # Utterance tras ASR
-    tts_q = asyncio.Queue(maxsize=16)      # Utterance tras MT
+    config_file = getattr(args, 'config', None) or 'config.ini'
+    config = load_config(config_file)
+
+    # Queues entre etapas con política explícita al llenarse ([latency])
+    shed = ShedCounter()
+    budget = LatencyBudget.from_config(config)
+
+    def _stage_queue(name):
+        return PolicyQueue(maxsize=config.getint('latency', f'{name}_queue_size', fallback=16),
+                           policy=config.get('latency', f'{name}_queue_policy', fallback='block'),
+                           name=f'{name}_q', merge=Utterance.coalesce, shed=shed)
+
+    frames_q = asyncio.Queue(maxsize=256)  # (bytes PCM16 16kHz 20ms, t_adc)
+    asr_q = _stage_queue('asr')            # Utterance listos para ASR
+    mt_q = _stage_queue('mt')              # Utterance tras ASR
+    tts_q = _stage_queue('tts')            # Utterance tras MT
+
+    # Executors propios y token de cancelación: al parar, el trabajo de ASR/MT/TTS
+    # en curso se abandona en el siguiente paso y los hilos se liberan
+    cancel_token = CancellationToken()
+    # Reparto de núcleos entre etapas ([performance] max_workers): fija los
+    # hilos de cada backend al cargarlo y un executor de un hilo por etapa
+    thread_budget.load_config(config)
+    use_token(cancel_token)
+    use_executor(thread_budget.executor('pipeline'))
+
+    if getattr(args, 'tracemalloc', False) or config.getboolean('debug', 'tracemalloc',
+                                                                 fallback=False):
+        start_tracemalloc()
 
     # 1) Captura + VAD
-    mic = MicCapture(device_name=args.input, samplerate=16000, frame_ms=20, 
-                     exclusive=args.exclusive)
+    replay_path = getattr(args, 'replay_session', None)
+    if capture is not None:
+        mic = capture
+    elif replay_path:
+        mic = ReplayCapture(replay_path, realtime=not getattr(args, 'replay_fast', False))
+        console.log(f'[cyan]Reproduciendo sesión[/cyan] {replay_path} '
+                    f'({len(mic)} frames, '
+                    f'{"tiempo real" if mic.realtime else "máxima velocidad"})')
+    else:
+        mic = MicCapture(device_name=args.input, samplerate=16000, frame_ms=20, 
+                         exclusive=args.exclusive)
+
+    recorder = None
+    if getattr(args, 'record_session', None):
+        recorder = SessionRecorder(args.record_session, samplerate=16000, frame_ms=20)
+        console.log(f'[cyan]Grabando sesión en[/cyan] {args.record_session}')
     
     # Usar VAD avanzado con configuración anti-bucle
     if VAD_ADVANCED:
-        vad = VADSegmenter(sample_rate=16000, frame_ms=20, config_file='config.ini')
+        vad = VADSegmenter(sample_rate=16000, frame_ms=20, config_file=config_file)
         console.log('[bold green]VAD Avanzado activado[/bold green] - ' +
                    'Prevención de bucles habilitada')
         # Compartir instancia VAD con callback UI para recarga de config
@@ -108,15 +181,60 @@ async def pipeline_cli(args, ui_callback=None):
         console.log('[yellow]VAD Básico[/yellow] - ' +
                    'Instalar advanced_vad para mejor rendimiento')
 
+    # Traza Chrome/Perfetto opcional (spans de cada etapa y de la UI)
+    trace_path = getattr(args, 'trace', None) or config.get('debug', 'trace_file', fallback='')
+    if trace_path:
+        start_trace(trace_path)
+        if ui_callback:
+            ui_callback = traced_callback(ui_callback)
+        console.log(f'[cyan]Grabando traza en[/cyan] {trace_path}')
+
     # 2) ASR + MT + TTS + Sink
-    profile = (select_profile() if args.profile == 'auto' 
+    # La precisión autoajustada debe estar fijada antes de cargar los modelos
+    tune_precision = getattr(args, 'tune_precision', False)
+    if tune_precision or config.getboolean('precision', 'autotune', fallback=False):
+        from .calibration import apply_precision_policy
+        try:
+            choices = apply_precision_policy(config, force=tune_precision)
+            console.log(f'[cyan]Precisión por backend:[/cyan] {choices}')
+        except Exception as e:
+            console.log(f'[yellow]Autoajuste de precisión no disponible:[/yellow] {e}')
+    calibrate = getattr(args, 'calibrate', False)
+    profile = (select_profile(config, force_calibration=calibrate)
+               if args.profile == 'auto' or calibrate
                else build_profile(args.profile))
     asr = profile.asr
     tts = profile.tts
+
+    # Cancelación de eco: el PCM escrito en el sink sirve de referencia
+    aec = None
+    echo_ref = None
+    if config.getboolean('echo_cancellation', 'enable_aec', fallback=False):
+        echo_ref = EchoReference(sample_rate=16000)
+        aec = EchoCanceller.from_config(config, echo_ref, sample_rate=16000,
+                                        frame_ms=20)
+        console.log(f'[bold green]AEC activado[/bold green] - '
+                    f'{aec.partitions} particiones de {aec.block} muestras')
     mt = NLLBTranslator(
         model_name='facebook/nllb-200-distilled-600M',
-        device='cuda' if torch.cuda.is_available() else 'cpu',
+        **{'device': 'cuda' if torch.cuda.is_available() else 'cpu', **profile.mt_options},
     )
+    console.log("[bold]Memoria tras cargar modelos[/bold]\n" + memory_ledger.report())
+    console.log("[bold]Reparto de hilos[/bold]\n" + thread_budget.report(
+        {'asr': getattr(asr, 'device', 'cpu'), 'mt': mt.device,
+         'tts': getattr(tts, 'device', 'cpu')}))
+
+    # Escalera de calidad: menos beams / modelo menor cuando no se llega al objetivo
+    quality = None
+    quality_tasks = set()
+    if config.getboolean('quality', 'enable_quality_ladder', fallback=False):
+        def _on_quality_change(t):
+            console.log(f"[magenta]Calidad: {t['from']} → {t['to']} ({t['reason']})[/magenta]")
+
+        quality = QualityController.from_config(config, asr, mt, on_change=_on_quality_change)
+        console.log(f'[bold green]Escalera de calidad activada[/bold green] - '
+                    f'objetivo ASR+MT RTF {quality.target_rtf:.2f}, peldaños: '
+                    + ' → '.join(level.name for level in quality.ladder))
     # prepare a small on_playback callback to notify UI when audio is written
 
     def _on_playback(_bytes):
@@ -126,17 +244,20 @@ async def pipeline_cli(args, ui_callback=None):
             except Exception:
                 pass
 
+    sink_cls = sink_factory or AudioSink
     try:
-        sink = AudioSink(device_hint=args.output, samplerate=tts.sample_rate, 
+        sink = sink_cls(device_hint=args.output, samplerate=tts.sample_rate, 
                          channels=1, exclusive=args.exclusive, 
-                         on_playback=_on_playback)
+                         on_playback=_on_playback,
+                         on_reference=echo_ref.push if echo_ref else None)
     except Exception as e:
         console.log(f"PortAudioError/AudioSink error: {e}")
         # try fallback to default output device (no hint)
         try:
-            sink = AudioSink(device_hint=None, samplerate=tts.sample_rate, 
+            sink = sink_cls(device_hint=None, samplerate=tts.sample_rate, 
                              channels=1, exclusive=args.exclusive, 
-                             on_playback=_on_playback)
+                             on_playback=_on_playback,
+                             on_reference=echo_ref.push if echo_ref else None)
             console.log("AudioSink: fallback to default output device succeeded")
             if ui_callback:
                 try:
@@ -152,6 +273,142 @@ async def pipeline_cli(args, ui_callback=None):
                     pass
             raise
 
+    # Clasificador previo al ASR para descartar segmentos que no son voz
+    classifier = None
+    if config.getboolean('speech_classifier', 'enable_speech_classifier', fallback=False):
+        classifier = SegmentClassifier.from_config(config, sample_rate=16000, frame_ms=20)
+        console.log('[bold green]Clasificador de voz pre-ASR activado[/bold green]')
+
+    # Archivo de clips de depuración (escritura en segundo plano)
+    archiver = None
+    if config.getboolean('debug', 'save_audio_clips', fallback=False):
+        archiver = ClipArchiver.from_config(config, sample_rate=16000).start()
+        console.log(f'[cyan]Guardando clips en[/cyan] {archiver.directory} '
+                    f'({archiver.fmt})')
+
+    # Half-duplex: la captura se silencia mientras el sink reproduce
+    gate = None
+    if config.getboolean('half_duplex', 'enable_half_duplex', fallback=False):
+        gate = HalfDuplexGate.from_config(config, sink)
+        if hasattr(vad, 'playback_gate'):
+            vad.playback_gate = gate
+        console.log(f'[bold green]Half-duplex activado[/bold green] - '
+                    f'modo={gate.mode}, hangover={gate.hangover*1000:.0f} ms')
+
+    # Barge-in: una frase nueva puede interrumpir la traducción que suena
+    barge_in = BargeInPolicy.from_config(config)
+    speaking_utt = None  # Utterance en síntesis/reproducción (tts_worker)
+
+    def _playback_backlog_s():
+        """Estimación del audio pendiente: buffer del sink más la duración de
+        la voz original de lo que queda por sintetizar."""
+        pending = [u for u in tts_q.pending() if u.final]
+        if speaking_utt is not None:
+            pending.append(speaking_utt)
+        return sink.buffered_seconds() + sum(len(u.pcm) for u in pending) / (2 * 16000)
+
+    def _on_speech_start(segment_id, _t_start):
+        if not barge_in.trigger(segment_id, _playback_backlog_s()):
+            return
+        dropped = sink.flush()
+        if echo_ref is not None:
+            echo_ref.clear()
+            aec.clear_history()
+        shed.count('sink:flushed')
+        console.log(f"[yellow]Barge-in: frase nueva, se descartan {dropped:.1f} s "
+                    f"de audio y la síntesis pendiente[/yellow]")
+
+    if barge_in.mode != 'never' and hasattr(vad, 'on_speech_start'):
+        vad.on_speech_start = _on_speech_start
+        console.log(f'[bold green]Barge-in activado[/bold green] - modo={barge_in.mode}'
+                    + (f', backlog > {barge_in.threshold_s:.1f} s'
+                       if barge_in.mode == 'backlog' else ''))
+
+    # Profiler por muestreo bajo demanda (--profile-hot-paths [SEGUNDOS])
+    profiler = None
+    profile_window = getattr(args, 'profile_hot_paths', None)
+    if profile_window is not None:
+        profile_dir = config.get('debug', 'profile_dir', fallback='profiles')
+
+        def _write_profile(p):
+            path = p.write_collapsed(default_profile_path(profile_dir))
+            console.log(f'[cyan]Perfil guardado en[/cyan] {path} - {p.summary()}')
+
+        profiler = SamplingProfiler.from_config(config).start(
+            duration_s=profile_window or None, on_stop=_write_profile)
+        console.log(f'[cyan]Profiler activo[/cyan] '
+                    f'({f"{profile_window:.0f} s" if profile_window else "hasta salir"})')
+
+    # Monitor de retardo del event loop (detecta llamadas bloqueantes)
+    loop_monitor = None
+    if config.getboolean('performance', 'enable_loop_monitor', fallback=True):
+        def _on_stall(stall):
+            console.log(f"[yellow]⚠ {stall.describe()}[/yellow]")
+            tracer = active_recorder()
+            if tracer is not None:
+                tracer.complete('loop.stall', stall.t_start, stall.t_start + stall.duration,
+                                'loop', {'task': stall.task, 'stack': stall.stack},
+                                monotonic=True)
+        loop_monitor = LoopLagMonitor.from_config(config, on_stall=_on_stall)
+
+    # Endpoint OpenMetrics opcional (hilo en segundo plano)
+    metrics_server = None
+    metrics_port = getattr(args, 'metrics_port', None)
+    if metrics_port is None and config.getboolean('telemetry', 'enable_metrics', fallback=False):
+        metrics_port = config.getint('telemetry', 'metrics_port', fallback=9464)
+    if metrics_port is not None:
+        metrics_server = MetricsServer.from_config(config, port=metrics_port)
+        queues = {'frames_q': frames_q, 'asr_q': asr_q, 'mt_q': mt_q, 'tts_q': tts_q}
+        metrics_server.add_gauge('queue_depth', 'Elementos pendientes en cada cola',
+                                 lambda: {n: q.qsize() for n, q in queues.items()},
+                                 label='queue')
+        metrics_server.add_counter('capture_dropped_frames', 'Frames de captura descartados',
+                                   lambda: getattr(mic, 'dropped_frames', None))
+        metrics_server.add_counter('capture_input_overflows', 'Overflows de entrada de PortAudio',
+                                   lambda: getattr(mic, 'input_overflows', None))
+        metrics_server.add_counter('shed', 'Utterances descartadas o degradadas por motivo',
+                                   shed.snapshot, label='reason')
+        metrics_server.add_counter('sink_underruns', 'Underruns del dispositivo de salida',
+                                   lambda: sink.underruns)
+        metrics_server.add_counter('vad_segments', 'Segmentos del VAD por resultado',
+                                   lambda: {
+                                       'triggered': getattr(vad, 'segment_counter', None),
+                                       'accepted': getattr(vad, 'segments_accepted', None),
+                                       'rejected': getattr(vad, 'segments_rejected', None),
+                                   }, label='result')
+        if classifier is not None:
+            metrics_server.add_counter('classifier_segments', 'Segmentos del clasificador pre-ASR',
+                                       lambda: {'accepted': classifier.accepted,
+                                                'rejected': classifier.rejected},
+                                       label='result')
+        metrics_server.add_gauge('model_memory_bytes', 'Delta de RSS atribuido a cada modelo',
+                                 lambda: {n: e['rss'] for n, e in memory_ledger.models.items()},
+                                 label='model')
+        metrics_server.add_gauge('inflight_utterance_bytes', 'PCM retenido por utterances en vuelo',
+                                 lambda: memory_ledger.inflight_bytes)
+        metrics_server.add_gauge('inflight_utterance_peak_bytes',
+                                 'Pico de PCM retenido por utterances en vuelo',
+                                 lambda: memory_ledger.inflight_peak_bytes)
+        if loop_monitor is not None:
+            metrics_server.add_counter('loop_stalls', 'Bloqueos del event loop sobre el umbral',
+                                       lambda: loop_monitor.stall_count)
+            metrics_server.add_gauge('loop_lag_max_seconds', 'Máximo retardo del event loop',
+                                     lambda: loop_monitor.max_lag)
+        if quality is not None:
+            metrics_server.add_gauge('quality_level', 'Peldaño de la escalera de calidad (0 = máxima)',
+                                     lambda: quality.index)
+        if gate is not None:
+            metrics_server.add_counter('half_duplex_frames_gated',
+                                       'Frames silenciados durante la reproducción',
+                                       lambda: gate.frames_gated)
+        try:
+            metrics_server.start()
+            console.log(f'[cyan]Métricas en[/cyan] http://{metrics_server.host}:'
+                        f'{metrics_server.port}/metrics')
+        except OSError as e:
+            console.log(f'[yellow]No se pudo abrir el endpoint de métricas:[/yellow] {e}')
+            metrics_server = None
+
     # Mensaje de inicio para CLI
     if ui_callback is None:  # Solo en modo CLI
         console.log("[bold green]🎤 TRADUCTOR INICIADO[/bold green]")
@@ -165,35 +422,137 @@ async def pipeline_cli(args, ui_callback=None):
         console.log('')
 
     async def capture_task():
-        async for frame in mic.frames():
-            await frames_q.put(frame)
+        batch_start, batch_frames = time.perf_counter(), 0
+        async for frame, t_adc in mic.timed_frames():
+            tracer = active_recorder()
+            if tracer is not None:
+                # Un span por lote de 25 frames (500 ms) y profundidad de colas
+                batch_frames += 1
+                if batch_frames == 25:
+                    now = time.perf_counter()
+                    tracer.complete('capture.batch', batch_start, now, 'capture',
+                                       {'frames': batch_frames})
+                    tracer.counter('queues', {'frames_q': frames_q.qsize(),
+                                                 'asr_q': asr_q.qsize(),
+                                                 'mt_q': mt_q.qsize(),
+                                                 'tts_q': tts_q.qsize()})
+                    batch_start, batch_frames = now, 0
+            if recorder is not None:
+                recorder.write(frame, t_adc)
+            if aec is not None:
+                frame = aec.process(frame, t_adc)
+            if gate is not None:
+                frame = gate.process(frame)
+            # El VAD avanzado propaga el instante ADC a la traza de latencia
+            await frames_q.put((frame, t_adc) if VAD_ADVANCED else frame)
+
+    # Los trozos provisionales del VAD sólo se envían a backends en streaming;
+    # el resto sigue recibiendo utterances completas.
+    streaming_asr = getattr(asr, 'supports_streaming', False)
 
     async def vad_task():
-        async for segment in vad.segments(frames_q):
-            await asr_q.put(Utterance(pcm=segment))
+        if not hasattr(vad, 'chunks'):
+            async for segment in vad.segments(frames_q):
+                await asr_q.put(Utterance(pcm=segment))
+            return
+        async for chunk in vad.chunks(frames_q):
+            if not chunk.final and not streaming_asr:
+                continue
+            if chunk.final and classifier is not None and not classifier.is_speech(chunk.pcm):
+                stats = classifier.stats()
+                console.log(
+                    f"[dim]Segmento descartado (no es voz): "
+                    f"rechazados={stats['rejected']} | "
+                    f"ASR ahorrado≈{stats['asr_s_saved']:.1f} s | "
+                    f"coste={stats['classify_ms_avg']:.2f} ms/segmento[/dim]"
+                )
+                continue
+            utt = Utterance(pcm=chunk.pcm, segment_id=chunk.segment_id,
+                            final=chunk.final, t_start=chunk.t_start)
+            if chunk.t_end is not None:
+                utt.trace.mark('speech_end', chunk.t_end)
+            utt.trace.mark('vad')
+            tracer = active_recorder()
+            if tracer is not None and chunk.final and chunk.t_start is not None:
+                tracer.complete('vad.segment', chunk.t_start, chunk.t_end, 'vad',
+                                   {'segment_id': chunk.segment_id}, monotonic=True)
+            utt.trace.mark('asr_q_in')
+            await asr_q.put(utt)
 
     async def asr_worker():
+        use_executor(thread_budget.executor('asr'))
         while True:
             utt = await asr_q.get()
+            utt.trace.mark('asr_q_out')
+            if utt.final and budget.expired('asr', utt.trace):
+                shed.count('asr:deadline')
+                console.log(f"[yellow]Segmento descartado antes del ASR "
+                            f"(plazo superado, {budget.age(utt.trace):.1f} s)[/yellow]")
+                asr_q.task_done()
+                continue
+            if not utt.final:
+                partial = await asr.transcribe_chunk(utt.segment_id, utt.pcm,
+                                                     final=False, language='es')
+                if partial:
+                    console.log(f"[dim]ES (parcial):[/dim] {partial}")
+                    if ui_callback:
+                        ui_callback(partial=partial)
+                asr_q.task_done()
+                continue
             with utt.timer.stage('asr'):
-                utt.es_text = await asr.transcribe(utt.pcm, language='es')
+                if streaming_asr and utt.segment_id is not None:
+                    utt.es_text = await asr.transcribe_chunk(utt.segment_id, utt.pcm,
+                                                             final=True, language='es')
+                else:
+                    utt.es_text = await asr.transcribe(utt.pcm, language='es')
+            utt.trace.mark('asr')
+            if classifier is not None:
+                classifier.note_asr_cost(len(utt.pcm) / (2 * 16000),
+                                         utt.timer.durations().get('asr', 0.0))
             console.log(f"[bold cyan]ES:[/bold cyan] {utt.es_text}")
+            utt.trace.mark('mt_q_in')
             await mt_q.put(utt)
             asr_q.task_done()
 
     async def mt_worker():
+        use_executor(thread_budget.executor('mt'))
         while True:
             utt = await mt_q.get()
+            utt.trace.mark('mt_q_out')
+            if budget.expired('mt', utt.trace):
+                # Sin traducción: al menos se muestra el texto reconocido
+                shed.count('mt:deadline')
+                console.log(f"[yellow]Traducción omitida (plazo superado, "
+                            f"{budget.age(utt.trace):.1f} s)[/yellow]")
+                if ui_callback:
+                    ui_callback(partial=utt.es_text)
+                mt_q.task_done()
+                continue
             with utt.timer.stage('mt'):
                 utt.en_text = await mt.translate(utt.es_text, src_lang='spa_Latn', 
                                                  tgt_lang='eng_Latn')
+            utt.trace.mark('mt')
             console.log(f"[bold green]EN:[/bold green] {utt.en_text}")
+            utt.trace.mark('tts_q_in')
             await tts_q.put(utt)
             mt_q.task_done()
 
     async def tts_worker():
+        nonlocal speaking_utt
         while True:
             utt: Utterance = await tts_q.get()
+            utt.trace.mark('tts_q_out')
+            # Interrumpida por barge-in o fuera de plazo: sólo texto (sin síntesis)
+            barged_in = barge_in.is_stale(utt.segment_id)
+            text_only = barged_in or budget.expired('tts', utt.trace)
+            if barged_in:
+                shed.count('tts:barge_in')
+                console.log("[yellow]TTS omitido, sólo texto (interrumpido por "
+                            "una frase nueva)[/yellow]")
+            elif text_only:
+                shed.count('tts:text_only')
+                console.log(f"[yellow]TTS omitido, sólo texto (plazo superado, "
+                            f"{budget.age(utt.trace):.1f} s)[/yellow]")
 
             start = time.perf_counter()
 
@@ -218,13 +577,44 @@ async def pipeline_cli(args, ui_callback=None):
                         ui_callback(final=utt.en_text)
                     console.log(f"[bold cyan]ES:[/bold cyan] {utt.es_text}")
                     console.log(f"[bold green]EN:[/bold green] {utt.en_text}")
+                    if archiver is not None:
+                        archiver.submit(utt.pcm, utt.es_text, utt.en_text,
+                                        segment_id=utt.segment_id)
 
                     t_tts_start = None
-                    with utt.timer.stage('tts'):
-                        for chunk in tts.synthesize_stream_raw(utt.en_text):
-                            if t_tts_start is None:
+                    t_first_audio = None
+                    tts_threads = getattr(tts, 'num_threads', None)
+                    with utt.timer.stage('tts', threads=tts_threads):
+                        chunks = iter(() if text_only else tts.synthesize_stream_raw(utt.en_text))
+                        speaking_utt = utt
+                        while True:
+                            if barge_in.is_stale(utt.segment_id):
+                                # Frase nueva: dejar de sintetizar la obsoleta
+                                shed.count('tts:preempted')
+                                barged_in = True
+                                break
+                            # CPU sólo de la síntesis y la escritura: durante el
+                            # `sleep(0)` corren otras tareas en este mismo hilo
+                            with trace_span('tts.chunk', 'tts'), cpu_section(tts_threads):
+                                chunk = next(chunks, None)
+                            if chunk is None:
+                                break
+                            first = t_tts_start is None
+                            if first:
                                 t_tts_start = time.perf_counter() - start
-                            sink.write(chunk)
+                                t_first_audio = time.perf_counter() - utt.t_created
+                                utt.trace.mark('tts_first_chunk')
+                            with trace_span('sink.write', 'sink', bytes=len(chunk)), \
+                                    cpu_section(tts_threads):
+                                t_play = sink.write(chunk)
+                            if first and t_play is not None:
+                                # Instante DAC estimado de la primera muestra
+                                utt.trace.mark('dac', t_play)
+                            # Punto de cancelación (Stop) y de barge-in por chunk
+                            await asyncio.sleep(0)
+                        speaking_utt = None
+                        if hasattr(chunks, 'close'):
+                            chunks.close()
 
                     # Marcar traducción completada para prevención de bucles
                     if VAD_ADVANCED and hasattr(vad, 'mark_translation_completed'):
@@ -238,25 +628,104 @@ async def pipeline_cli(args, ui_callback=None):
                     "t_final": t_final,
                     "t_tts_start": t_tts_start if t_tts_start is 
                         not None else total_time,
+                    "t_first_audio": t_first_audio,
                     "underruns": sink.underruns,
                     "rtf": rtf,
+                    "audio_s": duration,
+                    "stages": utt.timer.durations(),
+                    "cpu": utt.timer.cpu_report(duration),
+                    "mouth_to_ear": utt.trace.since_origin('dac'),
+                    "speech_end_to_ear": utt.trace.between('speech_end', 'dac'),
+                    "queue_waits": utt.trace.queue_waits(),
+                    "trace": utt.trace.as_dict(),
+                    "text_only": text_only,
+                    "barged_in": barged_in,
+                    "shed": shed.snapshot(),
+                    "noise_floor_db": getattr(vad, 'noise_floor_db', None),
+                    "noise_gate_db": getattr(vad, 'noise_gate_db', None),
+                    "voice_threshold_db": getattr(vad, 'voice_threshold_db', None),
                 }
+                latency_stats.record('rtf', rtf)
+                latency_stats.record('mouth_to_ear', metrics["mouth_to_ear"])
+                latency_stats.record('speech_end_to_ear', metrics["speech_end_to_ear"])
+                for q, wait in metrics["queue_waits"].items():
+                    latency_stats.record(f'queue:{q}', wait)
+                if classifier is not None:
+                    metrics["classifier"] = classifier.stats()
+                if archiver is not None:
+                    metrics["clips"] = archiver.stats()
+                if loop_monitor is not None:
+                    metrics["loop"] = loop_monitor.snapshot()
+                metrics["memory"] = memory_ledger.snapshot()
+                if quality is not None:
+                    stages = metrics["stages"]
+                    # Normalizado por la duración: una frase larga no es sobrecarga
+                    compute = stages.get('asr', 0.0) + stages.get('mt', 0.0)
+                    if duration and quality.observe(compute / duration,
+                                                    asr_q.qsize() + mt_q.qsize()):
+                        # Cargar un modelo menor no debe frenar el loop ni el TTS
+                        task = asyncio.create_task(run_blocking(quality.apply), name='quality')
+                        quality_tasks.add(task)
+                        task.add_done_callback(quality_tasks.discard)
+                    metrics["quality"] = quality.level.name
                 if ui_callback:
                     ui_callback(metrics=metrics)
                 console.log(
                     f"metrics: first_partial={t_first_partial*1000:.0f} ms | "
                     f"final={t_final*1000:.0f} ms | "
-                    f"tts_start={t_tts_start*1000:.0f} ms | "
+                    f"tts_start={metrics['t_tts_start']*1000:.0f} ms | "
                     f"underruns={sink.underruns} | RTF={rtf:.2f}"
                 )
+                if metrics["mouth_to_ear"] is not None:
+                    waits = " ".join(f"{q}={w*1000:.0f}"
+                                     for q, w in metrics["queue_waits"].items())
+                    console.log(
+                        f"latency: mouth_to_ear={metrics['mouth_to_ear']*1000:.0f} ms | "
+                        f"speech_end_to_ear={(metrics['speech_end_to_ear'] or 0)*1000:.0f} ms | "
+                        f"queue_waits(ms): {waits}"
+                    )
+                if metrics["cpu"]:
+                    console.log("cpu (s CPU / s audio): " + " | ".join(
+                        f"{name}={c.get('cpu_rtf', 0.0):.2f}"
+                        f" ({c['cpu_util']:.0%} util, {c['threads'] or '?'} hilos)"
+                        for name, c in metrics["cpu"].items()))
+                if metrics["noise_floor_db"] is not None:
+                    console.log(
+                        f"noise: floor={metrics['noise_floor_db']:.1f} dB | "
+                        f"gate={metrics['noise_gate_db']:.1f} dB | "
+                        f"voice={metrics['voice_threshold_db']:.1f} dB"
+                    )
                 console.log(utt.timer.summary())
 
             except Exception as e:
+                speaking_utt = None
                 console.log(f"tts_worker error: {e}")
 
             tts_q.task_done()
 
 
+    # Informe periódico de percentiles acumulados (sólo CLI)
+    stats_interval = config.getfloat('performance', 'stats_interval_s', fallback=60.0)
+
+    def log_latency_stats():
+        report = latency_stats.report()
+        if report:
+            console.log("[bold]Latencias acumuladas[/bold]\n" + report)
+        dropped = getattr(mic, 'dropped_frames', 0)
+        if shed.total or dropped:
+            console.log("[bold]Descartes por sobrecarga[/bold] " + " | ".join(
+                [f"{k}={v}" for k, v in sorted(shed.snapshot().items())]
+                + ([f"capture:dropped_frames={dropped}"] if dropped else [])))
+        console.log("[bold]Memoria[/bold]\n" + memory_ledger.report())
+        top = tracemalloc_top()
+        if top:
+            console.log("[bold]tracemalloc (top)[/bold]\n" + "\n".join(top))
+
+    async def stats_task():
+        while True:
+            await asyncio.sleep(stats_interval)
+            log_latency_stats()
+
     # Orquestación
     tasks = [
         asyncio.create_task(capture_task(), name='capture'),
@@ -265,22 +734,69 @@ async def pipeline_cli(args, ui_callback=None):
         asyncio.create_task(mt_worker(), name='mt'),
         asyncio.create_task(tts_worker(), name='tts'),
     ]
+    if loop_monitor is not None:
+        tasks.append(asyncio.create_task(loop_monitor.run(), name='loop-monitor'))
+    if ui_callback is None and stats_interval > 0:
+        tasks.append(asyncio.create_task(stats_task(), name='stats'))
+
+    async def drain():
+        """Espera a que todo lo capturado atraviese el pipeline."""
+        while not frames_q.empty():
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0)
+        for q in (asr_q, mt_q, tts_q):
+            await q.join()
 
     try:
-        await asyncio.gather(*tasks)
+        if getattr(mic, 'finite', False):
+            # Sesión reproducida: terminar cuando se procese el último frame
+            await tasks[0]
+            await drain()
+            for t in tasks[1:]:
+                t.cancel()
+            await asyncio.gather(*tasks[1:], return_exceptions=True)
+        else:
+            await asyncio.gather(*tasks)
     except asyncio.CancelledError:
         pass
     finally:
+        cancel_token.cancel()
         mic.close()
         sink.close()
+        if recorder is not None:
+            recorder.close()
+        if archiver is not None:
+            archiver.close()
+        if metrics_server is not None:
+            metrics_server.close()
+        if profiler is not None:
+            profiler.stop()
+        trace_file = stop_trace()
+        if trace_file is not None:
+            console.log(f'[cyan]Traza guardada en[/cyan] {trace_file} '
+                        f'(abrir en https://ui.perfetto.dev)')
+        if ui_callback is None:
+            log_latency_stats()
+        # Esperar a que los hilos abandonen su paso de decodificación en curso
+        t_shutdown = time.perf_counter()
+        await asyncio.to_thread(thread_budget.shutdown, cancel_futures=True)
+        console.log(f"[dim]Executors del pipeline detenidos en "
+                    f"{(time.perf_counter() - t_shutdown)*1000:.0f} ms[/dim]")
     print("[PIPELINE] pipeline exiting, resources closed")
-
-
+    # Resumen de la sesión (benchmarks): lo descartado no llega a los metrics
+    return {
+        'shed': shed.snapshot(),
+        'capture_dropped_frames': getattr(mic, 'dropped_frames', 0),
+        'vad_segments_accepted': getattr(vad, 'segments_accepted', None),
+        'vad_segments_rejected': getattr(vad, 'segments_rejected', None),
+    }
 
 
 def build_arg_parser():
     p = argparse.ArgumentParser(description="LocalVoiceTranslate (offline ES→EN)")
     p.add_argument('--nogui', action='store_true', help="Ejecutar en modo CLI")
+    p.add_argument('--config', default='config.ini', metavar='PATH',
+                   help="Fichero de configuración")
     p.add_argument('--input', default=None, 
         help="Nombre/parcial del micrófono de entrada (WASAPI)")
     p.add_argument('--output', default="CABLE Input", 
@@ -290,11 +806,31 @@ def build_arg_parser():
     p.add_argument('--profile', default='auto',
                    choices=['auto', 'cpu-light', 'cpu-medium', 'gpu-medium', 'gpu-high'],
                    help="Perfil de hardware/modelos")
+    p.add_argument('--calibrate', action='store_true',
+                   help="Medir los backends en esta máquina y usar la combinación "
+                        "más adecuada (renueva la caché de [calibration])")
+    p.add_argument('--tune-precision', action='store_true',
+                   help="Medir int8/bf16/fp32 de cada backend y usar la más rápida "
+                        "dentro de [precision] accuracy_tolerance (renueva la caché)")
+    p.add_argument('--record-session', default=None, metavar='PATH',
+                   help="Grabar los frames crudos del micrófono en PATH")
+    p.add_argument('--replay-session', default=None, metavar='PATH',
+                   help="Usar una sesión grabada en lugar del micrófono")
+    p.add_argument('--replay-fast', action='store_true',
+                   help="Reproducir la sesión tan rápido como sea posible")
+    p.add_argument('--profile-hot-paths', type=float, nargs='?', const=0.0, default=None,
+                   metavar='SECONDS',
+                   help="Perfilar por muestreo durante SECONDS (o hasta salir) y "
+                        "guardar un flamegraph en formato collapsed")
+    p.add_argument('--tracemalloc', action='store_true',
+                   help="Activar tracemalloc e incluir las mayores asignaciones en los informes")
+    p.add_argument('--trace', default=None, metavar='PATH',
+                   help="Guardar una traza Chrome/Perfetto de la sesión en PATH")
+    p.add_argument('--metrics-port', type=int, default=None, metavar='PORT',
+                   help="Servir métricas OpenMetrics/Prometheus en PORT ([telemetry])")
     return p
 
 
-
-
 def main():
     args = build_arg_parser().parse_args()
 
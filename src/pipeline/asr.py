@@ -1,44 +1,145 @@
-import asyncio
 import json
+from pathlib import Path
+
 import numpy as np
 from faster_whisper import WhisperModel
 from vosk import Model, KaldiRecognizer
 
+from ..utils.cancellation import check_cancelled
+from ..utils.chrome_trace import trace_span
+from ..utils.memory import track_load
+from ..utils.precision import resolve_precision
+from ..utils.threads import thread_budget
+from ..utils.timing import run_blocking
+
 
 class FasterWhisperASR:
-    def __init__(self, model_size: str = "small", device: str = "cuda", compute_type: str = "float16"):
-        self.model = WhisperModel(model_size, device=device, compute_type=compute_type)
+    supports_streaming = False
+
+    def __init__(self, model_size: str = "small", device: str = "cuda", compute_type: str = "float16",
+                 cpu_threads: int = 0, beam_size: int = 5):
+        self.device = device
+        # La política de precisión puede sustituir la pedida (p.ej. fp16 en CPU)
+        self.compute_type = resolve_precision("whisper", device, compute_type)
+        # Sin valor explícito, los hilos de ctranslate2 salen del reparto global
+        if not cpu_threads and device == "cpu":
+            cpu_threads = thread_budget.threads("asr") or 0
+        self.cpu_threads = cpu_threads
+        self.model_size = model_size
+        # Ajustables en caliente por el controlador de calidad
+        self.beam_size = beam_size
+        self._models = {}
+        self.use_model(model_size)
+
+    def use_model(self, model_size: str):
+        """Activa otro tamaño de modelo; se carga la primera vez y queda en caché."""
+        model = self._models.get(model_size)
+        if model is None:
+            # Los hilos de ctranslate2 heredan la afinidad del hilo que carga
+            with track_load(f"asr:whisper-{model_size}-{self.compute_type}"), \
+                    thread_budget.pinned("asr"):
+                model = WhisperModel(model_size, device=self.device,
+                                     compute_type=self.compute_type,
+                                     cpu_threads=self.cpu_threads)
+            self._models[model_size] = model
+        self.model = model
+        self.active_model_size = model_size
+
+    @property
+    def num_threads(self) -> int:
+        """Hilos de ctranslate2 por llamada (4 por defecto en CPU)."""
+        return 1 if self.device == "cuda" else (self.cpu_threads or 4)
 
     async def transcribe(self, pcm16_bytes: bytes, language: str = "es") -> str:
         """Transcribe PCM16 16k mono → texto.
         Usa un hilo del pool para no bloquear el event loop.
         """
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, self._sync_transcribe, pcm16_bytes, language)
+        return await run_blocking(self._sync_transcribe, pcm16_bytes, language,
+                                  threads=self.num_threads)
 
     def _sync_transcribe(self, pcm16_bytes: bytes, language: str) -> str:
         audio = np.frombuffer(pcm16_bytes, dtype=np.int16).astype(np.float32) / 32768.0
-        segments, info = self.model.transcribe(
-            audio,
-            language=language,
-            beam_size=5,
-            vad_filter=False,
-            condition_on_previous_text=False,
-        )
-        text_parts = [seg.text for seg in segments]
+        with trace_span('asr.faster_whisper', 'asr', audio_s=len(audio) / 16000):
+            segments, info = self.model.transcribe(
+                audio,
+                language=language,
+                beam_size=self.beam_size,
+                vad_filter=False,
+                condition_on_previous_text=False,
+            )
+            # El iterador decodifica bajo demanda: comprobar entre segmentos
+            text_parts = []
+            for seg in segments:
+                check_cancelled()
+                text_parts.append(seg.text)
         return " ".join(text_parts).strip()
 
 
+class _VoskSession:
+    """Reconocedor incremental de un segmento del VAD."""
+
+    def __init__(self, model):
+        self.recognizer = KaldiRecognizer(model, 16000)
+        self.fed = 0       # bytes del segmento ya enviados al reconocedor
+        self.texts = []    # resultados cerrados por endpoints internos
+
+
 class VoskASR:
+    supports_streaming = True
+    num_threads = 1
+
     def __init__(self, model_path: str):
-        self.model = Model(model_path)
+        with track_load(f"asr:vosk-{Path(model_path).name}"):
+            self.model = Model(model_path)
+        self._sessions: dict[int, _VoskSession] = {}
 
     async def transcribe(self, pcm16_bytes: bytes, language: str = "es") -> str:
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, self._sync_transcribe, pcm16_bytes)
+        return await run_blocking(self._sync_transcribe, pcm16_bytes,
+                                  threads=self.num_threads)
 
     def _sync_transcribe(self, pcm16_bytes: bytes) -> str:
-        recognizer = KaldiRecognizer(self.model, 16000)
-        recognizer.AcceptWaveform(pcm16_bytes)
-        result = json.loads(recognizer.Result())
+        with trace_span('asr.vosk', 'asr', audio_s=len(pcm16_bytes) / 32000):
+            check_cancelled()
+            recognizer = KaldiRecognizer(self.model, 16000)
+            recognizer.AcceptWaveform(pcm16_bytes)
+            result = json.loads(recognizer.Result())
         return result.get("text", "").strip()
+
+    async def transcribe_chunk(self, segment_id: int, pcm16_bytes: bytes,
+                               final: bool, language: str = "es") -> str:
+        """Decodifica en streaming un `SpeechChunk` del VAD.
+
+        `pcm16_bytes` es el audio acumulado del segmento; sólo se envía al
+        reconocedor la parte nueva. Devuelve el parcial o, si `final`, el
+        texto definitivo del segmento.
+        """
+        return await run_blocking(self._sync_feed, segment_id, pcm16_bytes, final,
+                                  threads=self.num_threads)
+
+    def _sync_feed(self, segment_id: int, pcm16_bytes: bytes, final: bool) -> str:
+        with trace_span('asr.vosk_feed', 'asr', segment_id=segment_id, final=final):
+            return self._feed(segment_id, pcm16_bytes, final)
+
+    def _feed(self, segment_id: int, pcm16_bytes: bytes, final: bool) -> str:
+        check_cancelled()
+        # Descartar sesiones de segmentos anteriores que no llegaron a cerrarse
+        for stale in [sid for sid in self._sessions if sid < segment_id]:
+            del self._sessions[stale]
+        session = self._sessions.get(segment_id)
+        if session is None or len(pcm16_bytes) < session.fed:
+            # Corte por duración máxima: los parciales ya reconocieron audio que
+            # pasa al siguiente segmento; se reconoce de nuevo sólo lo retenido
+            session = self._sessions[segment_id] = _VoskSession(self.model)
+
+        if session.recognizer.AcceptWaveform(pcm16_bytes[session.fed:]):
+            text = json.loads(session.recognizer.Result()).get("text", "")
+            if text:
+                session.texts.append(text)
+        session.fed = len(pcm16_bytes)
+
+        if final:
+            del self._sessions[segment_id]
+            tail = json.loads(session.recognizer.FinalResult()).get("text", "")
+            return " ".join(t for t in session.texts + [tail] if t).strip()
+        partial = json.loads(session.recognizer.PartialResult()).get("partial", "")
+        return " ".join(t for t in session.texts + [partial] if t).strip()
@@ -0,0 +1,58 @@
+"""
+Política de barge-in: una frase nueva interrumpe la traducción que suena.
+
+Cuando el VAD detecta el inicio de un segmento, `BargeInPolicy.trigger`
+decide si hay que interrumpir según el modo configurado:
+
+- `never`: se reproduce todo el backlog en orden (comportamiento clásico);
+- `always`: cualquier frase nueva corta el audio pendiente;
+- `backlog`: sólo si el audio pendiente supera `threshold_s` segundos.
+
+Al interrumpir, los segmentos anteriores al nuevo quedan obsoletos: el TTS
+deja de sintetizarlos (se muestran sólo como texto) y la CPU pasa a la frase
+más reciente.
+"""
+
+BARGE_IN_MODES = ('never', 'always', 'backlog')
+
+
+class BargeInPolicy:
+    """Decide cuándo una frase nueva deja obsoleto el audio pendiente."""
+
+    def __init__(self, mode: str = 'never', threshold_s: float = 3.0):
+        if mode not in BARGE_IN_MODES:
+            raise ValueError(f"modo de barge-in desconocido: {mode!r}")
+        self.mode = mode
+        self.threshold_s = threshold_s
+        # Los segmentos con id menor que este quedan obsoletos
+        self.cutoff_segment = None
+        self.preemptions = 0
+
+    def should_preempt(self, backlog_s: float) -> bool:
+        if self.mode == 'never' or backlog_s <= 0:
+            return False
+        if self.mode == 'backlog':
+            return backlog_s > self.threshold_s
+        return True
+
+    def trigger(self, segment_id: int | None, backlog_s: float) -> bool:
+        """Registra el inicio del segmento `segment_id`; True si interrumpe."""
+        if segment_id is None or not self.should_preempt(backlog_s):
+            return False
+        self.cutoff_segment = segment_id
+        self.preemptions += 1
+        return True
+
+    def is_stale(self, segment_id: int | None) -> bool:
+        """True si la utterance pertenece a un segmento ya interrumpido."""
+        return (self.cutoff_segment is not None and segment_id is not None
+                and segment_id < self.cutoff_segment)
+
+    @classmethod
+    def from_config(cls, config):
+        """Construye la política desde la sección [barge_in]."""
+        section = 'barge_in'
+        return cls(
+            mode=config.get(section, 'mode', fallback='never'),
+            threshold_s=config.getfloat(section, 'backlog_threshold_s', fallback=3.0),
+        )
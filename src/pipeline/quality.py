@@ -0,0 +1,145 @@
+"""
+Escalera de calidad de ASR/MT guiada por un objetivo de latencia.
+
+`QualityController` observa, por utterance, el RTF de ASR+MT (segundos de
+cálculo por segundo de audio) y la profundidad de las colas. Se usa el RTF y
+no la latencia absoluta para que una utterance larga no cuente como
+sobrecarga. Si la media de la ventana supera el objetivo (o las colas se
+acumulan) baja un peldaño: primero decodificación greedy en MT, luego también
+en ASR y, por último, un modelo Whisper más pequeño. Cuando vuelve a haber
+margen sube de nuevo. La histéresis evita oscilar: para subir el RTF debe
+quedar por debajo de `upgrade_ratio * objetivo` durante una ventana completa
+sin colas, y entre dos cambios pasan al menos `min_dwell_s`.
+"""
+import collections
+import time
+from dataclasses import dataclass
+
+# Siguiente modelo Whisper más pequeño para el último peldaño
+SMALLER_WHISPER = {
+    'large-v3': 'medium',
+    'large-v2': 'medium',
+    'medium': 'small',
+    'small': 'base',
+    'base': 'tiny',
+}
+
+
+@dataclass(frozen=True)
+class QualityLevel:
+    """Peldaño de la escalera (el índice 0 es la máxima calidad)."""
+    name: str
+    asr_beam_size: int
+    mt_num_beams: int
+    asr_model: str | None = None  # None = modelo configurado en el perfil
+
+
+def default_ladder(asr_beam_size: int = 5, mt_num_beams: int = 3,
+                   fallback_asr_model: str | None = None) -> list[QualityLevel]:
+    levels = [
+        QualityLevel('full', asr_beam_size, mt_num_beams),
+        QualityLevel('greedy-mt', asr_beam_size, 1),
+        QualityLevel('greedy', 1, 1),
+    ]
+    if fallback_asr_model:
+        levels.append(QualityLevel(f'asr-{fallback_asr_model}', 1, 1, fallback_asr_model))
+    return levels
+
+
+class QualityController:
+    """Ajusta beams y modelo de ASR/MT según el RTF observado."""
+
+    def __init__(self, asr, mt, target_rtf: float, ladder: list[QualityLevel] | None = None,
+                 max_queue_depth: int = 2, window: int = 5, upgrade_ratio: float = 0.6,
+                 min_dwell_s: float = 10.0, on_change=None):
+        self.asr = asr
+        self.mt = mt
+        self.target_rtf = target_rtf
+        self.ladder = ladder or default_ladder(getattr(asr, 'beam_size', 5),
+                                               getattr(mt, 'num_beams', 3))
+        self.max_queue_depth = max_queue_depth
+        self.upgrade_ratio = upgrade_ratio
+        self.min_dwell_s = min_dwell_s
+        self.on_change = on_change
+        self.index = 0
+        self.transitions = []
+        self._samples = collections.deque(maxlen=window)
+        self._last_change = float('-inf')
+
+    @property
+    def level(self) -> QualityLevel:
+        return self.ladder[self.index]
+
+    def rolling_rtf(self) -> float | None:
+        if not self._samples:
+            return None
+        return sum(self._samples) / len(self._samples)
+
+    def observe(self, rtf: float, queue_depth: int = 0,
+                now: float | None = None) -> QualityLevel | None:
+        """Registra el RTF de ASR+MT de una utterance; devuelve el nuevo
+        peldaño si hay cambio."""
+        now = time.monotonic() if now is None else now
+        self._samples.append(rtf)
+        if now - self._last_change < self.min_dwell_s:
+            return None
+        full = len(self._samples) == self._samples.maxlen
+        rolling = self.rolling_rtf()
+        if self.index < len(self.ladder) - 1:
+            if queue_depth > self.max_queue_depth:
+                return self._step(+1, f'colas={queue_depth}', now)
+            if full and rolling > self.target_rtf:
+                return self._step(+1, f'RTF={rolling:.2f}', now)
+        if (self.index > 0 and full and queue_depth == 0
+                and rolling < self.target_rtf * self.upgrade_ratio):
+            return self._step(-1, f'RTF={rolling:.2f}', now)
+        return None
+
+    def _step(self, delta: int, reason: str, now: float) -> QualityLevel:
+        previous = self.level
+        self.index += delta
+        self._samples.clear()
+        self._last_change = now
+        transition = {'from': previous.name, 'to': self.level.name,
+                      'reason': reason, 't': now}
+        self.transitions.append(transition)
+        if self.on_change is not None:
+            try:
+                self.on_change(transition)
+            except Exception:
+                pass
+        return self.level
+
+    def apply(self):
+        """Aplica el peldaño actual a los backends (puede cargar un modelo)."""
+        level = self.level
+        if hasattr(self.asr, 'beam_size'):
+            self.asr.beam_size = level.asr_beam_size
+        if hasattr(self.mt, 'num_beams'):
+            self.mt.num_beams = level.mt_num_beams
+        if hasattr(self.asr, 'use_model'):
+            model = level.asr_model or self.asr.model_size
+            if getattr(self.asr, 'active_model_size', model) != model:
+                self.asr.use_model(model)
+
+    @classmethod
+    def from_config(cls, config, asr, mt, on_change=None):
+        """Construye el controlador desde la sección [quality]."""
+        section = 'quality'
+        fallback = config.get(section, 'fallback_asr_model', fallback='auto').strip()
+        if fallback == 'auto':
+            fallback = SMALLER_WHISPER.get(getattr(asr, 'model_size', ''))
+        if fallback in ('', 'none') or not hasattr(asr, 'use_model'):
+            fallback = None
+        ladder = default_ladder(getattr(asr, 'beam_size', 5), getattr(mt, 'num_beams', 3),
+                                fallback)
+        return cls(
+            asr, mt,
+            target_rtf=config.getfloat(section, 'target_rtf', fallback=0.5),
+            ladder=ladder,
+            max_queue_depth=config.getint(section, 'max_queue_depth', fallback=2),
+            window=config.getint(section, 'window', fallback=5),
+            upgrade_ratio=config.getfloat(section, 'upgrade_ratio', fallback=0.6),
+            min_dwell_s=config.getfloat(section, 'min_dwell_s', fallback=10.0),
+            on_change=on_change,
+        )
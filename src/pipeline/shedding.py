@@ -0,0 +1,104 @@
+"""
+Control de carga entre etapas del pipeline.
+
+- `PolicyQueue`: cola asyncio con política explícita cuando está llena:
+  `block` (esperar, como `asyncio.Queue`), `drop-oldest` (descartar el
+  elemento más antiguo) o `coalesce` (fusionar el nuevo con el último).
+- `LatencyBudget`: plazo máximo por etapa, medido desde el final de la voz.
+  Las utterances que llegan tarde se descartan o se degradan (texto sin TTS).
+- `ShedCounter`: cuenta cada descarte/degradación por motivo.
+"""
+import asyncio
+import collections
+import threading
+import time
+
+QUEUE_POLICIES = ('block', 'drop-oldest', 'coalesce')
+
+
+class ShedCounter:
+    """Contadores de descartes por motivo (`<cola|etapa>:<acción>`)."""
+
+    def __init__(self):
+        self._counts = collections.Counter()
+        self._lock = threading.Lock()
+
+    def count(self, reason: str, n: int = 1):
+        with self._lock:
+            self._counts[reason] += n
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+    @property
+    def total(self) -> int:
+        with self._lock:
+            return sum(self._counts.values())
+
+
+class PolicyQueue(asyncio.Queue):
+    """`asyncio.Queue` con política de desbordamiento configurable.
+
+    `merge(last, new)` (sólo `coalesce`) devuelve el elemento que queda en la
+    cola en lugar de `last`; si devuelve None se descarta el más antiguo.
+    """
+
+    def __init__(self, maxsize: int = 0, policy: str = 'block', name: str = 'queue',
+                 merge=None, shed: ShedCounter | None = None):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"política de cola desconocida: {policy!r}")
+        super().__init__(maxsize)
+        self.policy = policy
+        self.name = name
+        self.merge = merge
+        self.shed = shed if shed is not None else ShedCounter()
+
+    def pending(self) -> list:
+        """Copia de los elementos en cola, del más antiguo al más nuevo."""
+        return list(self._queue)
+
+    async def put(self, item):
+        if self.policy == 'block' or not self.full():
+            return await super().put(item)
+        if self.policy == 'coalesce' and self.merge is not None:
+            merged = self.merge(self._queue[-1], item)
+            if merged is not None:
+                self._queue[-1] = merged
+                self.shed.count(f'{self.name}:coalesced')
+                return
+        # drop-oldest (o coalesce sin fusión posible)
+        self.get_nowait()
+        self.task_done()
+        self.shed.count(f'{self.name}:dropped')
+        self.put_nowait(item)
+
+
+class LatencyBudget:
+    """Plazos por etapa (segundos desde el final de la voz; 0 = sin plazo)."""
+
+    def __init__(self, asr_s: float = 0.0, mt_s: float = 0.0, tts_s: float = 0.0):
+        self.deadlines = {'asr': asr_s, 'mt': mt_s, 'tts': tts_s}
+
+    @staticmethod
+    def age(trace) -> float | None:
+        """Antigüedad de una utterance según su `LatencyTrace`."""
+        ref = trace.marks.get('speech_end', trace.marks.get('vad'))
+        return None if ref is None else time.monotonic() - ref
+
+    def expired(self, stage: str, trace) -> bool:
+        deadline = self.deadlines.get(stage, 0.0)
+        if deadline <= 0:
+            return False
+        age = self.age(trace)
+        return age is not None and age > deadline
+
+    @classmethod
+    def from_config(cls, config):
+        """Construye los plazos desde la sección [latency]."""
+        section = 'latency'
+        return cls(
+            asr_s=config.getfloat(section, 'asr_deadline_ms', fallback=0) / 1000,
+            mt_s=config.getfloat(section, 'mt_deadline_ms', fallback=0) / 1000,
+            tts_s=config.getfloat(section, 'tts_deadline_ms', fallback=0) / 1000,
+        )
@@ -1,31 +1,97 @@
-import asyncio
 import torch
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+from transformers import (AutoModelForSeq2SeqLM, AutoTokenizer, StoppingCriteria,
+                          StoppingCriteriaList)
+
+from ..utils.cancellation import check_cancelled, current_token
+from ..utils.chrome_trace import trace_span
+from ..utils.memory import track_load
+from ..utils.precision import resolve_precision
+from ..utils.threads import thread_budget
+from ..utils.timing import run_blocking
+
+
+TORCH_DTYPES = {
+    "float16": torch.float16,
+    "bfloat16": torch.bfloat16,
+    "float32": torch.float32,
+}
+
+
+class _CancelCriteria(StoppingCriteria):
+    """Detiene `generate` en el siguiente paso si se cancela el token."""
+
+    def __init__(self, token):
+        self.token = token
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.token.cancelled,
+                          dtype=torch.bool, device=input_ids.device)
+
+
+def _configure_torch_threads(n: int | None):
+    """Limita el pool intra-op de torch (global del proceso) al reparto de MT."""
+    if not n:
+        return
+    torch.set_num_threads(n)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # sólo se puede fijar antes del primer trabajo en paralelo
 
 
 class NLLBTranslator:
-    def __init__(self, model_name: str, device: str = "cuda"):
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        # Use the new `dtype` argument instead of the deprecated `torch_dtype`.
-        # Keep torch.float16 as the preferred dtype for memory savings on GPU.
-        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name, dtype=torch.float16).to(device)
+    def __init__(self, model_name: str, device: str = "cuda", num_beams: int = 3,
+                 quantize: bool = False, precision: str | None = None):
+        # fp16 sólo en GPU: en CPU la política elige float32, bfloat16 o int8
+        precision = "int8" if quantize else resolve_precision("nllb", device, precision)
+        if quantize or not str(device).startswith("cuda"):
+            _configure_torch_threads(thread_budget.threads("mt"))
+        with track_load(f"mt:{model_name.split('/')[-1]}-{precision}"):
+            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+            if precision == "int8":
+                # Cuantización dinámica int8 de las capas lineales (sólo CPU)
+                model = AutoModelForSeq2SeqLM.from_pretrained(model_name, dtype=torch.float32)
+                self.model = torch.quantization.quantize_dynamic(
+                    model, {torch.nn.Linear}, dtype=torch.qint8)
+                device = "cpu"
+            else:
+                self.model = AutoModelForSeq2SeqLM.from_pretrained(
+                    model_name, dtype=TORCH_DTYPES[precision]).to(device)
         self.device = device
+        self.precision = precision
+        self.quantized = precision == "int8"
+        # Ajustable en caliente por el controlador de calidad (1 = greedy)
+        self.num_beams = num_beams
+
+    @property
+    def num_threads(self) -> int:
+        """Hilos intra-op de torch usados por `generate` (1 en GPU)."""
+        return 1 if str(self.device).startswith("cuda") else torch.get_num_threads()
 
     async def translate(self, text: str, src_lang: str = "spa_Latn", tgt_lang: str = "eng_Latn", max_new_tokens: int = 256) -> str:
-        # NLLB usa src_lang en el tokenizer, y forced_bos_token_id para el idioma de salida
-        def _translate():
+        return await run_blocking(self._sync_translate, text, src_lang, tgt_lang,
+                                  max_new_tokens, threads=self.num_threads)
+
+    def _sync_translate(self, text: str, src_lang: str = "spa_Latn",
+                        tgt_lang: str = "eng_Latn", max_new_tokens: int = 256) -> str:
+        with trace_span('mt.nllb', 'mt', chars=len(text)):
+            # NLLB usa src_lang en el tokenizer, y forced_bos_token_id para el idioma de salida
             self.tokenizer.src_lang = src_lang
             inputs = self.tokenizer([text], return_tensors="pt").to(self.model.device)
             bos_token_id = self.tokenizer.convert_tokens_to_ids(tgt_lang)
-            with torch.no_grad():
+            token = current_token()
+            stopping = StoppingCriteriaList([_CancelCriteria(token)] if token else [])
+            # El pool de torch se crea en el primer `generate` y hereda la afinidad
+            with torch.no_grad(), thread_budget.pinned("mt"):
                 generated = self.model.generate(
                     **inputs,
                     forced_bos_token_id=bos_token_id,
                     max_new_tokens=max_new_tokens,
-                    num_beams=3,
+                    num_beams=self.num_beams,
                     no_repeat_ngram_size=3,
+                    stopping_criteria=stopping,
                 )
+            # Una generación cortada por el token no es una traducción válida
+            check_cancelled()
             out = self.tokenizer.batch_decode(generated, skip_special_tokens=True)
             return out[0]
-
-        return await asyncio.to_thread(_translate)
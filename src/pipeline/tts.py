@@ -1,16 +1,63 @@
+import json
+import os
+from pathlib import Path
 from typing import Iterable
 
 import numpy as np
+from piper.config import PiperConfig
 from piper.voice import PiperVoice
 from TTS.api import TTS as CoquiTTS
 
+from ..utils.cancellation import OperationCancelled, check_cancelled
+from ..utils.memory import track_load
+from ..utils.precision import int8_model_path, resolve_precision
+from ..utils.threads import thread_budget
+
 
 class PiperTTS:
-    def __init__(self, model_path: str, use_cuda: bool = True):
-        # Piper busca el .json junto al .onnx automáticamente
-        self.voice = PiperVoice.load(model_path, use_cuda=use_cuda)
+    def __init__(self, model_path: str, use_cuda: bool = True, precision: str | None = None):
+        self.precision = resolve_precision("piper", "cuda" if use_cuda else "cpu", precision,
+                                           model_path=model_path)
+        # Piper busca el .json junto al .onnx; la variante int8 comparte el .json
+        config_path = f"{model_path}.json"
+        if self.precision == "int8":
+            model_path = str(int8_model_path(model_path))
+        threads = None if use_cuda else thread_budget.threads("tts")
+        with track_load(f"tts:piper-{Path(model_path).stem}"), thread_budget.pinned("tts"):
+            if threads:
+                self.voice = self._load_limited(model_path, config_path, threads)
+            else:
+                self.voice = PiperVoice.load(model_path, config_path=config_path,
+                                             use_cuda=use_cuda)
         self.sample_rate = self.voice.config.sample_rate
 
+    @staticmethod
+    def _load_limited(model_path: str, config_path: str, threads: int) -> PiperVoice:
+        """Carga la voz en CPU con `threads` hilos intra-op de onnxruntime.
+
+        `PiperVoice.load` no acepta `SessionOptions`, así que la sesión se crea
+        aquí (una sola vez) con las mismas opciones que usaría `load`; su pool
+        nace dentro de `pinned("tts")` y hereda la afinidad de la etapa.
+        """
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        with open(config_path, "r", encoding="utf-8") as config_file:
+            config = PiperConfig.from_dict(json.load(config_file))
+        session = onnxruntime.InferenceSession(
+            str(model_path), sess_options=options, providers=["CPUExecutionProvider"])
+        return PiperVoice(config=config, session=session)
+
+    @property
+    def num_threads(self) -> int:
+        """Hilos intra-op de la sesión de onnxruntime (0 = uno por núcleo)."""
+        try:
+            n = self.voice.session.get_session_options().intra_op_num_threads
+        except Exception:
+            n = 0
+        return n or os.cpu_count() or 1
+
     def synthesize_stream_raw(self, text: str) -> Iterable[bytes]:
         """Genera PCM16 (bytes) mientras se sintetiza (streaming)."""
         try:
@@ -19,10 +66,13 @@ class PiperTTS:
             
             # Procesar cada AudioChunk del generador
             for chunk in audio_chunks:
+                check_cancelled()
                 # AudioChunk tiene audio_int16_bytes property que retorna PCM16
                 pcm16_bytes = chunk.audio_int16_bytes
                 yield pcm16_bytes
                 
+        except OperationCancelled:
+            raise
         except Exception as e:
             # En caso de error, generar silencio breve
             duration_samples = int(self.sample_rate * 0.1)  # 100ms de silencio
@@ -32,10 +82,12 @@ class PiperTTS:
 
 class XTTSTTS:
     def __init__(self, model_name: str = "tts_models/en/ljspeech/xtts_v2"):
-        self.tts = CoquiTTS(model_name)
+        with track_load(f"tts:xtts-{model_name.split('/')[-1]}"):
+            self.tts = CoquiTTS(model_name)
         self.sample_rate = self.tts.synthesizer.output_sample_rate
 
     def synthesize_stream_raw(self, text: str) -> Iterable[bytes]:
+        check_cancelled()
         wav = self.tts.tts(text)
         pcm = (np.array(wav) * 32767).astype(np.int16).tobytes()
         yield pcm
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 import os
 
@@ -17,6 +17,8 @@ class Profile:
     name: str
     asr: object
     tts: object
+    # Argumentos extra para NLLBTranslator (device, quantize) si el perfil los fija
+    mt_options: dict = field(default_factory=dict)
 
 
 def _available_vram() -> int:
@@ -36,6 +38,8 @@ def detect_profile() -> str:
         return "gpu-high"
     if vram >= 6000:   # 6 GB or more
         return "gpu-medium"
+    if (os.cpu_count() or 1) >= 8:  # CPU con núcleos de sobra para Whisper
+        return "cpu-medium"
     return "cpu-light"
 
 
@@ -61,7 +65,7 @@ def build_profile(name: str) -> Profile:
         tts = PiperTTS(model_path="models/piper/en_US-lessac-medium.onnx", use_cuda=False)
     elif name == "cpu-medium":
         # CPU-only profile with Piper TTS for reliable audio
-        asr = FasterWhisperASR(model_size="small", device="cpu", compute_type="float32")
+        asr = FasterWhisperASR(model_size="small", device="cpu", compute_type="auto")
         tts = PiperTTS(model_path="models/piper/en_US-lessac-medium.onnx", use_cuda=False)
     else:
         # Prefer a local Vosk model on CPU, but gracefully fall back to a
@@ -74,7 +78,7 @@ def build_profile(name: str) -> Profile:
         except Exception:
             # Fallback to Whisper-based ASR running on CPU (no external model dir required,
             # faster-whisper will download model artifacts on first use).
-            asr = FasterWhisperASR(model_size="small", device="cpu", compute_type="float32")
+            asr = FasterWhisperASR(model_size="small", device="cpu", compute_type="auto")
 
         # Prefer Piper local model if present; otherwise fall back to a NoopTTS
         # to avoid heavy downloads at startup (Coqui TTS attempts to fetch models
@@ -105,6 +109,18 @@ def build_profile(name: str) -> Profile:
     return Profile(name=name, asr=asr, tts=tts)
 
 
-def select_profile() -> Profile:
+def select_profile(config=None, force_calibration: bool = False) -> Profile:
+    """Perfil automático: calibrado por benchmark si [calibration] está
+    activado (o se fuerza), y si no por VRAM/núcleos."""
+    if config is not None and (force_calibration or config.getboolean(
+            'calibration', 'enable_calibration', fallback=False)):
+        from .calibration import calibrated_profile
+        try:
+            profile = calibrated_profile(config, force=force_calibration)
+            if profile is not None:
+                return profile
+        except Exception as e:
+            print(f"[PROFILE] Error en la calibración: {e}")
+        print("[PROFILE] Calibración no disponible, selección por hardware")
     return build_profile(detect_profile())
 
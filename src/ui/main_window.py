@@ -18,7 +18,8 @@ import os
 
 from .config_window import ConfigWindow
 from .audio_test_window import AudioTestWindow
-from ..utils.config_utils import CommentedConfigParser
+from ..utils.config_utils import CommentedConfigParser, load_config
+from ..utils.profiler import SamplingProfiler, default_profile_path
 
 
 class MainWindow(QMainWindow):
@@ -121,6 +122,14 @@ class MainWindow(QMainWindow):
         self.btn_audio_test.setFixedHeight(36)
         self.btn_audio_test.setFixedWidth(100)
         self.btn_audio_test.clicked.connect(self.open_audio_test_window)
+
+        # Botón del profiler por muestreo (activar/desactivar)
+        self.btn_profile = QPushButton('🔥 Perfil')
+        self.btn_profile.setCheckable(True)
+        self.btn_profile.setFixedHeight(36)
+        self.btn_profile.setFixedWidth(100)
+        self.btn_profile.setToolTip('Perfilar rutas calientes (flamegraph)')
+        self.btn_profile.toggled.connect(self.toggle_profiler)
         
         # center buttons horizontally
         btn_row = QHBoxLayout()
@@ -132,6 +141,8 @@ class MainWindow(QMainWindow):
         btn_row.addWidget(self.btn_config)
         btn_row.addSpacing(8)
         btn_row.addWidget(self.btn_audio_test)
+        btn_row.addSpacing(8)
+        btn_row.addWidget(self.btn_profile)
         btn_row.addStretch()
         left.addLayout(btn_row)
 
@@ -143,6 +154,8 @@ class MainWindow(QMainWindow):
         self.rtf_label = QLabel("RTF: —")
         self.gpu_label = QLabel("GPU: —")
         self.vram_label = QLabel("VRAM: —")
+        self.noise_label = QLabel("ruido: —")
+        self.mem_label = QLabel("RAM: —")
         right.addWidget(self.latency_label)
         right.addWidget(self.partial_label)
         right.addWidget(self.final_label)
@@ -152,6 +165,8 @@ class MainWindow(QMainWindow):
         right.addSpacing(6)
         right.addWidget(self.gpu_label)
         right.addWidget(self.vram_label)
+        right.addWidget(self.noise_label)
+        right.addWidget(self.mem_label)
         right.addStretch()
 
         # status label
@@ -176,6 +191,7 @@ class MainWindow(QMainWindow):
         self._running = False
         self.config_window = None  # Para la ventana de configuración
         self.vad_instance = None   # Instancia del VAD para recarga de config
+        self._profiler = None      # Profiler por muestreo activo
         self._populate_inputs()
         # log initial device list for diagnostics
         try:
@@ -381,6 +397,11 @@ class MainWindow(QMainWindow):
             self._debug("MainWindow.closeEvent -> application closing")
         except Exception:
             print("[UI DEBUG] closing")
+        if self._task:
+            # El pipeline cancela su token y libera el executor al terminar
+            self._task.cancel()
+        if self._profiler is not None:
+            self._profiler.stop()
         super().closeEvent(event)
 
     def update_debug(self, partial=None, final=None, metrics=None, speaker_active=False):
@@ -417,6 +438,27 @@ class MainWindow(QMainWindow):
             fps = 1.0 / metrics.get("t_final", 0.0) if metrics.get("t_final", 0.0) else 0.0
             self.fps_label.setText(f"FPS: {fps:.2f}")
             self.rtf_label.setText(f"RTF: {metrics.get('rtf', 0.0):.2f}")
+            if metrics.get('speech_end_to_ear') is not None:
+                self.latency_label.setText(
+                    f"latencia: {metrics['speech_end_to_ear']*1000:.0f} ms "
+                    f"(boca-oído {metrics['mouth_to_ear']*1000:.0f} ms)"
+                )
+            if metrics.get('noise_floor_db') is not None:
+                self.noise_label.setText(
+                    f"ruido: {metrics['noise_floor_db']:.0f} dB "
+                    f"(puerta {metrics['noise_gate_db']:.0f}, "
+                    f"voz {metrics['voice_threshold_db']:.0f})"
+                )
+            mem = metrics.get('memory')
+            if mem and mem.get('rss_bytes') is not None:
+                self.mem_label.setText(
+                    f"RAM: {mem['rss_bytes'] / 2**20:.0f} MB "
+                    f"(utts {mem['inflight_bytes'] / 2**20:.1f}, "
+                    f"pico {mem['inflight_peak_bytes'] / 2**20:.1f} MB)"
+                )
+                self.mem_label.setToolTip("\n".join(
+                    f"{name}: {e['rss'] / 2**20:+.0f} MB"
+                    for name, e in mem['models'].items() if e.get('rss') is not None))
             util = mem_alloc = mem_total = 0
             if torch.cuda.is_available():
                 dev = torch.cuda.current_device()
@@ -429,6 +471,23 @@ class MainWindow(QMainWindow):
             self.gpu_label.setText(f"GPU: {util:.0f}%")
             self.vram_label.setText(f"VRAM: {mem_alloc/1024:.1f}/{mem_total/1024:.1f} GB")
 
+    def toggle_profiler(self, checked: bool):
+        """Arranca/detiene el profiler y guarda el flamegraph al detenerlo."""
+        if checked:
+            config = load_config('config.ini')
+            profile_dir = config.get('debug', 'profile_dir', fallback='profiles')
+
+            def _write(profiler):
+                path = profiler.write_collapsed(default_profile_path(profile_dir))
+                self._debug(f"profile written to {path}: {profiler.summary()}")
+                self.status_label.setText(f"perfil: {path.name}")
+
+            self._profiler = SamplingProfiler.from_config(config).start(on_stop=_write)
+            self._debug("sampling profiler started")
+        elif self._profiler is not None:
+            self._profiler.stop()
+            self._profiler = None
+
     def open_config_window(self):
         """Abrir ventana de configuración"""
         if not hasattr(self, 'config_window') or self.config_window is None:
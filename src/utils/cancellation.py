@@ -0,0 +1,58 @@
+"""
+Cancelación cooperativa del trabajo bloqueante de los backends.
+
+Cancelar una tarea asyncio no detiene la llamada que `run_blocking` ya envió a
+un hilo del executor: el decode de Whisper, `generate` de NLLB o la síntesis
+siguen hasta terminar. El pipeline instala un `CancellationToken` en el
+contexto de sus tareas (`use_token`); `run_blocking` copia ese contexto al hilo
+y los backends llaman a `check_cancelled()` entre pasos de decodificación, de
+modo que al parar se libera la CPU en un paso como mucho.
+"""
+import contextvars
+import threading
+
+_current_token = contextvars.ContextVar('cancellation_token', default=None)
+
+
+class OperationCancelled(Exception):
+    """El trabajo se abandonó porque su token fue cancelado."""
+
+
+class CancellationToken:
+    """Señal de cancelación segura entre hilos."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        """Lanza `OperationCancelled` si el token fue cancelado."""
+        if self._event.is_set():
+            raise OperationCancelled()
+
+
+def use_token(token: CancellationToken | None):
+    """Instala `token` en el contexto actual (lo heredan las tareas nuevas)."""
+    return _current_token.set(token)
+
+
+def current_token() -> CancellationToken | None:
+    return _current_token.get()
+
+
+def is_cancelled() -> bool:
+    token = _current_token.get()
+    return token is not None and token.cancelled
+
+
+def check_cancelled():
+    """Punto de cancelación para los backends (no hace nada sin token)."""
+    token = _current_token.get()
+    if token is not None:
+        token.check()
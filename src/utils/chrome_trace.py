@@ -0,0 +1,130 @@
+"""
+Grabador de trazas en formato Chrome trace-event (abrible en Perfetto o
+chrome://tracing) para ver la concurrencia real del pipeline.
+
+Se activa una vez por proceso con `start_trace(path)`; mientras no esté
+activo, `trace_span()` no hace nada. Los spans registran el hilo en el que
+se ejecutan, así que las llamadas a modelos dentro de un executor aparecen en
+la pista de su hilo y no en la del event loop.
+
+    start_trace('trace.json')
+    with trace_span('asr.faster_whisper', 'asr', audio_s=2.4):
+        ...
+    stop_trace()
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+
+class TraceRecorder:
+    """Acumula eventos en memoria (con límite) y los vuelca a JSON al cerrar."""
+
+    def __init__(self, path, max_events: int = 1_000_000):
+        self.path = Path(path)
+        self.max_events = max_events
+        self.pid = os.getpid()
+        self._events = []
+        self._threads = {}
+        self._t0 = time.perf_counter()
+        # Desfase para convertir instantes de time.monotonic() (ADC/DAC)
+        self._mono_offset = self._t0 - time.monotonic()
+        self.dropped = 0
+
+    def _us(self, t: float) -> float:
+        return (t - self._t0) * 1e6
+
+    def _tid(self) -> int:
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        return tid
+
+    def _add(self, event: dict):
+        # list.append es atómico con el GIL: sin lock en el camino caliente
+        if len(self._events) >= self.max_events:
+            self.dropped += 1
+            return
+        self._events.append(event)
+
+    def complete(self, name: str, start: float, end: float, cat: str = 'pipeline',
+                 args: dict | None = None, monotonic: bool = False):
+        """Span ya terminado. `start`/`end` en perf_counter (o monotonic)."""
+        if monotonic:
+            start += self._mono_offset
+            end += self._mono_offset
+        event = {'name': name, 'cat': cat, 'ph': 'X', 'pid': self.pid,
+                 'tid': self._tid(), 'ts': self._us(start), 'dur': (end - start) * 1e6}
+        if args:
+            event['args'] = args
+        self._add(event)
+
+    @contextmanager
+    def span(self, name: str, cat: str = 'pipeline', **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.complete(name, start, time.perf_counter(), cat, args)
+
+    def instant(self, name: str, cat: str = 'pipeline', **args):
+        event = {'name': name, 'cat': cat, 'ph': 'i', 's': 't', 'pid': self.pid,
+                 'tid': self._tid(), 'ts': self._us(time.perf_counter())}
+        if args:
+            event['args'] = args
+        self._add(event)
+
+    def counter(self, name: str, values: dict):
+        self._add({'name': name, 'ph': 'C', 'pid': self.pid, 'tid': self._tid(),
+                   'ts': self._us(time.perf_counter()), 'args': values})
+
+    def close(self):
+        meta = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid,
+                 'args': {'name': 'DSRealtime'}}]
+        for tid, name in list(self._threads.items()):
+            meta.append({'name': 'thread_name', 'ph': 'M', 'pid': self.pid,
+                         'tid': tid, 'args': {'name': name}})
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': meta + self._events,
+                       'displayTimeUnit': 'ms',
+                       'otherData': {'dropped_events': self.dropped}}, f)
+        return self.path
+
+
+_recorder: TraceRecorder | None = None
+
+
+def start_trace(path, max_events: int = 1_000_000) -> TraceRecorder:
+    global _recorder
+    _recorder = TraceRecorder(path, max_events=max_events)
+    return _recorder
+
+
+def stop_trace():
+    """Escribe la traza activa (si la hay) y desactiva la grabación."""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder.close() if recorder is not None else None
+
+
+def active_recorder() -> TraceRecorder | None:
+    return _recorder
+
+
+def trace_span(name: str, cat: str = 'pipeline', **args):
+    """Span sobre el hilo actual; no hace nada si no hay traza activa."""
+    if _recorder is None:
+        return nullcontext()
+    return _recorder.span(name, cat, **args)
+
+
+def traced_callback(callback, name: str = 'ui.callback'):
+    """Envuelve un callback de la UI para registrar cada llamada como span."""
+    def wrapper(*args, **kwargs):
+        with trace_span(name, 'ui', keys=sorted(kwargs)):
+            return callback(*args, **kwargs)
+    return wrapper
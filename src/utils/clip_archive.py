@@ -0,0 +1,227 @@
+"""
+Archivo de clips de audio para depuración (`[debug] save_audio_clips`).
+
+El pipeline entrega el PCM de cada utterance y sus textos ES/EN a una cola
+acotada; un hilo de fondo los escribe como FLAC/Opus junto a un índice JSONL.
+Nunca bloquea al pipeline: si la cola está llena el clip se descarta y se
+cuenta. Los clips más antiguos se borran al superar la cuota de disco (que
+incluye el índice) y sus entradas se eliminan del índice. Sólo se cuentan y
+borran ficheros con el nombre de los clips (`clip-*`): `clips_dir` puede ser
+una carpeta compartida.
+"""
+import collections
+import json
+import queue
+import threading
+import time
+import wave
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import soundfile as sf
+except ImportError:  # soundfile es opcional (sólo depuración)
+    sf = None
+
+
+_FORMATS = {
+    'flac': ('.flac', 'FLAC', 'PCM_16'),
+    'opus': ('.ogg', 'OGG', 'OPUS'),
+    'wav': ('.wav', None, None),
+}
+_EXTENSIONS = {ext for ext, _, _ in _FORMATS.values()}
+
+
+class ClipArchiver:
+    """Escritor de clips en segundo plano con cuota y descarte bajo presión."""
+
+    INDEX_NAME = 'index.jsonl'
+    CLIP_PATTERN = 'clip-*'
+
+    def __init__(self, directory='clips', fmt='flac', max_mb=500.0,
+                 queue_size=32, sample_rate=16000):
+        if fmt not in _FORMATS:
+            raise ValueError(f"formato de clip desconocido: {fmt!r}")
+        self.directory = Path(directory)
+        self.fmt = fmt if (sf is not None or fmt == 'wav') else 'wav'
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.sample_rate = sample_rate
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._seq = 0
+
+        # Clips existentes (más antiguo primero) para aplicar la cuota
+        self._clips = collections.deque()
+        self._clip_bytes = 0
+        self._index_bytes = 0
+
+        # Estadísticas
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def start(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        line_bytes = self._index_line_bytes()
+        for path in sorted(p for p in self.directory.glob(self.CLIP_PATTERN)
+                           if p.is_file() and p.suffix in _EXTENSIONS):
+            size = path.stat().st_size
+            self._clips.append((path, size, line_bytes.get(path.name, 0)))
+            self._clip_bytes += size
+        index = self.directory / self.INDEX_NAME
+        self._index_bytes = index.stat().st_size if index.exists() else 0
+        # Entradas de clips borrados a mano o en sesiones anteriores
+        stale = set(line_bytes) - {path.name for path, _, _ in self._clips}
+        if stale:
+            self._prune_index(stale)
+        self._thread = threading.Thread(target=self._run, name='clip-archiver',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, pcm16_bytes: bytes, es_text: str = '', en_text: str = '',
+               **extra) -> bool:
+        """Encola un clip sin bloquear. Devuelve False si se descartó."""
+        item = (time.time(), pcm16_bytes, es_text, en_text, extra)
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self, timeout: float = 2.0):
+        """Vacía la cola (con límite de tiempo) y detiene el hilo."""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._write(*item)
+                self.written += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"[CLIPS] Error guardando clip: {e}")
+
+    def _write(self, ts, pcm16_bytes, es_text, en_text, extra):
+        ext, sf_format, subtype = _FORMATS[self.fmt]
+        self._seq += 1
+        stamp = datetime.fromtimestamp(ts).strftime('%Y%m%d-%H%M%S-%f')
+        path = self.directory / f"clip-{stamp}-{self._seq:05d}{ext}"
+
+        if sf_format is None:
+            with wave.open(str(path), 'wb') as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(self.sample_rate)
+                w.writeframes(pcm16_bytes)
+        else:
+            audio = np.frombuffer(pcm16_bytes, dtype=np.int16)
+            sf.write(str(path), audio, self.sample_rate, format=sf_format,
+                     subtype=subtype)
+
+        size = path.stat().st_size
+        self._clip_bytes += size
+
+        entry = {
+            'file': path.name,
+            'time': datetime.fromtimestamp(ts).isoformat(),
+            'duration_s': round(len(pcm16_bytes) / (2 * self.sample_rate), 3),
+            'es': es_text,
+            'en': en_text,
+        }
+        entry.update(extra)
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with open(self.directory / self.INDEX_NAME, 'a', encoding='utf-8') as f:
+            f.write(line)
+        line_bytes = len(line.encode('utf-8'))
+        self._index_bytes += line_bytes
+        self._clips.append((path, size, line_bytes))
+
+        self._enforce_quota()
+
+    @property
+    def _total_bytes(self) -> int:
+        return self._clip_bytes + self._index_bytes
+
+    def _enforce_quota(self):
+        # Rotación: borrar los clips más antiguos hasta volver a la cuota
+        evicted = set()
+        while self._total_bytes > self.max_bytes and len(self._clips) > 1:
+            old_path, old_size, old_line = self._clips.popleft()
+            try:
+                old_path.unlink()
+            except FileNotFoundError:
+                pass
+            self._clip_bytes -= old_size
+            self._index_bytes -= old_line  # se libera al podar el índice
+            evicted.add(old_path.name)
+        if evicted:
+            self._prune_index(evicted)
+
+    def _index_line_bytes(self) -> dict:
+        """Bytes de la entrada del índice de cada clip existente."""
+        sizes = {}
+        try:
+            with open(self.directory / self.INDEX_NAME, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        sizes[json.loads(line)['file']] = len(line.encode('utf-8'))
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except FileNotFoundError:
+            pass
+        return sizes
+
+    def _prune_index(self, evicted: set):
+        """Quita del índice las entradas de clips borrados."""
+        index = self.directory / self.INDEX_NAME
+        try:
+            lines = index.read_text(encoding='utf-8').splitlines(keepends=True)
+        except FileNotFoundError:
+            self._index_bytes = 0
+            return
+        kept = []
+        for line in lines:
+            try:
+                if json.loads(line).get('file') in evicted:
+                    continue
+            except ValueError:
+                pass
+            kept.append(line)
+        tmp = index.with_name(index.name + '.tmp')
+        tmp.write_text(''.join(kept), encoding='utf-8')
+        tmp.replace(index)
+        self._index_bytes = index.stat().st_size
+
+    def stats(self) -> dict:
+        return {
+            'written': self.written,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'disk_mb': self._total_bytes / (1024 * 1024),
+        }
+
+    @classmethod
+    def from_config(cls, config, sample_rate=16000):
+        """Construye el archivador desde las opciones clip_* de [debug]."""
+        section = 'debug'
+        return cls(
+            directory=config.get(section, 'clips_dir', fallback='clips'),
+            fmt=config.get(section, 'clip_format', fallback='flac'),
+            max_mb=config.getfloat(section, 'clips_max_mb', fallback=500.0),
+            queue_size=config.getint(section, 'clip_queue_size', fallback=32),
+            sample_rate=sample_rate,
+        )
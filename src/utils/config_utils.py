@@ -12,6 +12,9 @@ class CommentedConfigParser(configparser.ConfigParser):
     def get(self, section: str, option: str, **kwargs) -> str:
         """Override get para remover comentarios en línea."""
         value = super().get(section, option, **kwargs)
+        # Los fallbacks no-string (int, bool, None) se devuelven tal cual
+        if not isinstance(value, str):
+            return value
         # Remover comentarios después de #
         if '#' in value:
             value = value.split('#')[0]
@@ -20,16 +23,18 @@ class CommentedConfigParser(configparser.ConfigParser):
     def getint(self, section: str, option: str, **kwargs) -> int:
         """Override getint para manejar comentarios."""
         value = self.get(section, option, **kwargs)
-        return int(value)
+        return int(value) if isinstance(value, str) else value
     
     def getfloat(self, section: str, option: str, **kwargs) -> float:
         """Override getfloat para manejar comentarios."""
         value = self.get(section, option, **kwargs)
-        return float(value)
+        return float(value) if isinstance(value, str) else value
     
     def getboolean(self, section: str, option: str, **kwargs) -> bool:
         """Override getboolean para manejar comentarios."""
         value = self.get(section, option, **kwargs)
+        if not isinstance(value, str):
+            return value
         return value.lower() in ('true', 'yes', '1', 'on')
 
 
@@ -61,12 +66,20 @@ def load_default_config(config: CommentedConfigParser):
             'min_speech_duration_ms': '200',
             'max_silence_duration_ms': '300',
             'voice_threshold_db': '-30',
-            'noise_gate_db': '-45'
+            'noise_gate_db': '-45',
+            'max_segment_duration_ms': '15000',
+            'split_search_window_ms': '2000',
+            'auto_threshold': 'false',
+            'noise_floor_window_ms': '10000',
+            'noise_floor_percentile': '20',
+            'noise_gate_margin_db': '6',
+            'voice_threshold_margin_db': '3'
         },
         'vad': {
             'aggressiveness': '3',
             'padding_ms': '600',
-            'voice_ratio_threshold': '0.8'
+            'voice_ratio_threshold': '0.8',
+            'partial_interval_ms': '0'
         },
         'feedback_prevention': {
             'enable_feedback_detection': 'true',
@@ -88,10 +101,39 @@ def load_default_config(config: CommentedConfigParser):
             'spectral_floor_db': '-41',
             'noise_reduction_factor': '0.5'
         },
+        'echo_cancellation': {
+            'enable_aec': 'false',
+            'filter_length_ms': '200',
+            'step_size': '0.3',
+            'bulk_delay_ms': '0',
+            'double_talk_threshold': '0.5'
+        },
+        'half_duplex': {
+            'enable_half_duplex': 'false',
+            'mode': 'mute',
+            'attenuation_db': '-30',
+            'hangover_ms': '300',
+            'barge_in_db': '-20'
+        },
+        'speech_classifier': {
+            'enable_speech_classifier': 'false',
+            'max_flatness': '0.3',
+            'max_zcr': '0.3',
+            'min_voiced_ratio': '0.15',
+            'min_voiced_ms': '100'
+        },
         'debug': {
             'log_audio_levels': 'true',
             'log_vad_decisions': 'true',
-            'save_audio_clips': 'false'
+            'save_audio_clips': 'false',
+            'clips_dir': 'clips',
+            'clip_format': 'flac',
+            'clips_max_mb': '500',
+            'clip_queue_size': '32',
+            'trace_file': '',
+            'profile_dir': 'profiles',
+            'profile_interval_ms': '10',
+            'tracemalloc': 'false'
         },
         'models': {
             'asr_model_size': 'small',
@@ -100,8 +142,53 @@ def load_default_config(config: CommentedConfigParser):
         },
         'performance': {
             'use_gpu': 'auto',
-            'max_workers': '4',
-            'chunk_size': '1024'
+            'max_workers': '0',
+            'thread_weights': 'asr:2, mt:2, tts:1',
+            'pin_threads': 'false',
+            'chunk_size': '1024',
+            'stats_interval_s': '60',
+            'enable_loop_monitor': 'true',
+            'loop_monitor_interval_ms': '50',
+            'loop_lag_threshold_ms': '100'
+        },
+        'latency': {
+            'asr_queue_policy': 'block',
+            'asr_queue_size': '16',
+            'mt_queue_policy': 'block',
+            'mt_queue_size': '16',
+            'tts_queue_policy': 'block',
+            'tts_queue_size': '16',
+            'asr_deadline_ms': '0',
+            'mt_deadline_ms': '0',
+            'tts_deadline_ms': '0'
+        },
+        'calibration': {
+            'enable_calibration': 'false',
+            'rtf_target': '0.5',
+            'cache_file': 'calibration.json'
+        },
+        'precision': {
+            'autotune': 'false',
+            'accuracy_tolerance': '0.05',
+            'reference_dir': 'corpus'
+        },
+        'quality': {
+            'enable_quality_ladder': 'false',
+            'target_rtf': '0.5',
+            'max_queue_depth': '2',
+            'window': '5',
+            'upgrade_ratio': '0.6',
+            'min_dwell_s': '10',
+            'fallback_asr_model': 'auto'
+        },
+        'barge_in': {
+            'mode': 'never',
+            'backlog_threshold_s': '3.0'
+        },
+        'telemetry': {
+            'enable_metrics': 'false',
+            'metrics_host': '127.0.0.1',
+            'metrics_port': '9464'
         }
     })
 
@@ -0,0 +1,135 @@
+"""
+Monitor de retardo del event loop.
+
+Una tarea asyncio se despierta cada `interval_ms` y mide cuánto tarde llega
+respecto a lo previsto (retardo de planificación). Un hilo vigilante comprueba
+el último latido: si el loop lleva más de `threshold_ms` sin responder, toma
+una muestra de la pila del hilo del loop para saber qué llamada síncrona lo
+está bloqueando (p.ej. `sink.write`, síntesis TTS o consultas a CUDA).
+"""
+import asyncio
+import collections
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+
+from .timing import latency_stats
+
+
+@dataclass
+class LoopStall:
+    """Bloqueo del event loop por encima del umbral."""
+    t_start: float                 # time.monotonic() del último latido previo
+    duration: float = 0.0          # segundos hasta que el loop volvió a responder
+    task: str | None = None        # tarea asyncio en curso al tomar la muestra
+    stack: list[str] = field(default_factory=list)
+
+    def describe(self) -> str:
+        where = self.stack[-1].strip().splitlines()[0] if self.stack else '?'
+        task = f" tarea={self.task}" if self.task else ''
+        return f"loop bloqueado {self.duration*1000:.0f} ms{task} en {where}"
+
+
+class LoopLagMonitor:
+    """Mide el retardo del loop y captura la pila de los bloqueos largos."""
+
+    def __init__(self, interval_ms: float = 50, threshold_ms: float = 100,
+                 max_stalls: int = 20, stats=None, on_stall=None):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.stats = stats if stats is not None else latency_stats
+        self.on_stall = on_stall
+        self.stalls = collections.deque(maxlen=max_stalls)
+
+        self.stall_count = 0
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+
+        self._loop = None
+        self._loop_thread_id = None
+        self._beat = None
+        self._pending = None  # bloqueo detectado por el vigilante, sin cerrar
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    async def run(self):
+        """Tarea del monitor; cancelarla detiene también el vigilante."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name='loop-watchdog',
+                                          daemon=True)
+        self._watchdog.start()
+        try:
+            while True:
+                expected = time.monotonic() + self.interval
+                await asyncio.sleep(self.interval)
+                now = time.monotonic()
+                lag = max(0.0, now - expected)
+                self._beat = now
+                self.last_lag = lag
+                self.max_lag = max(self.max_lag, lag)
+                self.stats.record('loop_lag', lag)
+                if lag > self.threshold:
+                    self._close_stall(lag)
+                else:
+                    # Muestra tomada justo cuando el loop ya se recuperaba
+                    self._pending = None
+        finally:
+            self._stop.set()
+
+    def _close_stall(self, lag: float):
+        stall, self._pending = self._pending, None
+        if stall is None:
+            # Bloqueo más corto que el periodo del vigilante: sin pila
+            stall = LoopStall(t_start=self._beat - lag)
+        stall.duration = lag
+        self.stall_count += 1
+        self.stalls.append(stall)
+        if self.on_stall is not None:
+            try:
+                self.on_stall(stall)
+            except Exception:
+                pass
+
+    def _watch(self):
+        period = min(self.interval, self.threshold) / 2
+        while not self._stop.wait(period):
+            beat = self._beat
+            if self._pending is not None or beat is None:
+                continue
+            if time.monotonic() - beat - self.interval > self.threshold:
+                self._pending = self._sample(beat)
+
+    def _sample(self, beat: float) -> LoopStall:
+        stall = LoopStall(t_start=beat)
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is not None:
+            stall.stack = traceback.format_stack(frame, limit=12)
+        try:
+            task = asyncio.current_task(self._loop)
+            stall.task = task.get_name() if task is not None else None
+        except Exception:
+            pass
+        return stall
+
+    def snapshot(self) -> dict:
+        return {
+            'stalls': self.stall_count,
+            'max_lag_ms': self.max_lag * 1000,
+            'last_lag_ms': self.last_lag * 1000,
+            'last_stall': self.stalls[-1].describe() if self.stalls else None,
+        }
+
+    @classmethod
+    def from_config(cls, config, on_stall=None):
+        """Construye el monitor desde las opciones loop_* de [performance]."""
+        section = 'performance'
+        return cls(
+            interval_ms=config.getfloat(section, 'loop_monitor_interval_ms', fallback=50),
+            threshold_ms=config.getfloat(section, 'loop_lag_threshold_ms', fallback=100),
+            on_stall=on_stall,
+        )
@@ -0,0 +1,136 @@
+"""
+Contabilidad de memoria por modelo y por utterance.
+
+- `track_load(nombre)`: atribuye a cada carga de modelo el delta de RSS (y de
+  memoria CUDA si torch ya está cargado) que produce.
+- `track_utterance(obj, nbytes)`: cuenta los bytes PCM retenidos por
+  utterances en vuelo hasta que el objeto se libera, con su pico.
+- `tracemalloc` bajo demanda para localizar asignaciones de Python.
+"""
+import os
+import sys
+import threading
+import tracemalloc
+import weakref
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:  # psutil es opcional
+    psutil = None
+
+MB = 1024 * 1024
+
+
+def process_rss_bytes() -> int | None:
+    """Memoria residente actual del proceso (None si no se puede medir)."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # ru_maxrss es el pico (KiB en Linux, bytes en macOS); mejor que nada
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        return None
+
+
+def _cuda_allocated() -> int | None:
+    torch = sys.modules.get('torch')
+    try:
+        if torch is not None and torch.cuda.is_available():
+            return torch.cuda.memory_allocated()
+    except Exception:
+        pass
+    return None
+
+
+class MemoryLedger:
+    """Registro de memoria del proceso (modelos, utterances en vuelo)."""
+
+    def __init__(self):
+        self.models = {}   # nombre -> {'rss': bytes, 'cuda': bytes | None}
+        self.inflight_bytes = 0
+        self.inflight_count = 0
+        self.inflight_peak_bytes = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track_load(self, name: str):
+        rss_before, cuda_before = process_rss_bytes(), _cuda_allocated()
+        try:
+            yield
+        finally:
+            rss_after, cuda_after = process_rss_bytes(), _cuda_allocated()
+            entry = {'rss': None, 'cuda': None}
+            if rss_before is not None and rss_after is not None:
+                entry['rss'] = rss_after - rss_before
+            if cuda_before is not None and cuda_after is not None:
+                entry['cuda'] = cuda_after - cuda_before
+            self.models[name] = entry
+
+    def track_utterance(self, obj, nbytes: int, count: bool = True):
+        """Cuenta `nbytes` mientras `obj` siga vivo (en colas o en proceso).
+
+        `count=False` suma bytes a un objeto ya contado (p.ej. al fusionar
+        otra utterance en él) sin contarlo dos veces.
+        """
+        with self._lock:
+            self.inflight_bytes += nbytes
+            self.inflight_count += int(count)
+            self.inflight_peak_bytes = max(self.inflight_peak_bytes, self.inflight_bytes)
+        weakref.finalize(obj, self._release, nbytes, count)
+
+    def _release(self, nbytes: int, count: bool = True):
+        with self._lock:
+            self.inflight_bytes -= nbytes
+            self.inflight_count -= int(count)
+
+    def snapshot(self) -> dict:
+        return {
+            'rss_bytes': process_rss_bytes(),
+            'models': {k: dict(v) for k, v in self.models.items()},
+            'inflight_bytes': self.inflight_bytes,
+            'inflight_count': self.inflight_count,
+            'inflight_peak_bytes': self.inflight_peak_bytes,
+        }
+
+    def report(self) -> str:
+        snap = self.snapshot()
+        lines = []
+        if snap['rss_bytes'] is not None:
+            lines.append(f"RSS total: {snap['rss_bytes'] / MB:.0f} MB")
+        for name, entry in snap['models'].items():
+            rss = f"{entry['rss'] / MB:+.0f} MB" if entry['rss'] is not None else '?'
+            cuda = f", CUDA {entry['cuda'] / MB:+.0f} MB" if entry['cuda'] else ''
+            lines.append(f"  {name:<28} RSS {rss}{cuda}")
+        lines.append(f"Utterances en vuelo: {snap['inflight_count']} "
+                     f"({snap['inflight_bytes'] / MB:.2f} MB, "
+                     f"pico {snap['inflight_peak_bytes'] / MB:.2f} MB)")
+        return "\n".join(lines)
+
+
+# Registro global del proceso
+memory_ledger = MemoryLedger()
+
+
+def track_load(name: str):
+    return memory_ledger.track_load(name)
+
+
+def start_tracemalloc(nframes: int = 1):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(nframes)
+
+
+def tracemalloc_top(limit: int = 10) -> list[str]:
+    """Líneas con más memoria de Python asignada (vacío si no está activo)."""
+    if not tracemalloc.is_tracing():
+        return []
+    stats = tracemalloc.take_snapshot().statistics('lineno')
+    return [str(stat) for stat in stats[:limit]]
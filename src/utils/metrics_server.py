@@ -0,0 +1,169 @@
+"""
+Endpoint HTTP de telemetría en formato OpenMetrics (compatible con Prometheus).
+
+El servidor corre en un hilo daemon y sólo lee contadores ya existentes en el
+momento del scrape, así que no añade trabajo al pipeline. Cada métrica se
+registra con una función que devuelve su valor actual (o un dict
+`{valor_de_etiqueta: valor}` para familias con una etiqueta).
+
+    server = MetricsServer(port=9464)
+    server.add_gauge('queue_depth', 'Elementos en cola', lambda: {...}, label='queue')
+    server.start()
+"""
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .memory import process_rss_bytes
+from .timing import CPU_RTF_PREFIX, UNITLESS_METRICS, latency_stats
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+PREFIX = 'dsrt_'
+QUANTILES = (('0.5', 'p50'), ('0.9', 'p90'), ('0.99', 'p99'))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _fmt(value) -> str:
+    value = float(value)
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(value)
+
+
+class MetricsServer:
+    """Servidor OpenMetrics en segundo plano con métricas registradas por callback."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9464, stats=None):
+        self.host = host
+        self.port = port
+        self.stats = stats if stats is not None else latency_stats
+        self._families = []  # (nombre, tipo, ayuda, función, etiqueta)
+        self._httpd = None
+        self._thread = None
+        self.scrapes = 0
+
+        self.add_counter('process_cpu_seconds', 'Tiempo de CPU del proceso',
+                         time.process_time)
+        self.add_gauge('process_resident_memory_bytes', 'Memoria residente del proceso',
+                       process_rss_bytes)
+
+    def add_gauge(self, name: str, help_text: str, fn, label: str | None = None):
+        self._families.append((PREFIX + name, 'gauge', help_text, fn, label))
+
+    def add_counter(self, name: str, help_text: str, fn, label: str | None = None):
+        self._families.append((PREFIX + name, 'counter', help_text, fn, label))
+
+    def render(self) -> str:
+        lines = []
+        for name, kind, help_text, fn, label in self._families:
+            try:
+                value = fn()
+            except Exception:
+                continue
+            if value is None:
+                continue
+            lines.append(f'# TYPE {name} {kind}')
+            lines.append(f'# HELP {name} {help_text}')
+            suffix = '_total' if kind == 'counter' else ''
+            if label is None:
+                lines.append(f'{name}{suffix} {_fmt(value)}')
+            else:
+                for key, v in value.items():
+                    if v is not None:
+                        lines.append(f'{name}{suffix}{{{label}="{_escape(key)}"}} {_fmt(v)}')
+        lines.extend(self._render_latency())
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def _render_latency(self):
+        """Distribuciones de `LatencyStats` como familias de tipo summary."""
+        families = {
+            'stage_latency_seconds': ('stage', 'Duración por etapa'),
+            'queue_wait_seconds': ('queue', 'Espera en cola por etapa'),
+            'rtf': (None, 'Real-time factor por utterance'),
+            'loop_lag_seconds': (None, 'Retardo de planificación del event loop'),
+            'cpu_seconds_per_audio_second': ('stage', 'CPU-segundos por segundo de audio'),
+        }
+        samples = {name: [] for name in families}
+        for metric, snap in sorted(self.stats.snapshot().items()):
+            if not snap.get('count'):
+                continue
+            if metric.startswith(CPU_RTF_PREFIX):
+                family = 'cpu_seconds_per_audio_second'
+                labels = f'stage="{_escape(metric[len(CPU_RTF_PREFIX):])}"'
+            elif metric.startswith('queue:'):
+                family, labels = 'queue_wait_seconds', f'queue="{_escape(metric[6:])}"'
+            elif metric in UNITLESS_METRICS:
+                family, labels = metric, ''
+            elif metric == 'loop_lag':
+                family, labels = 'loop_lag_seconds', ''
+            else:
+                family, labels = 'stage_latency_seconds', f'stage="{_escape(metric)}"'
+            samples.setdefault(family, []).append((labels, snap))
+
+        lines = []
+        for family, entries in samples.items():
+            if not entries:
+                continue
+            name = PREFIX + family
+            help_text = families.get(family, (None, family))[1]
+            lines.append(f'# TYPE {name} summary')
+            lines.append(f'# HELP {name} {help_text}')
+            for labels, snap in entries:
+                sep = ',' if labels else ''
+                for q, key in QUANTILES:
+                    lines.append(f'{name}{{{labels}{sep}quantile="{q}"}} {_fmt(snap[key])}')
+                braces = f'{{{labels}}}' if labels else ''
+                lines.append(f'{name}_count{braces} {snap["count"]}')
+                lines.append(f'{name}_sum{braces} {_fmt(snap["mean"] * snap["count"])}')
+        return lines
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = server.render().encode('utf-8')
+                server.scrapes += 1
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # sin ruido en la consola por cada scrape
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        name='metrics-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        if self._httpd is None:
+            return
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join(timeout=2.0)
+        self._httpd = None
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, config, port: int | None = None):
+        """Construye el servidor desde la sección [telemetry]."""
+        section = 'telemetry'
+        return cls(
+            host=config.get(section, 'metrics_host', fallback='127.0.0.1'),
+            port=port if port is not None else config.getint(section, 'metrics_port',
+                                                             fallback=9464),
+        )
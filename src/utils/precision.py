@@ -0,0 +1,183 @@
+"""
+Política de precisión numérica de los backends en CPU/GPU.
+
+- `cpu_capabilities()`: instrucciones relevantes de la CPU (AVX2, AVX-512,
+  VNNI, bf16, AMX) a partir de `numpy` y, en Linux, de `/proc/cpuinfo`.
+- `supported_precisions(backend, device)`: precisiones que cada backend puede
+  usar aquí (`ctranslate2.get_supported_compute_types` para Whisper, motores de
+  cuantización de torch para NLLB, modelo `.int8.onnx` para Piper).
+- `PrecisionPolicy.resolve(backend, device, pedida)`: precisión con la que se
+  carga cada modelo. Usa, por orden, la elegida por el autoajuste
+  (`calibration.autotune_precision`), la pedida si está soportada y un valor
+  por defecto seguro para el dispositivo.
+
+`precision_policy` es la política global del proceso; los backends la
+consultan al cargar, así la elección se aplica igual en todos los perfiles.
+"""
+from pathlib import Path
+
+# Orden de preferencia (más rápida primero) de los compute types de ctranslate2
+WHISPER_PRECISIONS = ('int8', 'int8_float32', 'int16', 'int8_bfloat16', 'bfloat16',
+                      'int8_float16', 'float16', 'float32')
+
+
+def _numpy_cpu_features() -> dict:
+    try:
+        from numpy._core._multiarray_umath import __cpu_features__
+    except ImportError:
+        try:
+            from numpy.core._multiarray_umath import __cpu_features__
+        except ImportError:
+            return {}
+    return dict(__cpu_features__)
+
+
+def _cpuinfo_flags() -> set:
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('flags'):
+                    return set(line.split(':', 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+
+def cpu_capabilities(features: dict | None = None, flags: set | None = None) -> set:
+    """Capacidades de la CPU relevantes para elegir precisión."""
+    features = _numpy_cpu_features() if features is None else features
+    flags = _cpuinfo_flags() if flags is None else flags
+    caps = set()
+    if features.get('AVX2'):
+        caps.add('avx2')
+    if features.get('AVX512F'):
+        caps.add('avx512')
+    if features.get('AVX512VNNI') or 'avx512_vnni' in flags or 'avx_vnni' in flags:
+        caps.add('vnni')
+    if features.get('AVX512BF16') or 'avx512_bf16' in flags:
+        caps.add('bf16')
+    if 'amx_bf16' in flags or 'amx_int8' in flags:
+        caps.update({'amx', 'bf16'})
+    if features.get('NEON') or features.get('ASIMD'):
+        caps.add('neon')
+    if features.get('ASIMDDP'):
+        caps.add('vnni')  # producto escalar int8 (dotprod) en ARM
+    return caps
+
+
+def int8_model_path(model_path) -> Path:
+    """Variante cuantizada de un modelo ONNX (`voz.onnx` → `voz.int8.onnx`)."""
+    path = Path(model_path)
+    return path.with_name(f"{path.stem}.int8{path.suffix}")
+
+
+def supported_precisions(backend: str, device: str = 'cpu', model_path=None,
+                         caps: set | None = None) -> list[str]:
+    """Precisiones utilizables por `backend` en `device`, más rápidas primero."""
+    cuda = str(device).startswith('cuda')
+    if backend == 'whisper':
+        try:
+            import ctranslate2
+            types = set(ctranslate2.get_supported_compute_types('cuda' if cuda else 'cpu'))
+        except Exception:
+            types = {'float16', 'int8_float16', 'float32'} if cuda else {'int8', 'float32'}
+        return [t for t in WHISPER_PRECISIONS if t in types]
+    if backend == 'nllb':
+        if cuda:
+            return ['float16', 'float32']
+        caps = cpu_capabilities() if caps is None else caps
+        out = []
+        try:
+            import torch
+            if set(torch.backends.quantized.supported_engines) - {'none'}:
+                out.append('int8')
+        except Exception:
+            pass
+        if 'bf16' in caps:
+            out.append('bfloat16')
+        return out + ['float32']
+    if backend == 'piper':
+        out = []
+        if model_path is not None and int8_model_path(model_path).exists():
+            out.append('int8')
+        return out + ['float32']
+    return []
+
+
+def default_precision(backend: str, device: str = 'cpu', caps: set | None = None) -> str:
+    """Precisión segura sin autoajuste (NLLB nunca en fp16 sobre CPU)."""
+    if str(device).startswith('cuda'):
+        return 'float16' if backend in ('whisper', 'nllb') else 'float32'
+    caps = cpu_capabilities() if caps is None else caps
+    if backend == 'whisper' and caps & {'avx2', 'avx512', 'vnni', 'neon'}:
+        return 'int8'
+    return 'float32'
+
+
+class PrecisionPolicy:
+    """Decide la precisión de carga de cada backend (`<backend>:<cpu|cuda>`)."""
+
+    def __init__(self, choices: dict | None = None):
+        self.choices = dict(choices or {})
+
+    @staticmethod
+    def key(backend: str, device: str) -> str:
+        return f"{backend}:{'cuda' if str(device).startswith('cuda') else 'cpu'}"
+
+    def update(self, choices: dict):
+        self.choices.update(choices)
+
+    def resolve(self, backend: str, device: str = 'cpu', requested: str | None = None,
+                model_path=None) -> str:
+        supported = supported_precisions(backend, device, model_path=model_path)
+        tuned = self.choices.get(self.key(backend, device))
+        if tuned and tuned in supported:
+            return tuned
+        if requested and requested != 'auto' and requested in supported:
+            return requested
+        fallback = default_precision(backend, device)
+        if fallback in supported or not supported:
+            return fallback
+        return supported[-1]
+
+
+# Política global del proceso
+precision_policy = PrecisionPolicy()
+
+
+def resolve_precision(backend: str, device: str = 'cpu', requested: str | None = None,
+                      model_path=None) -> str:
+    return precision_policy.resolve(backend, device, requested, model_path=model_path)
+
+
+def _edit_distance(a: list, b: list) -> int:
+    prev = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        cur = [i]
+        for j, y in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (x != y)))
+        prev = cur
+    return prev[-1]
+
+
+def text_agreement(reference: str, candidate: str) -> float:
+    """1 - WER del candidato frente a la salida de referencia (0..1)."""
+    ref, cand = reference.lower().split(), candidate.lower().split()
+    if not ref:
+        return 1.0 if not cand else 0.0
+    return max(0.0, 1.0 - _edit_distance(ref, cand) / len(ref))
+
+
+def audio_agreement(reference: bytes, candidate: bytes) -> float:
+    """Correlación normalizada entre dos PCM16 (1 = idénticos)."""
+    import numpy as np
+    a = np.frombuffer(reference, dtype=np.int16).astype(np.float64)
+    b = np.frombuffer(candidate, dtype=np.int16).astype(np.float64)
+    if not len(a) or not len(b):
+        return 1.0 if len(a) == len(b) else 0.0
+    if abs(len(a) - len(b)) > 0.1 * max(len(a), len(b)):
+        return 0.0  # duración distinta: otra prosodia
+    n = min(len(a), len(b))
+    a, b = a[:n], b[:n]
+    denom = np.sqrt(np.dot(a, a) * np.dot(b, b))
+    return float(np.dot(a, b) / denom) if denom else 1.0
@@ -0,0 +1,199 @@
+"""
+Profiler por muestreo para diagnosticar picos de latencia en producción.
+
+Un hilo en segundo plano lee las pilas de todos los hilos
+(`sys._current_frames()`) cada `interval_ms` y las agrega en formato
+"collapsed stacks" (una línea `etapa;frame;frame… N` por pila), compatible con
+flamegraph.pl, speedscope o Perfetto.
+
+Cada muestra se etiqueta con la etapa del pipeline:
+
+- hilo del event loop: nombre de la tarea asyncio (`capture`, `vad`, `asr`,
+  `mt`, `tts`, …) o `ui` si no hay tarea en curso (callbacks de Qt/qasync);
+  `idle` si el loop está esperando en el selector;
+- resto de hilos: por el módulo del pipeline que aparece en la pila
+  (executors de ASR/MT/TTS, callback de captura) o, si no, por nombre de hilo.
+
+Sólo usa la biblioteca estándar y no hace nada hasta que se arranca, así que
+puede quedar disponible en builds de release.
+"""
+import asyncio
+import collections
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Módulos del repo que identifican la etapa de un hilo ajeno al event loop
+STAGE_MODULES = (
+    ('pipeline/asr.py', 'asr'),
+    ('pipeline/translate.py', 'mt'),
+    ('pipeline/tts.py', 'tts'),
+    ('audio/capture.py', 'capture'),
+    ('audio/sink.py', 'tts'),
+    ('/ui/', 'ui'),
+)
+# Marcos en los que un hilo está esperando trabajo (no consume CPU)
+IDLE_MODULES = ('selectors.py', 'threading.py', 'queue.py', 'selector_events.py')
+
+
+def _frame_label(code) -> str:
+    # Sin espacios ni ';': son separadores del formato collapsed
+    label = f"{Path(code.co_filename).stem}:{code.co_name}"
+    return label.replace(' ', '_').replace(';', '_')
+
+
+class SamplingProfiler:
+    """Muestreador de pilas de bajo coste con etiquetado por etapa."""
+
+    def __init__(self, interval_ms: float = 10, max_depth: int = 64,
+                 loop=None, loop_thread_id: int | None = None):
+        self.interval = interval_ms / 1000
+        self.max_depth = max_depth
+        self.loop = loop
+        self.loop_thread_id = loop_thread_id
+        self.samples = collections.Counter()
+        self.total_samples = 0
+        self.overhead_s = 0.0
+        self.started_at = None
+        self.stopped_at = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._timer = None
+        self._on_stop = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, duration_s: float | None = None, on_stop=None):
+        """Arranca el muestreo; si se da `duration_s`, para solo y llama a
+        `on_stop(profiler)`. Debe llamarse desde el hilo del event loop (o
+        pasar `loop`/`loop_thread_id`)."""
+        if self.running:
+            return self
+        if self.loop is None:
+            try:
+                self.loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.loop = None
+        if self.loop_thread_id is None:
+            self.loop_thread_id = threading.get_ident()
+        self._on_stop = on_stop
+        self._stop.clear()
+        self.started_at = time.monotonic()
+        self.stopped_at = None
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler',
+                                        daemon=True)
+        self._thread.start()
+        if duration_s:
+            self._timer = threading.Timer(duration_s, self.stop)
+            self._timer.daemon = True
+            self._timer.start()
+        return self
+
+    def stop(self):
+        """Detiene el muestreo (idempotente) y devuelve las pilas agregadas."""
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return self.samples
+        self._stop.set()
+        self.stopped_at = time.monotonic()
+        if thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        on_stop, self._on_stop = self._on_stop, None
+        if on_stop is not None:
+            try:
+                on_stop(self)
+            except Exception as e:
+                print(f"[PROFILER] Error al finalizar: {e}")
+        return self.samples
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            start = time.perf_counter()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == own:
+                    continue
+                stack = self._stack(frame)
+                if not stack:
+                    continue
+                stage = self._stage(tid, names.get(tid, str(tid)), frame, stack)
+                if stage is None:
+                    continue
+                self.samples[';'.join([stage] + stack)] += 1
+                self.total_samples += 1
+            self.overhead_s += time.perf_counter() - start
+
+    def _stack(self, frame) -> list[str]:
+        codes = []
+        while frame is not None and len(codes) < self.max_depth:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        codes.reverse()  # raíz primero, como espera el formato collapsed
+        return [_frame_label(c) for c in codes]
+
+    def _stage(self, tid: int, thread_name: str, frame, stack: list[str]) -> str | None:
+        innermost = stack[-1].split(':')[0] + '.py'
+        if tid == self.loop_thread_id:
+            task = None
+            if self.loop is not None:
+                try:
+                    task = asyncio.current_task(self.loop)
+                except Exception:
+                    task = None
+            if task is not None:
+                return task.get_name()
+            return 'idle' if innermost in IDLE_MODULES else 'ui'
+        if innermost in IDLE_MODULES:
+            return None  # hilo esperando trabajo: no aporta al flamegraph
+        return self._module_stage(frame) or thread_name
+
+    def _module_stage(self, frame) -> str | None:
+        while frame is not None:
+            path = frame.f_code.co_filename.replace('\\', '/')
+            for suffix, stage in STAGE_MODULES:
+                if suffix in path:
+                    return stage
+            frame = frame.f_back
+        return None
+
+    def stage_totals(self) -> dict:
+        totals = collections.Counter()
+        for stack, n in self.samples.items():
+            totals[stack.split(';', 1)[0]] += n
+        return dict(totals.most_common())
+
+    def write_collapsed(self, path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, n in self.samples.most_common():
+                f.write(f"{stack} {n}\n")
+        return path
+
+    def summary(self) -> str:
+        end = self.stopped_at or time.monotonic()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        total = sum(self.samples.values()) or 1
+        stages = ", ".join(f"{s}={n * 100 / total:.0f}%"
+                           for s, n in self.stage_totals().items())
+        overhead = self.overhead_s / elapsed * 100 if elapsed else 0.0
+        return (f"{self.total_samples} muestras en {elapsed:.1f} s "
+                f"(coste {overhead:.1f}% de un núcleo): {stages}")
+
+    @classmethod
+    def from_config(cls, config):
+        """Construye el profiler desde las opciones profile_* de [debug]."""
+        return cls(interval_ms=config.getfloat('debug', 'profile_interval_ms', fallback=10))
+
+
+def default_profile_path(directory='profiles') -> Path:
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    return Path(directory) / f"profile-{stamp}.collapsed"
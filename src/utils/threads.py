@@ -0,0 +1,212 @@
+"""
+Presupuesto de hilos de CPU repartido entre las etapas del pipeline.
+
+Cada backend dimensiona su propio pool (ctranslate2 en Whisper, hilos
+intra-op de torch en NLLB, onnxruntime en Piper) y, por defecto, todos
+asumen la máquina entera: en una CPU de 8 núcleos se piden más de 20 hilos y
+todas las etapas se ralentizan. `ThreadBudget` reparte `[performance]
+max_workers` (0 = todos los núcleos disponibles) entre `asr`, `mt` y `tts`
+según `thread_weights`, de modo que la suma nunca supera los núcleos:
+
+- `threads(etapa)`: hilos que el backend debe configurar al cargar.
+- `pinned(etapa)`: con `pin_threads`, fija el hilo actual a los núcleos de la
+  etapa (sólo Linux); los pools que se crean dentro heredan la afinidad.
+- `executor(etapa)`: executor de un hilo por etapa para `run_blocking`, así
+  cada etapa tiene a lo sumo una llamada en curso.
+
+`thread_budget` es el reparto global del proceso; mientras no se configura,
+`threads()` devuelve None y los backends conservan su valor por defecto.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+STAGES = ('asr', 'mt', 'tts')
+DEFAULT_WEIGHTS = {'asr': 2, 'mt': 2, 'tts': 1}
+
+
+def available_cpus() -> list[int]:
+    """Núcleos que el proceso puede usar (respeta la afinidad heredada)."""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return list(range(os.cpu_count() or 1))
+
+
+def affinity_supported() -> bool:
+    return hasattr(os, 'sched_setaffinity')
+
+
+def set_thread_affinity(cpus) -> bool:
+    """Fija el hilo actual a `cpus` (en Linux la afinidad es por hilo)."""
+    if not affinity_supported() or not cpus:
+        return False
+    try:
+        os.sched_setaffinity(0, set(cpus))
+        return True
+    except OSError:
+        return False
+
+
+def parse_weights(text: str) -> dict:
+    """`"asr:2, mt:2, tts:1"` → {'asr': 2.0, 'mt': 2.0, 'tts': 1.0}."""
+    weights = {}
+    for item in text.split(','):
+        if ':' not in item:
+            continue
+        stage, value = item.split(':', 1)
+        weights[stage.strip()] = float(value)
+    return weights
+
+
+def split_threads(total: int, weights: dict) -> dict:
+    """Reparte `total` hilos en proporción a `weights` (mínimo 1 por etapa).
+
+    Usa el método del mayor resto, así la suma es exactamente `total` siempre
+    que haya al menos un hilo por etapa.
+    """
+    stages = [s for s, w in weights.items() if w > 0]
+    if not stages:
+        return {}
+    total = max(total, len(stages))
+    spare = total - len(stages)
+    weight_sum = sum(weights[s] for s in stages)
+    shares = {s: spare * weights[s] / weight_sum for s in stages}
+    counts = {s: 1 + int(shares[s]) for s in stages}
+    leftover = total - sum(counts.values())
+    for s in sorted(stages, key=lambda s: shares[s] - int(shares[s]), reverse=True)[:leftover]:
+        counts[s] += 1
+    return counts
+
+
+@dataclass(frozen=True)
+class StageAllocation:
+    stage: str
+    threads: int
+    cpus: tuple | None = None  # None = sin afinidad
+
+
+class ThreadBudget:
+    """Reparto de hilos (y afinidad opcional) por etapa."""
+
+    def __init__(self):
+        self.configured = False
+        self.cpus = available_cpus()
+        self.budget = len(self.cpus)
+        self.pin = False
+        self.allocations = {}
+        self._executors = {}
+        self._lock = threading.Lock()
+
+    def configure(self, max_workers: int = 0, weights: dict | None = None,
+                  pin: bool = False, cpus=None) -> 'ThreadBudget':
+        self.cpus = list(cpus) if cpus is not None else available_cpus()
+        # Nunca más hilos que núcleos: la contención queda acotada
+        self.budget = min(max_workers, len(self.cpus)) if max_workers > 0 else len(self.cpus)
+        self.pin = pin and affinity_supported()
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        counts = split_threads(self.budget, {s: weights.get(s, 0) for s in STAGES})
+        self.allocations = {}
+        offset = 0
+        for stage in STAGES:
+            if stage not in counts:
+                continue
+            n = counts[stage]
+            cpus_for_stage = None
+            if self.pin:
+                # Bloques contiguos y disjuntos (se solapan sólo si faltan núcleos)
+                cpus_for_stage = tuple(self.cpus[(offset + i) % len(self.cpus)]
+                                       for i in range(n))
+            self.allocations[stage] = StageAllocation(stage, n, cpus_for_stage)
+            offset += n
+        self.configured = True
+        return self
+
+    def load_config(self, config) -> 'ThreadBudget':
+        """Configura el reparto desde [performance]."""
+        section = 'performance'
+        return self.configure(
+            max_workers=config.getint(section, 'max_workers', fallback=0),
+            weights=parse_weights(config.get(section, 'thread_weights', fallback='')),
+            pin=config.getboolean(section, 'pin_threads', fallback=False),
+        )
+
+    @classmethod
+    def from_config(cls, config) -> 'ThreadBudget':
+        return cls().load_config(config)
+
+    def threads(self, stage: str) -> int | None:
+        """Hilos asignados a `stage` (None si no hay reparto configurado)."""
+        alloc = self.allocations.get(stage) if self.configured else None
+        return alloc.threads if alloc else None
+
+    def stage_cpus(self, stage: str) -> tuple | None:
+        alloc = self.allocations.get(stage)
+        return alloc.cpus if alloc else None
+
+    @property
+    def total_threads(self) -> int:
+        return sum(a.threads for a in self.allocations.values())
+
+    @contextmanager
+    def pinned(self, stage: str):
+        """Fija el hilo actual a los núcleos de `stage` y restaura al salir."""
+        cpus = self.stage_cpus(stage)
+        if not cpus:
+            yield
+            return
+        previous = available_cpus()
+        set_thread_affinity(cpus)
+        try:
+            yield
+        finally:
+            set_thread_affinity(previous)
+
+    def executor(self, stage: str) -> ThreadPoolExecutor:
+        """Executor de un hilo para `stage`, fijado a sus núcleos si procede."""
+        with self._lock:
+            executor = self._executors.get(stage)
+            if executor is None:
+                cpus = self.stage_cpus(stage)
+                executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix=f'pipeline-{stage}',
+                    initializer=set_thread_affinity if cpus else None,
+                    initargs=(cpus,) if cpus else ())
+                self._executors[stage] = executor
+            return executor
+
+    def shutdown(self, cancel_futures: bool = True):
+        """Cierra los executors esperando a sus hilos."""
+        with self._lock:
+            executors, self._executors = list(self._executors.values()), {}
+        for executor in executors:
+            executor.shutdown(wait=True, cancel_futures=cancel_futures)
+
+    def report(self, devices: dict | None = None) -> str:
+        """Tabla del reparto; `devices` marca las etapas que corren en GPU."""
+        devices = devices or {}
+        pin = 'sí' if self.pin else ('no' if affinity_supported() else 'no soportada')
+        lines = [f"Hilos: {self.total_threads} de {len(self.cpus)} núcleos "
+                 f"(presupuesto {self.budget}, afinidad: {pin})"]
+        for stage, alloc in self.allocations.items():
+            cpus = _format_cpus(alloc.cpus) if alloc.cpus else '-'
+            gpu = '  (GPU: 1 hilo de host)' if str(devices.get(stage, '')).startswith('cuda') else ''
+            lines.append(f"  {stage:<4} {alloc.threads:>3} hilos  CPUs {cpus}{gpu}")
+        return "\n".join(lines)
+
+
+def _format_cpus(cpus) -> str:
+    """(0, 1, 2, 5) → '0-2,5'."""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ','.join(str(a) if a == b else f'{a}-{b}' for a, b in ranges)
+
+
+# Reparto global del proceso
+thread_budget = ThreadBudget()
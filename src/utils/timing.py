@@ -1,21 +1,262 @@
+import asyncio
+import contextvars
+import math
+import threading
 import time
 from contextlib import contextmanager
 
+import numpy as np
+
+
+class LogHistogram:
+    """Histograma de memoria fija con cubos logarítmicos (estilo HDR).
+
+    Cada cubo cubre un rango relativo de `precision` (1% por defecto), de modo
+    que los percentiles tienen error relativo acotado y la memoria no depende
+    del número de muestras. Valores fuera de `[min_value, max_value]` caen en
+    el primer/último cubo; `min`/`max`/`mean` se llevan de forma exacta.
+    """
+
+    def __init__(self, min_value: float = 1e-5, max_value: float = 1e4,
+                 precision: float = 0.01):
+        self.min_value = min_value
+        self._log_base = math.log1p(precision)
+        n = int(math.ceil(math.log(max_value / min_value) / self._log_base)) + 1
+        self._counts = np.zeros(n + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        i = int(math.log(value / self.min_value) / self._log_base) + 1
+        return min(i, len(self._counts) - 1)
+
+    def _value(self, index: int) -> float:
+        """Punto medio (geométrico) del cubo `index`."""
+        if index == 0:
+            return self.min_value
+        return self.min_value * math.exp((index - 0.5) * self._log_base)
+
+    def record(self, value: float):
+        self._counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, int(math.ceil(q / 100 * self.count)))
+        index = int(np.searchsorted(np.cumsum(self._counts), rank))
+        return min(max(self._value(index), self.min), self.max)
+
+    def snapshot(self) -> dict:
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean': self.total / self.count,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+
+class LatencyStats:
+    """Agregador de distribuciones por nombre para toda la sesión.
+
+    Las duraciones de `StageTimer` se registran aquí automáticamente; el
+    pipeline añade además esperas en colas (`queue:<cola>`), RTF y latencia
+    boca-oído. Seguro entre hilos (los executors también registran).
+    """
+
+    def __init__(self, **histogram_kwargs):
+        self._histogram_kwargs = histogram_kwargs
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, value: float | None):
+        if value is None:
+            return
+        with self._lock:
+            hist = self._histograms.get(name)
+            if hist is None:
+                hist = self._histograms[name] = LogHistogram(**self._histogram_kwargs)
+            hist.record(value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {name: h.snapshot() for name, h in self._histograms.items()}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def report(self) -> str:
+        """Tabla de texto: duraciones en ms y magnitudes sin unidad (RTF) tal cual."""
+        lines = []
+        for name, s in sorted(self.snapshot().items()):
+            scale, unit = (1.0, '') if is_unitless(name) else (1000.0, ' ms')
+            lines.append(
+                f"{name:<22} n={s['count']:<6d} mean={s['mean']*scale:8.1f} "
+                f"p50={s['p50']*scale:8.1f} p90={s['p90']*scale:8.1f} "
+                f"p99={s['p99']*scale:8.1f} max={s['max']*scale:8.1f}{unit}"
+            )
+        return "\n".join(lines)
+
+
+# Métricas sin unidad de tiempo (no se escalan a ms en los informes)
+UNITLESS_METRICS = {'rtf'}
+# Prefijo de las métricas de CPU-segundos por segundo de audio de cada etapa
+CPU_RTF_PREFIX = 'cpu_rtf:'
+
+
+def is_unitless(name: str) -> bool:
+    return name in UNITLESS_METRICS or name.startswith(CPU_RTF_PREFIX)
+
+
+def best_of(fn, repeats: int) -> float:
+    """Menor tiempo de `repeats` ejecuciones de `fn` (tras una de calentamiento)."""
+    fn()
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# Agregador global del proceso
+latency_stats = LatencyStats()
+
+# Uso de CPU de las llamadas bloqueantes hechas dentro de `StageTimer.stage()`.
+# La variable vive en el contexto de la tarea asyncio que abre la etapa.
+_blocking_usage: contextvars.ContextVar[list | None] = contextvars.ContextVar(
+    'blocking_usage', default=None)
+# Executor del pipeline para `run_blocking` (None = executor por defecto del loop)
+_blocking_executor = contextvars.ContextVar('blocking_executor', default=None)
+
+
+def use_executor(executor):
+    """Hace que `run_blocking` use `executor` en las tareas creadas desde aquí."""
+    return _blocking_executor.set(executor)
+
+
+async def run_blocking(fn, *args, threads: int | None = None):
+    """Ejecuta `fn(*args)` en el executor del pipeline midiendo su CPU.
+
+    El hilo hereda el contexto de la tarea (token de cancelación, executor).
+    Registra el tiempo de CPU del hilo del executor (`time.thread_time()`),
+    su identificador y `threads` (hilos internos que usa el backend:
+    torch/ctranslate2/onnxruntime) en la etapa de `StageTimer` abierta en la
+    tarea que llama.
+    """
+    usage = {}
+
+    def call():
+        usage['thread_id'] = threading.get_ident()
+        start = time.thread_time()
+        try:
+            return fn(*args)
+        finally:
+            usage['cpu'] = time.thread_time() - start
+
+    loop = asyncio.get_running_loop()
+    try:
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(_blocking_executor.get(), ctx.run, call)
+    finally:
+        sink = _blocking_usage.get()
+        if sink is not None and 'cpu' in usage:
+            usage['threads'] = threads
+            sink.append(usage)
+
+
+@contextmanager
+def cpu_section(threads: int | None = None):
+    """Mide la CPU de un tramo síncrono (sin `await`) en el hilo actual.
+
+    La carga a la etapa de `StageTimer` abierta en la tarea que lo ejecuta,
+    igual que `run_blocking`. Medir sólo el tramo evita atribuir a la etapa
+    la CPU de otras tareas del loop mientras ella está suspendida.
+    """
+    usage = _blocking_usage.get()
+    if usage is None:
+        yield
+        return
+    start = time.thread_time()
+    try:
+        yield
+    finally:
+        usage.append({'thread_id': threading.get_ident(), 'threads': threads,
+                      'cpu': time.thread_time() - start})
+
 
 class StageTimer:
-    def __init__(self):
+    def __init__(self, stats: LatencyStats | None = None):
         self._stamps = {}
+        # CPU por etapa y recursos usados (hilo del executor, hilos del backend)
+        self._cpu = {}
+        self._resources = {}
         # Inicio global para calcular el tiempo total del pipeline
         self._start = time.perf_counter()
+        self._stats = stats if stats is not None else latency_stats
 
     @contextmanager
-    def stage(self, name: str):
+    def stage(self, name: str, threads: int | None = None):
+        """Mide una etapa. `threads`: hilos internos del backend si la etapa
+        no usa `run_blocking` (que ya los informa).
+
+        La CPU de la etapa es la de sus llamadas a `run_blocking` y sus tramos
+        `cpu_section`; el resto del tiempo de la tarea (esperas, `await`) no
+        cuenta, porque el hilo del loop lo comparten otras tareas.
+        """
+        usage = []
+        token = _blocking_usage.set(usage)
         start = time.perf_counter()
         try:
             yield
         finally:
             end = time.perf_counter()
+            _blocking_usage.reset(token)
+            cpu = sum(u['cpu'] for u in usage)
+            if usage:
+                last = usage[-1]
+                self._resources[name] = {'thread_id': last['thread_id'],
+                                         'threads': last['threads'] or threads}
+            else:
+                self._resources.setdefault(name, {'thread_id': threading.get_ident(),
+                                                  'threads': threads})
             self._stamps[name] = self._stamps.get(name, 0.0) + (end - start)
+            self._cpu[name] = self._cpu.get(name, 0.0) + cpu
+            self._stats.record(name, end - start)
+
+    def durations(self) -> dict:
+        """Copia de los tiempos acumulados por etapa (segundos)."""
+        return dict(self._stamps)
+
+    def cpu_report(self, audio_duration: float | None = None) -> dict:
+        """Pared, CPU y recursos por etapa; con `audio_duration` añade los
+        CPU-segundos por segundo de audio (`cpu_rtf`) y los registra en el
+        agregador."""
+        report = {}
+        for name, cpu in self._cpu.items():
+            if name == 'total':
+                continue
+            wall = self._stamps.get(name, 0.0)
+            entry = {'wall': wall, 'cpu': cpu,
+                     'cpu_util': cpu / wall if wall else 0.0}
+            entry.update(self._resources.get(name, {}))
+            if audio_duration:
+                entry['cpu_rtf'] = cpu / audio_duration
+                self._stats.record(CPU_RTF_PREFIX + name, entry['cpu_rtf'])
+            report[name] = entry
+        return report
 
     def summary(self, audio_duration: float | None = None) -> str:
         # If a 'total' stage was recorded explicitly (for example via
@@ -35,8 +276,57 @@ class StageTimer:
             parts.append(f"RTF={rtf:.2f}")
         # Clear stamps after summarizing
         self._stamps.clear()
+        self._cpu.clear()
+        self._resources.clear()
         return " | ".join(parts)
 
     def stop(self):
         """Registra el tiempo total desde la creación del temporizador."""
         self._stamps["total"] = time.perf_counter() - self._start
+
+
+class LatencyTrace:
+    """Traza monotónica (`time.monotonic()`) de una utterance de extremo a extremo.
+
+    El origen es el instante ADC del primer frame con voz y las marcas se
+    añaden al entrar/salir de cada cola y al terminar cada etapa. La marca
+    `dac` es el instante estimado en que suena la primera muestra sintetizada.
+    """
+
+    def __init__(self, origin: float | None = None):
+        self.origin = origin
+        self.marks = {}
+
+    def mark(self, name: str, t: float | None = None) -> float:
+        t = time.monotonic() if t is None else t
+        self.marks[name] = t
+        return t
+
+    def between(self, start: str, end: str) -> float | None:
+        """Segundos entre dos marcas (None si falta alguna)."""
+        if start not in self.marks or end not in self.marks:
+            return None
+        return self.marks[end] - self.marks[start]
+
+    def since_origin(self, name: str) -> float | None:
+        if self.origin is None or name not in self.marks:
+            return None
+        return self.marks[name] - self.origin
+
+    def queue_waits(self) -> dict:
+        """Espera en cada cola a partir de las marcas `<cola>_in`/`<cola>_out`."""
+        waits = {}
+        for name in self.marks:
+            if name.endswith('_in'):
+                queue = name[:-3]
+                wait = self.between(name, queue + '_out')
+                if wait is not None:
+                    waits[queue] = wait
+        return waits
+
+    def as_dict(self) -> dict:
+        """Marcas en segundos relativas al origen, en orden cronológico."""
+        origin = self.origin
+        if origin is None:
+            origin = min(self.marks.values(), default=0.0)
+        return {k: v - origin for k, v in sorted(self.marks.items(), key=lambda kv: kv[1])}
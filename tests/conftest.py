@@ -1,4 +1,8 @@
 import sys
 from pathlib import Path
 # Add src directory to sys.path for tests
-sys.path.append(str(Path(__file__).resolve().parents[1] / 'src'))
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / 'src'))
+# Los módulos con imports relativos al paquete (`..utils`) se importan como `src.*`
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
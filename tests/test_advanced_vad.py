@@ -0,0 +1,181 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.audio.advanced_vad import AdvancedVADSegmenter
+from src.audio.noise_floor import NoiseFloorTracker
+
+
+class LoudVAD:
+    """VAD falso: cualquier frame por encima de la puerta de ruido es voz."""
+
+    def is_speech(self, frame: bytes, sample_rate: int) -> bool:
+        return True
+
+    def set_mode(self, mode):
+        pass
+
+
+def _tone_frame(amplitude, samples=320):
+    t = np.arange(samples) / 16000
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.int16).tobytes()
+
+
+def _make_vad():
+    vad = AdvancedVADSegmenter(config_file="nonexistent.ini")
+    vad.vad = LoudVAD()
+    return vad
+
+
+def test_find_split_point_picks_quietest_frame_in_window():
+    vad = _make_vad()
+    vad.split_search_window_ms = 100  # 5 frames
+    levels = [-10.0] * 20
+    levels[2] = -80.0   # fuera de la ventana de búsqueda
+    levels[17] = -40.0
+    assert vad.find_split_point(levels) == 18
+
+
+@pytest.mark.asyncio
+async def test_long_segment_is_split_without_losing_audio():
+    vad = _make_vad()
+    vad.max_segment_duration_ms = 1000   # 50 frames
+    vad.split_search_window_ms = 400
+    loud, dip = _tone_frame(8000), _tone_frame(1200)
+
+    frames = [loud] * 45 + [dip] + [loud] * 30
+    q = asyncio.Queue()
+    for f in frames:
+        await q.put(f)
+
+    gen = vad.segments(q)
+    first = await asyncio.wait_for(gen.__anext__(), timeout=1)
+    await gen.aclose()
+
+    bpf = vad.bytes_per_frame
+    # El corte cae justo después del frame más silencioso
+    assert len(first) == 46 * bpf
+    assert first[-bpf:] == dip
+
+
+@pytest.mark.asyncio
+async def test_partial_chunks_share_segment_id_with_final():
+    vad = _make_vad()
+    vad.partial_interval_ms = 200   # cada 10 frames de voz
+    vad.max_silence_duration_ms = 100
+    loud, silence = _tone_frame(8000), b"\x00" * 640
+
+    q = asyncio.Queue()
+    for f in [loud] * 50 + [silence] * 10:
+        await q.put(f)
+
+    gen = vad.chunks(q)
+    chunks = []
+    while True:
+        chunk = await asyncio.wait_for(gen.__anext__(), timeout=1)
+        chunks.append(chunk)
+        if chunk.final:
+            break
+    await gen.aclose()
+
+    provisional = [c for c in chunks if not c.final]
+    assert len(provisional) >= 2
+    assert {c.segment_id for c in chunks} == {chunks[-1].segment_id}
+    # Cada trozo provisional acumula el audio anterior del segmento
+    sizes = [len(c.pcm) for c in chunks]
+    assert sizes == sorted(sizes)
+    assert chunks[-1].pcm.startswith(provisional[-1].pcm)
+
+
+@pytest.mark.asyncio
+async def test_chunks_carry_adc_times_from_timed_frames():
+    vad = _make_vad()
+    vad.max_silence_duration_ms = 100
+    loud, silence = _tone_frame(8000), b"\x00" * 640
+
+    q = asyncio.Queue()
+    frames = [silence] * 5 + [loud] * 40 + [silence] * 10
+    for i, f in enumerate(frames):
+        await q.put((f, 100.0 + i * 0.02))
+
+    gen = vad.chunks(q)
+    chunk = await asyncio.wait_for(gen.__anext__(), timeout=1)
+    await gen.aclose()
+
+    assert chunk.final
+    # El origen es el primer frame con voz, no el relleno previo del anillo
+    assert chunk.t_start == pytest.approx(100.0 + 5 * 0.02)
+    # El PCM incluye el relleno del anillo, así que termina n_frames después del frame 0
+    n_frames = len(chunk.pcm) // vad.bytes_per_frame
+    assert chunk.t_end == pytest.approx(100.0 + n_frames * 0.02)
+
+
+@pytest.mark.asyncio
+async def test_speech_start_callback_reports_segment_id():
+    vad = _make_vad()
+    vad.max_silence_duration_ms = 100
+    loud, silence = _tone_frame(8000), b"\x00" * 640
+    started = []
+    vad.on_speech_start = lambda segment_id, t_start: started.append((segment_id, t_start))
+
+    q = asyncio.Queue()
+    for i, f in enumerate([loud] * 40 + [silence] * 10):
+        await q.put((f, 50.0 + i * 0.02))
+
+    gen = vad.chunks(q)
+    chunk = await asyncio.wait_for(gen.__anext__(), timeout=1)
+    await gen.aclose()
+
+    assert started == [(chunk.segment_id, chunk.t_start)]
+
+
+class CountingVAD:
+    """VAD falso que nunca detecta voz y cuenta las llamadas."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def is_speech(self, frame, sample_rate):
+        self.calls += 1
+        return False
+
+
+class ActiveGate:
+    def __init__(self):
+        self.active = True
+
+    def is_active(self):
+        return self.active
+
+
+@pytest.mark.asyncio
+async def test_vad_skips_gated_frames_and_runs_vad_once():
+    vad = _make_vad()
+    vad.vad = CountingVAD()
+    # Puerta por debajo del suelo: el ruido pasa y necesita decisión del VAD
+    vad.noise_tracker = NoiseFloorTracker(window_frames=50, update_every=10,
+                                          gate_margin_db=-20)
+    vad.playback_gate = gate = ActiveGate()
+    noise = (np.random.default_rng(0).normal(0, 60, 320)).astype(np.int16).tobytes()
+
+    q = asyncio.Queue()
+    gen = vad.chunks(q)
+    task = asyncio.ensure_future(gen.__anext__())
+    # Reproducción en curso: frames silenciados por la puerta half-duplex
+    for _ in range(30):
+        await q.put(b"\x00" * 640)
+    await asyncio.sleep(0.05)
+    assert vad.noise_tracker.noise_floor_db is None
+
+    gate.active = False
+    for _ in range(30):
+        await q.put(noise)
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert -65 < vad.noise_tracker.noise_floor_db < -50
+    # Una sola decisión del VAD por frame y ninguna durante la reproducción
+    assert vad.vad.calls == 30
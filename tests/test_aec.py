@@ -0,0 +1,157 @@
+import numpy as np
+
+from audio.aec import EchoReference, EchoCanceller
+
+
+def _frames(signal, block):
+    for i in range(0, len(signal) - block + 1, block):
+        yield i, signal[i:i + block]
+
+
+def test_reference_fetch_aligns_by_time():
+    ref = EchoReference(sample_rate=16000)
+    pcm = (np.arange(1600, dtype=np.int16)).tobytes()
+    ref.push(pcm, 16000, t_play=10.0)
+    out = ref.fetch(10.05, 320)  # 800 muestras después del inicio
+    assert out[0] == 800 and out[-1] == 1119
+    # Antes del audio de referencia: ceros
+    assert not ref.fetch(9.0, 320).any()
+
+
+def test_passthrough_without_reference():
+    ref = EchoReference(sample_rate=16000)
+    aec = EchoCanceller(ref, sample_rate=16000, frame_ms=20)
+    frame = (np.random.default_rng(0).normal(0, 1000, 320)).astype(np.int16).tobytes()
+    assert aec.process(frame, t_adc=5.0) == frame
+    assert aec.frames_processed == 0
+
+
+def test_echo_is_attenuated_after_convergence():
+    sr, block = 16000, 320
+    rng = np.random.default_rng(1)
+    far = rng.normal(0, 3000, sr * 4).astype(np.float32)
+    # Camino de eco: retardo de 40 muestras y atenuación con una pequeña cola
+    h = np.zeros(64, dtype=np.float32)
+    h[40], h[41], h[50] = 0.3, 0.1, -0.05
+    echo = np.convolve(far, h)[: len(far)]
+
+    ref = EchoReference(sample_rate=sr)
+    ref.push(far.astype(np.int16).tobytes(), sr, t_play=0.0)
+    aec = EchoCanceller(ref, sample_rate=sr, frame_ms=20, filter_length_ms=40,
+                        step_size=0.5)
+
+    residual = []
+    for i, mic in _frames(echo, block):
+        out = aec.process(mic.astype(np.int16).tobytes(), t_adc=i / sr)
+        residual.append(np.frombuffer(out, dtype=np.int16).astype(np.float32))
+
+    tail = slice(len(residual) - 25, len(residual))
+    echo_power = np.mean(echo[-25 * block:] ** 2)
+    residual_power = np.mean(np.concatenate(residual[tail]) ** 2)
+    erle_db = 10 * np.log10(echo_power / residual_power)
+    assert erle_db > 15
+
+
+def _run(aec, mic, sr=16000, block=320):
+    out = []
+    for i, frame in _frames(mic, block):
+        res = aec.process(np.clip(frame, -32768, 32767).astype(np.int16).tobytes(),
+                          t_adc=i / sr)
+        out.append(np.frombuffer(res, dtype=np.int16).astype(np.float32))
+    return out
+
+
+def test_loud_echo_converges_and_double_talk_freezes_adaptation():
+    sr, block = 16000, 320
+    rng = np.random.default_rng(2)
+    far = rng.normal(0, 3000, sr * 4).astype(np.float32)
+    # Ganancia de eco >= 0.5 (altavoz cerca del micro)
+    h = np.zeros(64, dtype=np.float32)
+    h[30], h[31] = 0.8, 0.2
+    echo = np.convolve(far, h)[: len(far)]
+    # Habla local en el último segundo
+    local = np.zeros_like(far)
+    local[3 * sr:] = rng.normal(0, 8000, sr)
+
+    ref = EchoReference(sample_rate=sr)
+    ref.push(far.astype(np.int16).tobytes(), sr, t_play=0.0)
+    aec = EchoCanceller(ref, sample_rate=sr, frame_ms=20, filter_length_ms=40,
+                        step_size=0.5)
+    residual = _run(aec, echo + local)
+
+    # Antes de la habla local el eco ya está cancelado
+    echo_power = np.mean(echo[2 * sr:3 * sr] ** 2)
+    residual_power = np.mean(np.concatenate(residual[100:150]) ** 2)
+    assert 10 * np.log10(echo_power / residual_power) > 15
+    # Durante la habla local no se adapta
+    assert aec.double_talk_frames >= 45
+    assert aec.frames_adapted >= 140
+
+
+def test_history_is_cleared_across_silent_reference():
+    sr, block = 16000, 320
+    rng = np.random.default_rng(3)
+    burst = rng.normal(0, 3000, sr * 2).astype(np.float32)
+    gap = sr // 2
+    far = np.concatenate((burst, np.zeros(gap, dtype=np.float32), burst))
+    # Eco con retardo mayor que un bloque: depende del bloque anterior
+    h = np.zeros(block + 20, dtype=np.float32)
+    h[block + 10] = 0.4
+    echo = np.convolve(far, h)[: len(far)]
+
+    ref = EchoReference(sample_rate=sr, history_s=10.0)
+    ref.push(burst.astype(np.int16).tobytes(), sr, t_play=0.0)
+    ref.push(burst.astype(np.int16).tobytes(), sr, t_play=(len(burst) + gap) / sr)
+    aec = EchoCanceller(ref, sample_rate=sr, frame_ms=20, filter_length_ms=60,
+                        step_size=0.5)
+    residual = _run(aec, echo)
+
+    # Primer frame tras el silencio: su eco procede del bloque anterior (mudo),
+    # así que no debe restarse nada del audio previo al silencio
+    first = (len(burst) + gap) // block
+    assert np.max(np.abs(residual[first])) < 0.05 * np.max(np.abs(echo))
+
+
+def test_reconverges_after_echo_path_change():
+    sr, block = 16000, 320
+    rng = np.random.default_rng(4)
+    far = rng.normal(0, 3000, sr * 6).astype(np.float32)
+    # A los 2 s sube el volumen del altavoz: la ganancia de eco pasa de 0.2 a 0.9
+    h_low = np.zeros(64, dtype=np.float32)
+    h_low[30] = 0.2
+    echo = np.convolve(far, h_low)[: len(far)]
+    echo[2 * sr:] = np.convolve(far, h_low * 4.5)[2 * sr: len(far)]
+
+    ref = EchoReference(sample_rate=sr, history_s=10.0)
+    ref.push(far.astype(np.int16).tobytes(), sr, t_play=0.0)
+    aec = EchoCanceller(ref, sample_rate=sr, frame_ms=20, filter_length_ms=40,
+                        step_size=0.5)
+    residual = _run(aec, echo)
+
+    assert aec.reconvergences >= 1
+    echo_power = np.mean(echo[5 * sr:] ** 2)
+    residual_power = np.mean(np.concatenate(residual[-50:]) ** 2)
+    assert 10 * np.log10(echo_power / residual_power) > 15
+
+
+def test_clear_history_keeps_filter():
+    sr, block = 16000, 320
+    rng = np.random.default_rng(5)
+    far = rng.normal(0, 3000, sr * 2).astype(np.float32)
+    h = np.zeros(64, dtype=np.float32)
+    h[30] = 0.3
+    echo = np.convolve(far, h)[: len(far)]
+    ref = EchoReference(sample_rate=sr)
+    ref.push(far.astype(np.int16).tobytes(), sr, t_play=0.0)
+    aec = EchoCanceller(ref, sample_rate=sr, frame_ms=20, filter_length_ms=40,
+                        step_size=0.5)
+    _run(aec, echo)
+    weights = aec._W.copy()
+
+    # Barge-in: se vacía la referencia y el cancelador olvida lo ya visto
+    ref.clear()
+    aec.clear_history()
+    assert not aec._X.any() and aec._ref_cursor is None
+    assert np.array_equal(aec._W, weights)
+    frame = rng.normal(0, 1000, block).astype(np.int16).tobytes()
+    assert aec.process(frame, t_adc=10.0) == frame
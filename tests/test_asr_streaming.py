@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+pytest.importorskip('vosk')
+pytest.importorskip('faster_whisper')
+
+from src.pipeline import asr as asr_module  # noqa: E402
+
+WORD_BYTES = 3200  # 100 ms de PCM16 a 16 kHz por "palabra"
+WORDS = ['uno', 'dos', 'tres', 'cuatro', 'cinco', 'seis', 'siete']
+
+
+def _audio(words):
+    return b''.join(bytes([WORDS.index(w) + 1]) * WORD_BYTES for w in words)
+
+
+class FakeRecognizer:
+    """Reconoce una palabra por cada bloque completo de WORD_BYTES."""
+
+    def __init__(self, model, rate):
+        self.buffer = b''
+
+    def _words(self):
+        blocks = len(self.buffer) // WORD_BYTES
+        return ' '.join(WORDS[self.buffer[i * WORD_BYTES] - 1] for i in range(blocks))
+
+    def AcceptWaveform(self, data):
+        self.buffer += data
+        return False
+
+    def PartialResult(self):
+        return json.dumps({'partial': self._words()})
+
+    def FinalResult(self):
+        return json.dumps({'text': self._words()})
+
+
+@pytest.fixture
+def vosk(monkeypatch):
+    monkeypatch.setattr(asr_module, 'Model', lambda path: object())
+    monkeypatch.setattr(asr_module, 'KaldiRecognizer', FakeRecognizer)
+    return asr_module.VoskASR('modelo')
+
+
+def test_forced_split_after_partials_does_not_duplicate_words(vosk):
+    # Parcial con 5 palabras; el VAD corta tras la tercera (duración máxima)
+    assert vosk._feed(1, _audio(WORDS[:5]), final=False) == 'uno dos tres cuatro cinco'
+    first = vosk._feed(1, _audio(WORDS[:3]), final=True)
+    # El resto (cuatro, cinco, ...) continúa como segmento nuevo
+    second = vosk._feed(2, _audio(WORDS[3:]), final=True)
+    assert first == 'uno dos tres'
+    assert second == 'cuatro cinco seis siete'
+
+
+def test_partials_feed_only_new_audio(vosk):
+    vosk._feed(1, _audio(WORDS[:2]), final=False)
+    assert vosk._feed(1, _audio(WORDS[:4]), final=True) == 'uno dos tres cuatro'
@@ -29,3 +29,16 @@ def test_audio_sink_find_device():
     with patch('audio.sink.sd.query_devices', return_value=devices):
         assert sink._find_device('beta') == 1
         assert sink._find_device('gamma') is None
+
+
+def test_null_sink_timestamps_writes_and_tracks_playback():
+    from audio.sink import NullSink
+    refs = []
+    sink = NullSink(samplerate=16000, on_reference=lambda *a: refs.append(a))
+    sink.write(b'\x00\x00' * 1600)   # 100 ms
+    sink.write(b'\x00\x00' * 1600)
+    assert [n for _, n in sink.writes] == [3200, 3200]
+    # El segundo bloque empieza donde termina el primero
+    assert abs(refs[1][2] - refs[0][2] - 0.1) < 1e-9
+    assert sink.is_playing()
+    assert 0.1 < sink.buffered_seconds() <= 0.2
@@ -0,0 +1,31 @@
+import pytest
+
+from pipeline.barge_in import BargeInPolicy
+
+
+def test_never_mode_keeps_backlog():
+    policy = BargeInPolicy(mode='never')
+    assert not policy.trigger(5, backlog_s=10.0)
+    assert not policy.is_stale(4)
+
+
+def test_always_mode_marks_older_segments_stale():
+    policy = BargeInPolicy(mode='always')
+    assert not policy.trigger(3, backlog_s=0.0)  # nada que interrumpir
+    assert policy.trigger(5, backlog_s=0.5)
+
+    assert policy.is_stale(4)
+    assert not policy.is_stale(5) and not policy.is_stale(None)
+    assert policy.preemptions == 1
+
+
+def test_backlog_mode_uses_threshold():
+    policy = BargeInPolicy(mode='backlog', threshold_s=2.0)
+    assert not policy.trigger(2, backlog_s=1.5)
+    assert policy.trigger(3, backlog_s=2.5)
+    assert policy.cutoff_segment == 3
+
+
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        BargeInPolicy(mode='sometimes')
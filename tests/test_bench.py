@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from src.bench.common import percentiles, write_results
+
+
+def test_percentiles_skip_missing_values_and_scale():
+    stats = percentiles([0.1, None, 0.2, 0.3], scale=1000)
+    assert stats['count'] == 3
+    assert stats['p50'] == pytest.approx(200.0)
+    assert stats['max'] == pytest.approx(300.0)
+    assert percentiles([]) == {'count': 0}
+
+
+def test_results_include_hardware_info(tmp_path):
+    path = tmp_path / 'out' / 'bench.json'
+    write_results(path, 'micro', {'x': 1})
+    doc = json.loads(path.read_text(encoding='utf-8'))
+    assert doc['kind'] == 'micro' and doc['results'] == {'x': 1}
+    assert doc['hardware']['cpu_count']
+
+
+def test_micro_compare_flags_only_slowdowns():
+    from src.bench.micro import compare
+
+    baseline = [
+        {'name': 'vad', 'metric': 'frames_per_s', 'value': 1000.0, 'params': {}},
+        {'name': 'asr', 'metric': 'rtf', 'value': 0.2, 'params': {'audio_s': 3.0}},
+        {'name': 'tts', 'metric': 'first_chunk_ms', 'value': 100.0, 'params': {}},
+    ]
+    current = [
+        {'name': 'vad', 'metric': 'frames_per_s', 'value': 800.0, 'params': {}},
+        {'name': 'asr', 'metric': 'rtf', 'value': 0.1, 'params': {'audio_s': 3.0}},
+        {'name': 'tts', 'metric': 'first_chunk_ms', 'value': 105.0, 'params': {}},
+    ]
+    regressions = compare(current, baseline, tolerance=0.10)
+    assert [r['name'] for r in regressions] == ['vad']
+    assert regressions[0]['slowdown'] == pytest.approx(0.25)
+
+
+def test_micro_vad_and_rms_run_on_synthetic_input():
+    from src.bench.micro import bench_rms, bench_vad
+
+    results = bench_vad(repeats=1, seconds=3.0) + bench_rms(repeats=1, calls=100)
+    assert {r['name'] for r in results} == {'vad', 'calculate_rms_db'}
+    assert all(r['value'] > 0 for r in results)
+
+
+def test_bench_config_pins_shedding_and_side_effects_off():
+    from src.bench.common import bench_config, bench_config_file
+
+    config = bench_config()
+    assert config.get('latency', 'tts_queue_policy') == 'block'
+    assert config.getint('latency', 'tts_deadline_ms') == 0
+    assert not config.getboolean('debug', 'save_audio_clips')
+    assert not config.getboolean('performance', 'enable_loop_monitor')
+    with bench_config_file() as path:
+        assert path.exists()
+    assert not path.exists()
@@ -0,0 +1,81 @@
+import json
+
+from src import calibration
+from src.calibration import choose, hardware_fingerprint
+
+
+def _results():
+    return {
+        'asr': [{'backend': 'whisper', 'model': 'small', 'quality': 3, 'rtf': 0.45},
+                {'backend': 'whisper', 'model': 'base', 'quality': 2, 'rtf': 0.15},
+                {'backend': 'vosk', 'model': 'vosk', 'quality': 1, 'error': 'sin modelo'}],
+        'mt': [{'backend': 'nllb', 'quantize': False, 'quality': 2, 'rtf': 0.20},
+               {'backend': 'nllb', 'quantize': True, 'quality': 1, 'rtf': 0.08}],
+        'tts': [{'backend': 'piper', 'quality': 1, 'rtf': 0.05}],
+    }
+
+
+def test_choose_prefers_quality_within_target():
+    choice = choose(_results(), rtf_target=0.75)
+    # small + NLLB torch (0.70) cumple y es la de mayor calidad
+    assert choice['asr']['model'] == 'small' and choice['mt']['quantize'] is False
+    assert choice['meets_target']
+
+    # small+int8 (0.58) y base+torch (0.40) empatan en calidad: la más rápida
+    choice = choose(_results(), rtf_target=0.6)
+    assert choice['asr']['model'] == 'base' and choice['mt']['quantize'] is False
+
+
+def test_choose_falls_back_to_fastest():
+    choice = choose(_results(), rtf_target=0.1)
+    assert not choice['meets_target']
+    assert choice['rtf'] == 0.15 + 0.08 + 0.05
+
+
+def test_fingerprint_ignores_volatile_fields():
+    info = {'machine': 'x86_64', 'processor': 'cpu', 'cpu_count': 8, 'python': '3.11'}
+    assert hardware_fingerprint(info) == hardware_fingerprint({**info, 'python': '3.12'})
+    assert hardware_fingerprint(info) != hardware_fingerprint({**info, 'cpu_count': 16})
+
+
+def _write_wav(path, seconds=1.0):
+    import wave
+    import numpy as np
+    with wave.open(str(path), 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(np.zeros(int(16000 * seconds), dtype=np.int16).tobytes())
+
+
+def test_calibrate_measures_once_then_reuses_cache(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(calibration, 'measure_all',
+                        lambda speech, repeats=2, log=print: calls.append(len(speech)) or _results())
+    cache = tmp_path / 'calibration.json'
+    corpus = tmp_path / 'corpus'
+    corpus.mkdir()
+    _write_wav(corpus / 'frase.wav')
+
+    first = calibration.calibrate(cache, rtf_target=0.6, reference_dir=corpus,
+                                  log=lambda *_: None)
+    second = calibration.calibrate(cache, rtf_target=0.6, reference_dir=corpus,
+                                   log=lambda *_: None)
+
+    assert calls == [1]
+    assert first['rtf'] == second['rtf']
+    stored = json.loads(cache.read_text(encoding='utf-8'))
+    assert list(stored) == [hardware_fingerprint()]
+
+
+def test_calibrate_requires_real_speech(tmp_path, monkeypatch):
+    monkeypatch.setattr(calibration, 'measure_all', lambda *a, **k: _results())
+    cache = tmp_path / 'calibration.json'
+    assert calibration.calibrate(cache, reference_dir=tmp_path, log=lambda *_: None) is None
+    assert not cache.exists()
+
+
+def test_speech_workload_stops_near_target():
+    second = b'\0' * 32000
+    assert len(calibration._speech_workload([second] * 8)) == calibration.WORKLOAD_S
+    assert calibration._speech_workload([second]) == [second]
@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.cancellation import (CancellationToken, OperationCancelled, check_cancelled,
+                                is_cancelled, use_token)
+from utils.timing import run_blocking, use_executor
+
+
+def test_check_without_token_is_noop():
+    check_cancelled()
+    assert not is_cancelled()
+
+
+def test_token_raises_after_cancel():
+    token = CancellationToken()
+    token.check()
+    token.cancel()
+    assert token.cancelled
+    with pytest.raises(OperationCancelled):
+        token.check()
+
+
+def _decode_steps(steps, seen):
+    # Simula un decode por pasos que comprueba el token entre ellos
+    for i in range(steps):
+        check_cancelled()
+        seen.append((i, threading.current_thread().name))
+        time.sleep(0.01)
+    return 'done'
+
+
+@pytest.mark.asyncio
+async def test_run_blocking_propagates_token_and_executor():
+    async def pipeline():
+        token = CancellationToken()
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pipeline')
+        use_token(token)
+        use_executor(executor)
+        seen = []
+        task = asyncio.create_task(run_blocking(_decode_steps, 1000, seen))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        token.cancel()
+        start = time.perf_counter()
+        executor.shutdown(wait=True)
+        return seen, time.perf_counter() - start
+
+    seen, shutdown_s = await asyncio.create_task(pipeline())
+
+    assert seen and all(name.startswith('pipeline') for _, name in seen)
+    assert len(seen) < 1000
+    assert shutdown_s < 0.5
+    # El contexto del test no hereda el token del pipeline
+    assert not is_cancelled()
@@ -0,0 +1,50 @@
+import json
+import threading
+import time
+
+import pytest
+
+from utils.chrome_trace import (TraceRecorder, active_recorder, start_trace,
+                                stop_trace, trace_span)
+
+
+def test_trace_span_is_noop_without_recorder():
+    assert active_recorder() is None
+    with trace_span('asr', 'asr'):
+        pass
+    assert stop_trace() is None
+
+
+def test_spans_record_thread_and_write_chrome_json(tmp_path):
+    path = tmp_path / 'trace.json'
+    recorder = start_trace(path)
+    try:
+        with trace_span('loop.work', 'pipeline', n=1):
+            pass
+
+        def worker():
+            with trace_span('asr.model', 'asr'):
+                time.sleep(0.001)
+        t = threading.Thread(target=worker, name='asr-executor')
+        t.start()
+        t.join()
+        now = time.monotonic()
+        recorder.complete('vad.segment', now - 0.5, now, 'vad', monotonic=True)
+        recorder.counter('queues', {'asr_q': 2})
+    finally:
+        assert stop_trace() == path
+
+    doc = json.loads(path.read_text(encoding='utf-8'))
+    events = {e['name']: e for e in doc['traceEvents']}
+    assert events['loop.work']['ph'] == 'X' and events['loop.work']['args'] == {'n': 1}
+    assert events['asr.model']['tid'] != events['loop.work']['tid']
+    assert events['vad.segment']['dur'] == pytest.approx(5e5, rel=1e-3)
+    names = {e['args']['name'] for e in doc['traceEvents'] if e['name'] == 'thread_name'}
+    assert 'asr-executor' in names
+
+
+def test_recorder_bounds_memory(tmp_path):
+    recorder = TraceRecorder(tmp_path / 't.json', max_events=2)
+    for _ in range(5):
+        recorder.instant('tick')
+    assert len(recorder._events) == 2 and recorder.dropped == 3
@@ -0,0 +1,60 @@
+import json
+
+import numpy as np
+
+from utils.clip_archive import ClipArchiver
+
+
+def _pcm(seconds=0.5):
+    return (np.random.default_rng(0).normal(0, 2000, int(16000 * seconds))
+            .astype(np.int16).tobytes())
+
+
+def test_clips_and_index_are_written(tmp_path):
+    archiver = ClipArchiver(directory=tmp_path, fmt='wav').start()
+    assert archiver.submit(_pcm(), 'hola', 'hello', segment_id=3)
+    archiver.close()
+
+    entries = [json.loads(line) for line in
+               (tmp_path / 'index.jsonl').read_text(encoding='utf-8').splitlines()]
+    assert len(entries) == 1
+    assert entries[0]['es'] == 'hola' and entries[0]['segment_id'] == 3
+    assert (tmp_path / entries[0]['file']).exists()
+    assert archiver.stats()['written'] == 1
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    archiver = ClipArchiver(directory=tmp_path, fmt='wav', queue_size=2)
+    # Sin arrancar el hilo la cola no se vacía
+    results = [archiver.submit(_pcm(0.1)) for _ in range(5)]
+    assert results == [True, True, False, False, False]
+    assert archiver.dropped == 3
+
+
+def test_quota_rotates_oldest_clips(tmp_path):
+    archiver = ClipArchiver(directory=tmp_path, fmt='wav', max_mb=0.05).start()
+    for _ in range(5):
+        archiver.submit(_pcm(0.5))  # ~16 KB por clip
+    archiver.close()
+    clips = sorted(p for p in tmp_path.iterdir() if p.suffix == '.wav')
+    assert 1 <= len(clips) < 5
+    assert sum(p.stat().st_size for p in clips) <= 0.05 * 1024 * 1024
+
+
+def test_quota_ignores_foreign_files_and_prunes_index(tmp_path):
+    (tmp_path / 'notas.txt').write_bytes(b'x' * 100_000)
+    (tmp_path / 'a.wav').write_bytes(b'x' * 100_000)
+    archiver = ClipArchiver(directory=tmp_path, fmt='wav', max_mb=0.05).start()
+    for _ in range(5):
+        archiver.submit(_pcm(0.5))
+    archiver.close()
+
+    # Los ficheros del usuario no cuentan para la cuota ni se borran
+    assert (tmp_path / 'notas.txt').exists() and (tmp_path / 'a.wav').exists()
+    clips = {p.name for p in tmp_path.glob('clip-*')}
+    assert 1 <= len(clips) < 5
+    index = tmp_path / 'index.jsonl'
+    entries = [json.loads(line) for line in index.read_text(encoding='utf-8').splitlines()]
+    assert {e['file'] for e in entries} == clips
+    used = sum((tmp_path / name).stat().st_size for name in clips) + index.stat().st_size
+    assert used <= 0.05 * 1024 * 1024
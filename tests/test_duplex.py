@@ -0,0 +1,47 @@
+import numpy as np
+
+from audio.duplex import HalfDuplexGate, frame_rms_db
+
+
+class FakePlayback:
+    def __init__(self, playing):
+        self.playing = playing
+
+    def is_playing(self, hangover=0.0):
+        return self.playing
+
+
+def _tone(amplitude):
+    t = np.arange(320) / 16000
+    return (amplitude * np.sin(2 * np.pi * 440 * t)).astype(np.int16).tobytes()
+
+
+def test_frames_pass_when_sink_idle():
+    gate = HalfDuplexGate(FakePlayback(False))
+    frame = _tone(1000)
+    assert gate.process(frame) == frame
+    assert gate.frames_gated == 0
+
+
+def test_quiet_frames_muted_while_playing():
+    gate = HalfDuplexGate(FakePlayback(True), barge_in_db=-20)
+    out = gate.process(_tone(500))
+    assert out == b"\x00" * len(out)
+    assert gate.frames_gated == 1
+
+
+def test_attenuate_mode_lowers_level():
+    gate = HalfDuplexGate(FakePlayback(True), mode='attenuate',
+                          attenuation_db=-20, barge_in_db=-5)
+    frame = _tone(3000)
+    assert frame_rms_db(gate.process(frame)) < frame_rms_db(frame) - 19
+
+
+def test_loud_speech_barges_in_and_holds():
+    gate = HalfDuplexGate(FakePlayback(True), barge_in_db=-20, hangover_ms=300)
+    loud = _tone(20000)
+    assert gate.process(loud) == loud
+    # Dentro del hangover del barge-in los frames débiles también pasan
+    quiet = _tone(500)
+    assert gate.process(quiet) == quiet
+    assert gate.frames_barged_in == 2
@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.loop_monitor import LoopLagMonitor
+from utils.timing import LatencyStats
+
+
+def blocking_call_for_test():
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_monitor_flags_blocking_call_with_stack():
+    stats = LatencyStats()
+    seen = []
+    monitor = LoopLagMonitor(interval_ms=20, threshold_ms=100, stats=stats,
+                             on_stall=seen.append)
+    task = asyncio.create_task(monitor.run(), name='loop-monitor')
+    await asyncio.sleep(0.1)
+    blocking_call_for_test()
+    await asyncio.sleep(0.1)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert monitor.stall_count == 1 and seen
+    stall = seen[0]
+    assert stall.duration >= 0.2
+    assert any('blocking_call_for_test' in line for line in stall.stack)
+    assert 'blocking_call_for_test' in stall.describe()
+    assert stats.snapshot()['loop_lag']['max'] >= 0.2
+    assert monitor._stop.is_set()
@@ -0,0 +1,60 @@
+import gc
+import tracemalloc
+
+from utils.memory import MemoryLedger, process_rss_bytes, start_tracemalloc, tracemalloc_top
+
+
+class _Utt:
+    pass
+
+
+def test_inflight_bytes_follow_object_lifetime():
+    ledger = MemoryLedger()
+    a, b = _Utt(), _Utt()
+    ledger.track_utterance(a, 1000)
+    ledger.track_utterance(b, 500)
+    assert ledger.inflight_bytes == 1500 and ledger.inflight_count == 2
+    del a
+    gc.collect()
+    assert ledger.inflight_bytes == 500
+    assert ledger.inflight_peak_bytes == 1500
+    del b
+    gc.collect()
+    assert ledger.snapshot()['inflight_count'] == 0
+
+
+def test_merged_bytes_stay_counted_until_merged_object_dies():
+    ledger = MemoryLedger()
+    a, b = _Utt(), _Utt()
+    ledger.track_utterance(a, 1000)
+    ledger.track_utterance(b, 500)
+    # Se fusiona b en a: a retiene ahora los 1500 bytes
+    ledger.track_utterance(a, 500, count=False)
+    del b
+    gc.collect()
+    assert ledger.inflight_bytes == 1500 and ledger.inflight_count == 1
+    del a
+    gc.collect()
+    assert ledger.inflight_bytes == 0 and ledger.inflight_count == 0
+
+
+def test_track_load_records_rss_delta():
+    ledger = MemoryLedger()
+    with ledger.track_load('mt:fake'):
+        blob = bytearray(32 * 1024 * 1024)
+        blob[::4096] = b'x' * len(blob[::4096])  # tocar las páginas
+    entry = ledger.snapshot()['models']['mt:fake']
+    if process_rss_bytes() is not None:
+        assert entry['rss'] >= 16 * 1024 * 1024
+    assert 'mt:fake' in ledger.report()
+    del blob
+
+
+def test_tracemalloc_top_reports_allocations():
+    start_tracemalloc()
+    data = [bytes(1024) for _ in range(1000)]
+    top = tracemalloc_top(limit=5)
+    tracemalloc.stop()
+    assert top and all(isinstance(line, str) for line in top)
+    assert tracemalloc_top() == []
+    del data
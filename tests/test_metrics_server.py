@@ -0,0 +1,42 @@
+import urllib.request
+
+from utils.metrics_server import MetricsServer
+from utils.timing import LatencyStats
+
+
+def _server(**kwargs):
+    stats = LatencyStats()
+    stats.record('asr', 0.2)
+    stats.record('queue:asr_q', 0.01)
+    stats.record('rtf', 0.4)
+    return MetricsServer(port=0, stats=stats, **kwargs)
+
+
+def test_render_is_openmetrics():
+    server = _server()
+    server.add_gauge('queue_depth', 'cola', lambda: {'asr_q': 3}, label='queue')
+    server.add_counter('sink_underruns', 'underruns', lambda: 2)
+    server.add_counter('broken', 'falla', lambda: 1 / 0)
+    text = server.render()
+
+    assert text.endswith('# EOF\n')
+    assert 'dsrt_queue_depth{queue="asr_q"} 3.0' in text
+    assert 'dsrt_sink_underruns_total 2.0' in text
+    assert 'dsrt_process_cpu_seconds_total' in text
+    assert 'dsrt_stage_latency_seconds{stage="asr",quantile="0.5"}' in text
+    assert 'dsrt_queue_wait_seconds_count{queue="asr_q"} 1' in text
+    assert 'dsrt_rtf_count 1' in text
+    assert 'broken' not in text
+
+
+def test_serves_metrics_over_http():
+    server = _server().start()
+    try:
+        url = f'http://127.0.0.1:{server.port}/metrics'
+        with urllib.request.urlopen(url, timeout=5) as resp:
+            body = resp.read().decode('utf-8')
+            assert resp.headers['Content-Type'].startswith('application/openmetrics-text')
+        assert '# EOF' in body
+        assert server.scrapes == 1
+    finally:
+        server.close()
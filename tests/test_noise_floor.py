@@ -0,0 +1,43 @@
+import numpy as np
+
+from audio.noise_floor import NoiseFloorTracker
+
+
+def test_no_estimate_until_enough_frames():
+    tracker = NoiseFloorTracker(window_frames=100, update_every=10)
+    for _ in range(9):
+        assert tracker.observe(-60.0) is False
+    assert tracker.noise_floor_db is None and tracker.gate_db is None
+    assert tracker.observe(-60.0) is True
+    assert tracker.noise_floor_db == -60.0
+
+
+def test_thresholds_follow_floor_with_margins():
+    tracker = NoiseFloorTracker(window_frames=200, percentile=20, update_every=10,
+                                gate_margin_db=6, voice_margin_db=3)
+    rng = np.random.default_rng(0)
+    for level in rng.normal(-62, 1.5, 200):
+        tracker.observe(float(level))
+    assert -65 < tracker.noise_floor_db < -61
+    assert tracker.gate_db == tracker.noise_floor_db + 6
+    assert tracker.voice_db == tracker.noise_floor_db + 3
+
+    # El ruido sube: la ventana acaba reflejando el nuevo nivel
+    for level in rng.normal(-45, 1.5, 200):
+        tracker.observe(float(level))
+    assert -48 < tracker.noise_floor_db < -44
+
+
+def test_floor_is_clamped():
+    tracker = NoiseFloorTracker(window_frames=10, update_every=10, max_db=-20)
+    for _ in range(10):
+        tracker.observe(-5.0)
+    assert tracker.noise_floor_db == -20
+
+
+def test_digital_silence_is_ignored():
+    tracker = NoiseFloorTracker(window_frames=20, update_every=10)
+    for _ in range(50):
+        assert tracker.observe(-100.0) is False
+    assert tracker.noise_floor_db is None
+
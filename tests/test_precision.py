@@ -0,0 +1,101 @@
+import json
+
+import numpy as np
+
+from src import calibration
+from src.utils import precision
+from src.utils.precision import (PrecisionPolicy, audio_agreement, cpu_capabilities,
+                                 default_precision, int8_model_path, supported_precisions,
+                                 text_agreement)
+
+
+def test_cpu_capabilities_from_features_and_flags():
+    caps = cpu_capabilities({'AVX2': True, 'AVX512F': True}, {'amx_int8', 'avx512_vnni'})
+    assert {'avx2', 'avx512', 'vnni', 'amx', 'bf16'} <= caps
+    assert cpu_capabilities({'ASIMD': True, 'ASIMDDP': True}, set()) == {'neon', 'vnni'}
+    assert cpu_capabilities({}, set()) == set()
+
+
+def test_default_precision_never_fp16_on_cpu():
+    assert default_precision('nllb', 'cpu', caps={'avx512', 'bf16'}) == 'float32'
+    assert default_precision('whisper', 'cpu', caps={'avx2'}) == 'int8'
+    assert default_precision('whisper', 'cpu', caps=set()) == 'float32'
+    assert default_precision('nllb', 'cuda') == 'float16'
+
+
+def test_piper_int8_needs_quantized_model(tmp_path):
+    model = tmp_path / 'voz.onnx'
+    assert supported_precisions('piper', 'cpu', model_path=model) == ['float32']
+    int8_model_path(model).write_bytes(b'')
+    assert int8_model_path(model).name == 'voz.int8.onnx'
+    assert supported_precisions('piper', 'cpu', model_path=model) == ['int8', 'float32']
+
+
+def test_policy_prefers_tuned_then_requested(monkeypatch):
+    monkeypatch.setattr(precision, 'supported_precisions',
+                        lambda backend, device, model_path=None: ['int8', 'float32'])
+    monkeypatch.setattr(precision, 'default_precision', lambda backend, device: 'float32')
+    policy = PrecisionPolicy()
+    assert policy.resolve('whisper', 'cpu', 'int8') == 'int8'
+    # No soportada o 'auto': valor por defecto
+    assert policy.resolve('whisper', 'cpu', 'float16') == 'float32'
+    assert policy.resolve('whisper', 'cpu', 'auto') == 'float32'
+    policy.update({'whisper:cpu': 'int8'})
+    assert policy.resolve('whisper', 'cpu', 'float32') == 'int8'
+    assert policy.resolve('whisper', 'cuda:0', 'float32') == 'float32'
+
+
+def test_text_and_audio_agreement():
+    assert text_agreement("hola que tal", "Hola que tal") == 1.0
+    assert abs(text_agreement("hola que tal estás", "hola tal estás") - 0.75) < 1e-9
+    tone = (8000 * np.sin(np.arange(1600) / 5)).astype(np.int16)
+    assert audio_agreement(tone.tobytes(), tone.tobytes()) > 0.999
+    assert audio_agreement(tone.tobytes(), (-tone).tobytes()) < 0
+    # Duraciones muy distintas: sin concordancia
+    assert audio_agreement(tone.tobytes(), tone[:800].tobytes()) == 0.0
+
+
+def test_pick_precision_fastest_within_tolerance():
+    results = {
+        'float32': {'seconds': 1.0, 'agreement': 1.0},
+        'int8': {'seconds': 0.4, 'agreement': 0.90},
+        'int8_float32': {'seconds': 0.6, 'agreement': 0.97},
+        'bfloat16': {'error': 'no soportado'},
+    }
+    assert calibration.pick_precision(results, tolerance=0.05) == 'int8_float32'
+    assert calibration.pick_precision(results, tolerance=0.15) == 'int8'
+    assert calibration.pick_precision(results, tolerance=0.0) == 'float32'
+
+
+def test_autotune_caches_choices_and_applies(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_tune(backend, device, audio, tolerance, repeats=1, log=print):
+        calls.append(backend)
+        return {'float32': {'seconds': 1.0, 'agreement': 1.0},
+                'int8': {'seconds': 0.5, 'agreement': 0.99}}
+
+    monkeypatch.setattr(calibration, 'tune_backend', fake_tune)
+    monkeypatch.setattr(calibration, '_cuda_available', lambda: False)
+    monkeypatch.setattr(calibration, 'PIPER_MODEL', str(tmp_path / 'sin-voz.onnx'))
+    cache = tmp_path / 'calibration.json'
+
+    first = calibration.autotune_precision(cache, reference_dir=tmp_path, log=lambda *_: None)
+    second = calibration.autotune_precision(cache, reference_dir=tmp_path, log=lambda *_: None)
+
+    # Sin WAVs de voz real, Whisper no se ajusta
+    assert calls == ['nllb']
+    assert first == second == {'nllb:cpu': 'int8'}
+    stored = json.loads(cache.read_text(encoding='utf-8'))
+    assert stored[calibration.hardware_fingerprint()]['precision']['choices'] == first
+
+    # Al añadir voz de referencia se vuelve a ajustar, ahora con Whisper
+    import wave
+    with wave.open(str(tmp_path / 'frase.wav'), 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(np.zeros(1600, dtype=np.int16).tobytes())
+    third = calibration.autotune_precision(cache, reference_dir=tmp_path, log=lambda *_: None)
+    assert calls == ['nllb', 'whisper', 'nllb']
+    assert third == {'whisper:cpu': 'int8', 'nllb:cpu': 'int8'}
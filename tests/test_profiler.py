@@ -0,0 +1,47 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.profiler import SamplingProfiler
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(200))
+
+
+@pytest.mark.asyncio
+async def test_samples_are_tagged_by_task_and_thread(tmp_path):
+    profiler = SamplingProfiler(interval_ms=2).start()
+
+    async def asr():
+        busy(0.15)
+
+    worker = threading.Thread(target=busy, args=(0.15,), name='clip-archiver')
+    worker.start()
+    await asyncio.create_task(asr(), name='asr')
+    worker.join()
+    profiler.stop()
+
+    totals = profiler.stage_totals()
+    assert totals.get('asr', 0) > 0
+    assert totals.get('clip-archiver', 0) > 0
+    assert not profiler.running
+
+    path = profiler.write_collapsed(tmp_path / 'p.collapsed')
+    lines = path.read_text(encoding='utf-8').splitlines()
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) > 0 and ';' in stack
+    assert any('test_profiler:busy' in line for line in lines)
+
+
+def test_timed_window_stops_and_reports():
+    done = threading.Event()
+    profiler = SamplingProfiler(interval_ms=2).start(duration_s=0.05,
+                                                     on_stop=lambda p: done.set())
+    assert done.wait(2.0)
+    assert not profiler.running
+    assert 'muestras' in profiler.summary()
@@ -0,0 +1,87 @@
+import configparser
+
+from pipeline.quality import QualityController, default_ladder
+
+
+class FakeASR:
+    def __init__(self, model_size='small'):
+        self.model_size = model_size
+        self.active_model_size = model_size
+        self.beam_size = 5
+        self.loaded = []
+
+    def use_model(self, model_size):
+        self.loaded.append(model_size)
+        self.active_model_size = model_size
+
+
+class FakeMT:
+    num_beams = 3
+
+
+def _controller(asr, mt, **kwargs):
+    kwargs.setdefault('window', 3)
+    kwargs.setdefault('min_dwell_s', 5.0)
+    ladder = default_ladder(5, 3, fallback_asr_model='base')
+    return QualityController(asr, mt, target_rtf=1.0, ladder=ladder, **kwargs)
+
+
+def test_steps_down_under_load_and_applies_levels():
+    asr, mt = FakeASR(), FakeMT()
+    ctl = _controller(asr, mt)
+    now = 100.0
+    names = []
+    for _ in range(4):
+        for _ in range(3):
+            now += 2.0
+            if ctl.observe(2.0, now=now):
+                ctl.apply()
+                names.append(ctl.level.name)
+        now += 10.0
+
+    assert names == ['greedy-mt', 'greedy', 'asr-base']
+    assert (asr.beam_size, mt.num_beams) == (1, 1)
+    assert asr.loaded == ['base']
+
+
+def test_long_utterances_within_rtf_do_not_downgrade():
+    ctl = _controller(FakeASR(), FakeMT())
+    # Frases de 15 s con 3 s de ASR+MT: latencia alta pero RTF 0.2
+    for t in range(10):
+        assert ctl.observe(3.0 / 15.0, now=100.0 + 10 * t) is None
+    assert ctl.level.name == 'full'
+
+
+def test_queue_depth_forces_immediate_downgrade():
+    ctl = _controller(FakeASR(), FakeMT(), max_queue_depth=2)
+    assert ctl.observe(0.1, queue_depth=3, now=50.0).name == 'greedy-mt'
+    assert ctl.transitions[0]['reason'] == 'colas=3'
+
+
+def test_hysteresis_and_dwell_before_upgrade():
+    asr, mt = FakeASR(), FakeMT()
+    ctl = _controller(asr, mt, upgrade_ratio=0.5)
+    ctl.observe(0.1, queue_depth=5, now=0.0)
+    assert ctl.index == 1
+
+    # Dentro del tiempo mínimo entre cambios: no sube aunque haya margen
+    for t in (1.0, 2.0, 3.0):
+        assert ctl.observe(0.1, now=t) is None
+    assert ctl.observe(0.1, now=10.0).name == 'full'
+    ctl.apply()
+    assert (asr.beam_size, mt.num_beams, asr.active_model_size) == (5, 3, 'small')
+
+    # Bajo el objetivo pero sin margen suficiente: se queda en su peldaño
+    ctl.observe(0.1, queue_depth=5, now=20.0)
+    for t in (30.0, 31.0, 32.0, 33.0):
+        assert ctl.observe(0.8, now=t) is None
+    assert ctl.index == 1
+
+
+def test_from_config_picks_next_smaller_whisper():
+    config = configparser.ConfigParser()
+    config.read_dict({'quality': {'target_rtf': '0.4', 'fallback_asr_model': 'auto'}})
+    ctl = QualityController.from_config(config, FakeASR('medium'), FakeMT())
+
+    assert ctl.target_rtf == 0.4
+    assert [level.name for level in ctl.ladder][-1] == 'asr-small'
@@ -0,0 +1,79 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from audio.replay import ReplayCapture, SessionRecorder, load_session
+
+
+def _frames(n, block=320):
+    rng = np.random.default_rng(0)
+    return [rng.integers(-1000, 1000, block, dtype=np.int16).tobytes() for _ in range(n)]
+
+
+def test_recorded_session_is_memory_mappable(tmp_path):
+    path = tmp_path / "session.dsr"
+    rec = SessionRecorder(path)
+    frames = _frames(5)
+    for i, f in enumerate(frames):
+        rec.write(f, 100.0 + i * 0.02)
+    rec.close()
+
+    records = load_session(path)
+    assert len(records) == 5
+    assert records[3]["pcm"].tobytes() == frames[3]
+    assert records[4]["t_adc"] == pytest.approx(100.08)
+
+
+@pytest.mark.asyncio
+async def test_fast_replay_yields_frames_then_tail_silence(tmp_path):
+    path = tmp_path / "session.dsr"
+    rec = SessionRecorder(path)
+    frames = _frames(10)
+    for i, f in enumerate(frames):
+        rec.write(f, i * 0.02)
+    rec.close()
+
+    replay = ReplayCapture(path, realtime=False, tail_silence_ms=100)
+    out = [f async for f in replay.frames()]
+    assert out[:10] == frames
+    assert out[10:] == [b"\x00" * 640] * 5
+
+
+@pytest.mark.asyncio
+async def test_realtime_replay_keeps_original_pacing(tmp_path):
+    path = tmp_path / "session.dsr"
+    rec = SessionRecorder(path)
+    for i, f in enumerate(_frames(6)):
+        rec.write(f, i * 0.02)
+    rec.close()
+
+    replay = ReplayCapture(path, realtime=True, tail_silence_ms=0)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    times = [t async for _, t in replay.timed_frames()]
+    assert loop.time() - start >= 0.09
+    assert np.diff(times) == pytest.approx([0.02] * 5, abs=1e-6)
+
+
+@pytest.mark.asyncio
+async def test_wav_capture_concatenates_corpus_with_gaps(tmp_path):
+    import wave
+    paths = []
+    for i, rate in enumerate((16000, 8000)):
+        path = tmp_path / f"utt{i}.wav"
+        with wave.open(str(path), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(rate)
+            w.writeframes(np.full(rate // 2, 1000, dtype=np.int16).tobytes())
+        paths.append(path)
+
+    from audio.replay import WavCapture
+    capture = WavCapture(paths, gap_ms=200, tail_silence_ms=0)
+    # 2 × (0.5 s de audio + 0.2 s de silencio), ambos a 16 kHz
+    assert capture.audio_seconds == pytest.approx(1.4)
+    frames = [f async for f in capture.frames()]
+    assert len(frames) == 70
+    assert frames[0] == np.full(320, 1000, dtype=np.int16).tobytes()
+    assert frames[30] == b"\x00" * 640
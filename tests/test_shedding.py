@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from pipeline.shedding import LatencyBudget, PolicyQueue, ShedCounter
+from utils.timing import LatencyTrace
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_discards_head_and_counts():
+    shed = ShedCounter()
+    q = PolicyQueue(maxsize=2, policy='drop-oldest', name='tts_q', shed=shed)
+    for item in (1, 2, 3):
+        await q.put(item)
+
+    assert [q.get_nowait(), q.get_nowait()] == [2, 3]
+    assert shed.snapshot() == {'tts_q:dropped': 1}
+    # El descartado cuenta como procesado: join() no se queda colgado
+    q.task_done()
+    q.task_done()
+    await q.join()
+
+
+@pytest.mark.asyncio
+async def test_coalesce_merges_into_last_item():
+    shed = ShedCounter()
+    q = PolicyQueue(maxsize=2, policy='coalesce', name='asr_q',
+                    merge=lambda last, new: last + new, shed=shed)
+    for item in ('a', 'b', 'c', 'd'):
+        await q.put(item)
+
+    assert [q.get_nowait(), q.get_nowait()] == ['a', 'bcd']
+    assert shed.snapshot() == {'asr_q:coalesced': 2}
+
+
+@pytest.mark.asyncio
+async def test_coalesce_without_merge_falls_back_to_drop_oldest():
+    q = PolicyQueue(maxsize=1, policy='coalesce', name='mt_q',
+                    merge=lambda last, new: None)
+    await q.put('a')
+    await q.put('b')
+
+    assert q.get_nowait() == 'b'
+    assert q.shed.snapshot() == {'mt_q:dropped': 1}
+
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        PolicyQueue(maxsize=1, policy='lifo')
+
+
+def test_budget_expires_after_deadline():
+    budget = LatencyBudget(asr_s=0.0, tts_s=1.0)
+    trace = LatencyTrace()
+    trace.mark('speech_end', time.monotonic() - 2.0)
+
+    assert budget.expired('tts', trace)
+    assert not budget.expired('asr', trace)  # 0 = sin plazo
+    trace.mark('speech_end', time.monotonic())
+    assert not budget.expired('tts', trace)
@@ -0,0 +1,55 @@
+import time
+
+import numpy as np
+
+from audio.speech_classifier import SegmentClassifier
+
+SR = 16000
+
+
+def _to_pcm(x):
+    return np.clip(x, -32768, 32767).astype(np.int16).tobytes()
+
+
+def _voiced(seconds=1.5, f0=140.0):
+    t = np.arange(int(SR * seconds)) / SR
+    harmonics = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 8))
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 3 * t)  # sílabas
+    return _to_pcm(4000 * envelope * harmonics)
+
+
+def test_voiced_signal_is_accepted():
+    clf = SegmentClassifier()
+    assert clf.is_speech(_voiced())
+    assert clf.accepted == 1 and clf.rejected == 0
+
+
+def test_white_noise_is_rejected():
+    clf = SegmentClassifier()
+    noise = np.random.default_rng(0).normal(0, 3000, SR)
+    assert not clf.is_speech(_to_pcm(noise))
+    assert clf.rejected == 1 and clf.rejected_audio_s == 1.0
+
+
+def test_click_in_silence_is_rejected():
+    clf = SegmentClassifier()
+    click = np.zeros(SR)
+    click[8000:8040] = 20000
+    assert not clf.is_speech(_to_pcm(click))
+
+
+def test_stats_report_saved_asr_time():
+    clf = SegmentClassifier()
+    clf.note_asr_cost(audio_s=2.0, asr_s=1.0)
+    clf.is_speech(b"\x00" * SR * 2)  # 1 s de silencio
+    assert clf.stats()['asr_s_saved'] == 0.5
+
+
+def test_classification_is_cheap():
+    clf = SegmentClassifier()
+    pcm = _voiced(seconds=15)
+    clf.is_speech(pcm)
+    start = time.perf_counter()
+    for _ in range(20):
+        clf.is_speech(pcm)
+    assert (time.perf_counter() - start) / 20 < 0.005
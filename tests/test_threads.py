@@ -0,0 +1,67 @@
+import configparser
+import os
+
+import pytest
+
+from utils.threads import ThreadBudget, affinity_supported, parse_weights, split_threads
+
+
+def test_split_threads_is_proportional_and_exact():
+    assert split_threads(8, {'asr': 2, 'mt': 2, 'tts': 1}) == {'asr': 3, 'mt': 3, 'tts': 2}
+    assert split_threads(5, {'asr': 2, 'mt': 2, 'tts': 1}) == {'asr': 2, 'mt': 2, 'tts': 1}
+    counts = split_threads(13, {'asr': 3, 'mt': 1, 'tts': 1})
+    assert sum(counts.values()) == 13 and counts['asr'] > counts['mt']
+
+
+def test_split_threads_gives_each_stage_one_thread():
+    assert split_threads(1, {'asr': 2, 'mt': 2, 'tts': 1}) == {'asr': 1, 'mt': 1, 'tts': 1}
+    # Peso 0: la etapa no entra en el reparto
+    assert split_threads(4, {'asr': 1, 'mt': 0}) == {'asr': 4}
+
+
+def test_budget_never_exceeds_cores():
+    budget = ThreadBudget().configure(max_workers=32, cpus=range(8))
+    assert budget.budget == 8 and budget.total_threads == 8
+    budget = ThreadBudget().configure(max_workers=4, cpus=range(8))
+    assert budget.total_threads == 4
+    assert budget.threads('asr') == 2 and budget.threads('tts') == 1
+
+
+def test_unconfigured_budget_keeps_backend_defaults():
+    assert ThreadBudget().threads('asr') is None
+
+
+@pytest.mark.skipif(not affinity_supported(), reason="sin afinidad por hilo")
+def test_pinned_stages_get_disjoint_cpus():
+    budget = ThreadBudget().configure(cpus=range(8), pin=True)
+    cpus = [set(budget.stage_cpus(s)) for s in ('asr', 'mt', 'tts')]
+    assert cpus[0].isdisjoint(cpus[1]) and cpus[1].isdisjoint(cpus[2])
+    assert set().union(*cpus) == set(range(8))
+
+
+@pytest.mark.skipif(not affinity_supported(), reason="sin afinidad por hilo")
+def test_stage_executor_runs_on_its_cpus():
+    cpu = sorted(os.sched_getaffinity(0))[0]
+    budget = ThreadBudget().configure(max_workers=1, cpus=[cpu], pin=True)
+    try:
+        executor = budget.executor('asr')
+        assert budget.executor('asr') is executor
+        assert executor.submit(os.sched_getaffinity, 0).result() == {cpu}
+        # pinned() restaura la afinidad del hilo al salir
+        before = os.sched_getaffinity(0)
+        with budget.pinned('mt'):
+            assert os.sched_getaffinity(0) == {cpu}
+        assert os.sched_getaffinity(0) == before
+    finally:
+        budget.shutdown()
+
+
+def test_from_config_and_report():
+    config = configparser.ConfigParser()
+    config.read_dict({'performance': {'max_workers': '6', 'thread_weights': 'asr:1, mt:1, tts:1',
+                                      'pin_threads': 'false'}})
+    budget = ThreadBudget.from_config(config)
+    assert budget.budget == min(6, len(budget.cpus))
+    assert parse_weights('asr:2, mt:0.5') == {'asr': 2.0, 'mt': 0.5}
+    report = budget.report({'mt': 'cuda'})
+    assert 'asr' in report and 'GPU' in report
@@ -1,5 +1,8 @@
 import time
-from utils.timing import StageTimer
+
+import pytest
+
+from utils.timing import LatencyTrace, StageTimer
 
 
 def test_stage_timer_accumulates_and_clears():
@@ -21,3 +24,101 @@ def test_stage_timer_stop_adds_total():
     timer.stop()
     summary = timer.summary()
     assert 'total=' in summary
+
+
+def test_latency_trace_queue_waits_and_origin():
+    trace = LatencyTrace(origin=10.0)
+    trace.mark('speech_end', 11.0)
+    trace.mark('asr_q_in', 11.2)
+    trace.mark('asr_q_out', 11.5)
+    trace.mark('dac', 12.5)
+    assert trace.since_origin('dac') == pytest.approx(2.5)
+    assert trace.between('speech_end', 'dac') == pytest.approx(1.5)
+    assert trace.queue_waits() == {'asr_q': pytest.approx(0.3)}
+    assert list(trace.as_dict()) == ['speech_end', 'asr_q_in', 'asr_q_out', 'dac']
+    assert trace.between('speech_end', 'missing') is None
+
+
+def test_log_histogram_percentiles_within_precision():
+    from utils.timing import LogHistogram
+
+    hist = LogHistogram(precision=0.01)
+    size = hist._counts.nbytes
+    values = [i / 1000 for i in range(1, 10001)]  # 1 ms .. 10 s
+    for v in values:
+        hist.record(v)
+    snap = hist.snapshot()
+    assert snap['count'] == 10000
+    assert snap['mean'] == pytest.approx(sum(values) / len(values))
+    assert snap['p50'] == pytest.approx(5.0, rel=0.01)
+    assert snap['p99'] == pytest.approx(9.9, rel=0.01)
+    assert snap['max'] == 10.0
+    assert hist._counts.nbytes == size
+
+
+def test_stage_timer_feeds_aggregator():
+    from utils.timing import LatencyStats
+
+    stats = LatencyStats()
+    for _ in range(3):
+        timer = StageTimer(stats=stats)
+        with timer.stage('asr'):
+            pass
+    stats.record('rtf', 0.5)
+    snap = stats.snapshot()
+    assert snap['asr']['count'] == 3
+    assert snap['rtf']['p50'] == pytest.approx(0.5, rel=0.01)
+    assert 'rtf' in stats.report() and 'asr' in stats.report()
+
+
+def _spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+    return 'ok'
+
+
+@pytest.mark.asyncio
+async def test_stage_records_executor_cpu_and_threads():
+    import threading
+    from utils.timing import LatencyStats, cpu_section, run_blocking
+
+    stats = LatencyStats()
+    timer = StageTimer(stats=stats)
+    with timer.stage('asr'):
+        assert await run_blocking(_spin, 0.05, threads=4) == 'ok'
+    with timer.stage('idle'):
+        await run_blocking(time.sleep, 0.05)
+    with timer.stage('tts', threads=2):
+        with cpu_section(threads=2):
+            _spin(0.02)
+
+    report = timer.cpu_report(audio_duration=0.5)
+    assert report['asr']['cpu'] >= 0.03
+    assert report['asr']['threads'] == 4
+    assert report['asr']['thread_id'] != threading.get_ident()
+    assert report['idle']['cpu'] < report['asr']['cpu'] / 2
+    assert report['tts']['threads'] == 2
+    assert report['tts']['thread_id'] == threading.get_ident()
+    assert report['asr']['cpu_rtf'] == pytest.approx(report['asr']['cpu'] / 0.5)
+    assert stats.snapshot()['cpu_rtf:asr']['count'] == 1
+    assert report['tts']['cpu'] >= 0.01
+
+
+@pytest.mark.asyncio
+async def test_suspended_stage_is_not_charged_for_other_tasks():
+    import asyncio
+    from utils.timing import LatencyStats, cpu_section
+
+    timer = StageTimer(stats=LatencyStats())
+
+    async def busy_neighbour():
+        _spin(0.05)
+
+    with timer.stage('tts'):
+        with cpu_section():
+            _spin(0.005)
+        # Mientras la etapa cede el loop, otra tarea consume CPU en este hilo
+        await asyncio.gather(asyncio.sleep(0), busy_neighbour())
+
+    assert timer.cpu_report()['tts']['cpu'] < 0.03